@@ -0,0 +1,422 @@
+"""
+Benchmark runner for the fairness toolkit
+=========================================
+
+Times the public functions of `fairness.metrics`, `fairness.single_metrics`,
+`fairness.groups`, `fairness.adapters` and `fairness.frame` on synthetic
+evaluation data, records peak memory with `tracemalloc`, and writes the
+results as JSON (and optionally CSV) so runs on the same machine can be
+compared across releases.
+
+Synthetic data has between 1e3 and 1e7 rows and 1 to 6 protected
+attributes with 2, 3, 4, 5, 6 and 8 levels respectively. Predictions agree
+with the true label 80% of the time.
+
+Usage
+-----
+From the repository root, with the package installed (`pip install -e .`):
+
+    python benchmarks/run_benchmarks.py --output results.json
+
+Run a smaller grid, or only some functions:
+
+    python benchmarks/run_benchmarks.py --rows 1e3 1e5 --attrs 2 6 \\
+        --filter all_intersect --output results.json
+
+Compare a run against an earlier one:
+
+    python benchmarks/run_benchmarks.py --output new.json \\
+        --compare old.json
+
+Each case is run `--repeat` times (default 3) and the minimum and median
+wall-clock times are reported; a case whose first run exceeds
+`--max-seconds` is not repeated. Peak memory is measured in a separate,
+untimed run, because tracing allocations slows the code down.
+"""
+
+import argparse
+import csv
+import datetime
+import gc
+import inspect
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fairness import adapters, groups, metrics, single_metrics
+from fairness.frame import FairnessFrame
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_ATTRS = [1, 2, 4, 6]
+ATTR_LEVELS = [2, 3, 4, 5, 6, 8]
+FIELDS = ["name", "n_rows", "n_attrs", "repeats", "min_s", "median_s",
+          "peak_mb"]
+
+
+# ---------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------
+
+def make_data(n_rows, n_attrs, seed=0):
+    """
+    Build synthetic evaluation data.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of observations.
+    n_attrs : int
+        Number of protected attributes (at most 6).
+    seed : int, optional
+        Seed for the random generator.
+
+    Returns
+    -------
+    dict
+        Inputs shared by all benchmark cases.
+    """
+    if not 1 <= n_attrs <= len(ATTR_LEVELS):
+        raise ValueError(f"n_attrs must be between 1 and {len(ATTR_LEVELS)}.")
+
+    rng = np.random.default_rng(seed)
+
+    subject_labels_dict = {}
+    for j in range(n_attrs):
+        levels = np.array([f"a{j}_{k}" for k in range(ATTR_LEVELS[j])])
+        subject_labels_dict[f"attr{j}"] = levels[
+            rng.integers(0, len(levels), size=n_rows)]
+
+    y_true = rng.integers(0, 2, size=n_rows).astype(np.int8)
+    flip = rng.random(n_rows) < 0.2
+    y_pred = np.where(flip, 1 - y_true, y_true).astype(np.int8)
+
+    df = pd.DataFrame(subject_labels_dict)
+    protected = list(subject_labels_dict)
+    subject_labels = groups.make_intersectional_labels(
+        df, protected, categorical=True)
+    eval_df = groups.make_eval_df(df_test=df, protected=protected,
+                                  y_pred=y_pred, y_true=y_true)
+    compact_df = groups.make_eval_df(df_test=df, protected=protected,
+                                     y_pred=y_pred, y_true=y_true,
+                                     compact=True)
+
+    first_attr = subject_labels_dict["attr0"]
+
+    return {
+        "df": df,
+        "protected": protected,
+        "subject_labels_dict": subject_labels_dict,
+        "subject_labels": subject_labels,
+        "group_label": subject_labels[0],
+        "other_label": subject_labels[-1],
+        "group_labels_dict": {k: v[0] for k, v in
+                              subject_labels_dict.items()},
+        "first_attr": first_attr,
+        "privileged_label": first_attr[0],
+        "y_pred": y_pred,
+        "y_true": y_true,
+        "eval_df": eval_df,
+        "compact_df": compact_df,
+    }
+
+
+# ---------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------
+
+def _metrics_case(name, func):
+    """Wrap a public `fairness.metrics` function by its naming pattern."""
+    if name.startswith("group_") and name.endswith(("_diff", "_ratio")):
+        return lambda d: func(d["group_label"], d["other_label"],
+                              d["subject_labels"], d["y_pred"], d["y_true"])
+    if name.startswith("group_"):
+        return lambda d: func(d["group_label"], d["subject_labels"],
+                              d["y_pred"], d["y_true"])
+    if name.startswith("intersect_"):
+        return lambda d: func(d["group_labels_dict"],
+                              d["subject_labels_dict"], d["y_pred"],
+                              d["y_true"])
+    if name.startswith(("all_intersect_", "max_intersect_")):
+        return lambda d: func(d["subject_labels_dict"], d["y_pred"],
+                              d["y_true"])
+    return None
+
+
+def _frame_metrics(d):
+    frame = FairnessFrame(d["y_pred"], d["y_true"],
+                          subject_labels=d["subject_labels"],
+                          subject_labels_dict=d["subject_labels_dict"])
+    for metric in ("acc", "fnr", "fpr", "for", "fdr"):
+        getattr(frame, f"all_intersect_{metric}s")()
+        getattr(frame, f"max_intersect_{metric}_diff")()
+        getattr(frame, f"group_{metric}")(d["group_label"])
+    frame.calculate_EOD(d["privileged_label"], category="attr0")
+
+
+def build_cases():
+    """
+    Collect the benchmark cases.
+
+    Every public function in `fairness.metrics` that follows the
+    group_*/intersect_*/all_intersect_*/max_intersect_* naming is picked up
+    automatically, so new metrics are benchmarked without editing this file.
+
+    Returns
+    -------
+    dict
+        Maps case name to a callable taking the data dict from `make_data`.
+    """
+    cases = {}
+
+    for name, func in inspect.getmembers(metrics, inspect.isfunction):
+        if name.startswith("_") or func.__module__ != metrics.__name__:
+            continue
+        case = _metrics_case(name, func)
+        if case is not None:
+            cases[f"metrics.{name}"] = case
+
+    cases.update({
+        "single_metrics.group_to_binary": lambda d:
+            single_metrics.group_to_binary(d["first_attr"],
+                                           d["privileged_label"]),
+        "single_metrics.calculate_TP_FN_FP_TN": lambda d:
+            single_metrics.calculate_TP_FN_FP_TN(d["y_true"], d["y_pred"]),
+        "single_metrics.calculate_EOD": lambda d:
+            single_metrics.calculate_EOD(d["y_true"], d["y_pred"],
+                                         d["first_attr"],
+                                         d["privileged_label"]),
+        "single_metrics.calculate_AOD": lambda d:
+            single_metrics.calculate_AOD(d["y_true"], d["y_pred"],
+                                         d["first_attr"],
+                                         d["privileged_label"]),
+        "single_metrics.calculate_DI": lambda d:
+            single_metrics.calculate_DI(d["y_pred"], d["first_attr"],
+                                        d["privileged_label"]),
+        "single_metrics.calculate_EOD_AOD_DI_by_group": lambda d:
+            single_metrics.calculate_EOD_AOD_DI_by_group(
+                d["y_true"], d["y_pred"], d["first_attr"],
+                d["privileged_label"]),
+        "groups.make_intersectional_labels": lambda d:
+            groups.make_intersectional_labels(d["df"], d["protected"]),
+        "groups.make_intersectional_labels[categorical]": lambda d:
+            groups.make_intersectional_labels(d["df"], d["protected"],
+                                              categorical=True),
+        "groups.make_eval_df": lambda d:
+            groups.make_eval_df(df_test=d["df"], protected=d["protected"],
+                                y_pred=d["y_pred"], y_true=d["y_true"]),
+        "groups.make_eval_df[compact]": lambda d:
+            groups.make_eval_df(df_test=d["df"], protected=d["protected"],
+                                y_pred=d["y_pred"], y_true=d["y_true"],
+                                compact=True),
+        "adapters.unpack_eval_df": lambda d:
+            adapters.unpack_eval_df(d["eval_df"]),
+        "adapters.unpack_eval_df_arrays": lambda d:
+            adapters.unpack_eval_df_arrays(d["compact_df"]),
+        "adapters.make_subject_labels_dict": lambda d:
+            adapters.make_subject_labels_dict(d["df"], d["protected"]),
+        "frame.FairnessFrame[all metrics]": _frame_metrics,
+    })
+
+    return cases
+
+
+# ---------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------
+
+def time_case(func, data, repeat, max_seconds):
+    """
+    Time func(data), returning the list of wall-clock durations.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(data)
+        times.append(time.perf_counter() - start)
+        if times[-1] > max_seconds:
+            break
+    return times
+
+
+def peak_memory(func, data):
+    """
+    Peak memory in MB allocated while running func(data).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def run(rows, attrs, pattern=None, repeat=3, max_seconds=10.0,
+        memory=True, seed=0):
+    """
+    Run every selected case on every (rows, attrs) combination.
+
+    Returns
+    -------
+    list[dict]
+        One record per case and data size, with the keys in FIELDS.
+    """
+    cases = build_cases()
+    if pattern is not None:
+        cases = {k: v for k, v in cases.items() if re.search(pattern, k)}
+
+    results = []
+    for n_rows in rows:
+        for n_attrs in attrs:
+            data = make_data(n_rows, n_attrs, seed=seed)
+            for name, func in cases.items():
+                times = time_case(func, data, repeat, max_seconds)
+                record = {
+                    "name": name,
+                    "n_rows": n_rows,
+                    "n_attrs": n_attrs,
+                    "repeats": len(times),
+                    "min_s": min(times),
+                    "median_s": statistics.median(times),
+                    "peak_mb": peak_memory(func, data) if memory else None,
+                }
+                results.append(record)
+                _print_record(record)
+            del data
+    return results
+
+
+def environment():
+    """
+    Describe the machine and library versions the results come from.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+# ---------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------
+
+def _print_record(record):
+    peak = record["peak_mb"]
+    peak = "" if peak is None else f"{peak:10.1f} MB"
+    print(f"{record['name']:<55} rows={record['n_rows']:<9} "
+          f"attrs={record['n_attrs']} {record['min_s'] * 1e3:12.3f} ms"
+          f"{peak}", flush=True)
+
+
+def write_json(path, results, env):
+    with open(path, "w") as f:
+        json.dump({"environment": env, "results": results}, f, indent=2)
+
+
+def write_csv(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def compare(results, baseline_path):
+    """
+    Print the time ratio of each case against a previous JSON run.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    key = lambda r: (r["name"], r["n_rows"], r["n_attrs"])  # noqa: E731
+    old = {key(r): r for r in baseline}
+
+    print(f"\n{'case':<55} {'rows':<9} attrs  old/new")
+    for record in results:
+        previous = old.get(key(record))
+        if previous is None or record["min_s"] == 0:
+            continue
+        speedup = previous["min_s"] / record["min_s"]
+        print(f"{record['name']:<55} {record['n_rows']:<9} "
+              f"{record['n_attrs']:<6} {speedup:6.2f}x")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fairness toolkit on synthetic data.")
+    parser.add_argument("--rows", nargs="+", type=float,
+                        default=DEFAULT_ROWS,
+                        help="Row counts to benchmark (default: 1e3 to 1e7).")
+    parser.add_argument("--attrs", nargs="+", type=int,
+                        default=DEFAULT_ATTRS,
+                        help="Numbers of protected attributes (1-6).")
+    parser.add_argument("--filter", default=None,
+                        help="Only run cases whose name matches this regex.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per case (default: 3).")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Do not repeat cases slower than this.")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the tracemalloc peak-memory run.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="JSON results file.")
+    parser.add_argument("--csv", default=None,
+                        help="Also write the results to this CSV file.")
+    parser.add_argument("--compare", default=None,
+                        help="Previous JSON results to compare against.")
+    parser.add_argument("--list", action="store_true",
+                        help="List the case names and exit.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    if args.list:
+        for name in build_cases():
+            print(name)
+        return
+
+    results = run(
+        rows=[int(n) for n in args.rows],
+        attrs=args.attrs,
+        pattern=args.filter,
+        repeat=args.repeat,
+        max_seconds=args.max_seconds,
+        memory=not args.no_memory,
+        seed=args.seed,
+    )
+
+    write_json(args.output, results, environment())
+    if args.csv is not None:
+        write_csv(args.csv, results)
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 
 
 def unpack_eval_df(eval_df):
@@ -5,7 +7,7 @@ def unpack_eval_df(eval_df):
     Convert eval_df into the list inputs expected by group_* metric functions.
 
     Expects eval_df columns:
-      - subject_label (str)
+      - subject_label (str or category)
       - y_pred (0/1)
       - y_true (0/1)
 
@@ -15,11 +17,88 @@ def unpack_eval_df(eval_df):
     predictions    : list[int]
     true_statuses  : list[int]
     """
-    subject_labels = eval_df["subject_label"].astype(str).tolist()
+    labels = eval_df["subject_label"]
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        # format each category once rather than every row
+        categories = labels.cat.categories.astype(str).tolist() + ["nan"]
+        subject_labels = np.asarray(categories, dtype=object)[
+            labels.cat.codes.to_numpy()].tolist()
+    else:
+        subject_labels = labels.astype(str).tolist()
 
     # cast to plain Python int so you don't see np.int64 everywhere
-    predictions = [int(x) for x in eval_df["y_pred"].to_list()]
-    true_statuses = [int(x) for x in eval_df["y_true"].to_list()]
+    predictions = _int_list(eval_df["y_pred"], "y_pred")
+    true_statuses = _int_list(eval_df["y_true"], "y_true")
+
+    return subject_labels, predictions, true_statuses
+
+
+def _int_list(values: pd.Series, name: str) -> list:
+    """
+    Return a column as Python ints, failing like int(x) on missing values.
+    """
+    arr = values.to_numpy()
+    if arr.dtype.kind == "f":
+        if not np.isfinite(arr).all():
+            raise ValueError(
+                f"eval_df['{name}'] contains missing or non-finite values."
+            )
+    elif arr.dtype.kind not in "iub":
+        # object columns: convert one by one so bad values still raise
+        return [int(x) for x in arr]
+    return arr.astype(int).tolist()
+
+
+def _binary_int8(values: pd.Series, name: str) -> np.ndarray:
+    """
+    Return a 0/1 column as an int8 array, without copying when possible.
+    """
+    arr = values.to_numpy()
+    if arr.dtype == bool:
+        return arr.view(np.int8)
+    if not ((arr == 0) | (arr == 1)).all():
+        raise ValueError(f"eval_df['{name}'] must contain only 0/1 values.")
+    if arr.dtype == np.int8:
+        return arr
+    return arr.astype(np.int8)
+
+
+def unpack_eval_df_arrays(eval_df):
+    """
+    Convert eval_df into array inputs for the metric functions.
+
+    Unlike `unpack_eval_df`, no per-row Python objects are created: labels
+    are returned as a pandas Categorical (integer codes plus categories) and
+    outcomes as int8 arrays. For an eval_df built with
+    ``make_eval_df(..., compact=True)`` these are views of the DataFrame's
+    own columns. The group_* metric functions accept these arrays directly;
+    the intersect_* functions take a subject_labels_dict instead (see
+    `make_subject_labels_dict`), though they accept the int8 outcomes.
+
+    Expects eval_df columns:
+      - subject_label (str or category)
+      - y_pred (0/1)
+      - y_true (0/1)
+
+    Returns
+    -------
+    subject_labels : pd.Categorical
+    predictions    : np.ndarray[int8]
+    true_statuses  : np.ndarray[int8]
+
+    Raises
+    ------
+    ValueError
+        If y_pred or y_true contain values other than 0/1.
+    """
+    labels = eval_df["subject_label"]
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        subject_labels = labels.array
+    else:
+        subject_labels = pd.Categorical(labels)
+
+    predictions = _binary_int8(eval_df["y_pred"], "y_pred")
+    true_statuses = _binary_int8(eval_df["y_true"], "y_true")
 
     return subject_labels, predictions, true_statuses
 
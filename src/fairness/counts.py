@@ -0,0 +1,1138 @@
+"""
+fairness.counts
+===============
+
+Confusion-count engine shared by the group-based metric functions.
+
+Every rate reported by `fairness.metrics` (accuracy, FNR, FPR, FOR and FDR)
+is a ratio of confusion-matrix counts. Rather than rescanning the evaluation
+data once per group and once per metric, the helpers here factorize the group
+labels once and count true/false positives/negatives for every group in a
+single vectorized pass.
+
+Counts are stored with a trailing axis of length 4 in the order given by
+`OUTCOMES`, i.e. (tn, fp, fn, tp). This is the outcome code
+``2 * y_true + y_pred``, so a single `np.bincount` over
+``4 * group_code + outcome_code`` yields the whole table.
+
+Counts are additive, so tables built by separate workers on their own
+shards of the data can be combined exactly with `merge_counts`, and shipped
+between processes with `IntersectCounts.to_bytes` / `from_bytes`.
+
+Every table can be built with a sample_weight (e.g. survey weights), in
+which case the counts are float sums of weights computed with a weighted
+`np.bincount`, so a compact weighted sample gives the same rates as the
+dataset expanded by duplicating rows.
+
+Typical usage
+-------------
+>>> from fairness.counts import GroupCounts
+>>> table = GroupCounts.from_labels(subject_labels, y_pred, y_true)
+>>> table.rate("Sex=F|age_group=older", "fnr")
+>>> dict(zip(table.labels, table.rates("acc")))
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+import json
+import math
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+OUTCOMES = ("tn", "fp", "fn", "tp")
+
+# Outcome columns (see OUTCOMES) summed for the numerator and denominator of
+# each rate.
+_RATE_TERMS = {
+    "acc": ((0, 3), (0, 1, 2, 3)),
+    "fnr": ((2,), (2, 3)),
+    "fpr": ((1,), (0, 1)),
+    "for": ((2,), (0, 2)),
+    "fdr": ((1,), (1, 3)),
+}
+
+RATE_METRICS = tuple(_RATE_TERMS)
+
+# Ways of comparing two groups' rates (see pairwise_rates).
+PAIRWISE_KINDS = ("diff", "ratio")
+
+# Leading bytes of a serialized IntersectCounts (see IntersectCounts.to_bytes).
+_MAGIC = b"FCT1"
+
+
+def _check_metric(metric: str) -> None:
+    if metric not in _RATE_TERMS:
+        raise ValueError(
+            f"Unknown metric '{metric}'. Supported: {list(RATE_METRICS)}"
+        )
+
+
+def outcome_codes(predictions, true_statuses) -> np.ndarray:
+    """
+    Encode each observation's confusion-matrix cell as an integer.
+
+    Parameters
+    ----------
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+
+    Returns
+    -------
+    np.ndarray
+        int8 array of ``2 * y_true + y_pred`` (0=tn, 1=fp, 2=fn, 3=tp).
+
+    Raises
+    ------
+    ValueError
+        If predictions and true_statuses differ in length.
+    """
+    predictions = np.asarray(predictions)
+    true_statuses = np.asarray(true_statuses)
+    if predictions.shape != true_statuses.shape:
+        raise ValueError(
+            "predictions and true_statuses must have the same length. "
+            f"Got {len(predictions)} and {len(true_statuses)}."
+        )
+
+    codes = true_statuses.astype(bool).astype(np.int8) << 1
+    codes |= predictions.astype(bool).astype(np.int8)
+    return codes
+
+
+def factorize_labels(labels, *, sort: bool = False) -> tuple[np.ndarray, list]:
+    """
+    Map group labels to integer codes.
+
+    Parameters
+    ----------
+    labels : array-like
+        One label per observation. Lists, NumPy arrays, pandas Series and
+        pandas Categoricals are accepted; categoricals reuse their codes.
+    sort : bool, optional
+        If True, codes follow the sorted order of the unique labels.
+        Otherwise they follow first-seen order. Default is False.
+
+    Returns
+    -------
+    codes : np.ndarray
+        Integer code per observation; missing labels are coded -1.
+    uniques : list
+        The label corresponding to each code.
+    """
+    if not isinstance(labels, (np.ndarray, pd.Series, pd.Index,
+                               pd.api.extensions.ExtensionArray)):
+        labels = pd.Series(list(labels))
+
+    codes, uniques = pd.factorize(labels, sort=sort)
+    return np.asarray(codes), uniques.tolist()
+
+
+def encode_levels(labels, levels: Sequence) -> np.ndarray:
+    """
+    Code labels against a known list of levels.
+
+    Parameters
+    ----------
+    labels : array-like
+        One label per observation.
+    levels : Sequence
+        Known labels; the code of a label is its position in levels.
+
+    Returns
+    -------
+    np.ndarray
+        int64 code per observation; labels not in levels, and missing
+        labels, are coded -1.
+    """
+    codes, uniques = factorize_labels(labels)
+    lookup = {level: i for i, level in enumerate(levels)}
+    # the trailing -1 maps missing labels (code -1) to -1
+    mapping = np.array([lookup.get(label, -1) for label in uniques] + [-1],
+                       dtype=np.int64)
+    return mapping[codes]
+
+
+def check_sample_weight(sample_weight,
+                        n_samples: int) -> Optional[np.ndarray]:
+    """
+    Validate per-observation weights.
+
+    Parameters
+    ----------
+    sample_weight : array-like of float or None
+        Weight of each observation.
+    n_samples : int
+        Expected number of observations.
+
+    Returns
+    -------
+    np.ndarray or None
+        float64 weights, or None if sample_weight is None.
+
+    Raises
+    ------
+    ValueError
+        If the weights are not one-dimensional of length n_samples, or
+        contain negative or non-finite values.
+    """
+    if sample_weight is None:
+        return None
+
+    weights = np.asarray(sample_weight, dtype=np.float64)
+    if weights.ndim != 1 or len(weights) != n_samples:
+        raise ValueError(
+            f"sample_weight must be one-dimensional with {n_samples} "
+            f"entries. Got shape {weights.shape}."
+        )
+    if not np.isfinite(weights).all() or (weights < 0).any():
+        raise ValueError("sample_weight must be finite and non-negative.")
+    return weights
+
+
+def confusion_counts(codes: np.ndarray, outcomes: np.ndarray,
+                     n_groups: int,
+                     sample_weight: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Count confusion-matrix outcomes per group in one pass.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Group code per observation in ``[0, n_groups)``; negative codes are
+        ignored.
+    outcomes : np.ndarray
+        Outcome code per observation, as returned by `outcome_codes`.
+    n_groups : int
+        Number of groups.
+    sample_weight : np.ndarray or None, optional
+        Weight of each observation. If given, the counts are float sums of
+        weights.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_groups, 4) with columns (tn, fp, fn, tp).
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    keep = codes >= 0
+    if not keep.all():
+        codes = codes[keep]
+        outcomes = outcomes[keep]
+        if sample_weight is not None:
+            sample_weight = sample_weight[keep]
+
+    flat = np.bincount(codes * 4 + outcomes, weights=sample_weight,
+                       minlength=n_groups * 4)
+    return flat.reshape(n_groups, 4)
+
+
+def rate_terms(counts: np.ndarray,
+               metric: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the numerator and denominator counts of a rate.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Confusion counts with a trailing axis of length 4.
+    metric : str
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        (numerator, denominator), each with the leading shape of counts.
+    """
+    _check_metric(metric)
+    numer_cols, denom_cols = _RATE_TERMS[metric]
+    counts = np.asarray(counts)
+    numer = counts[..., list(numer_cols)].sum(axis=-1)
+    denom = counts[..., list(denom_cols)].sum(axis=-1)
+    return numer, denom
+
+
+def rates_from_counts(counts: np.ndarray, metric: str) -> np.ndarray:
+    """
+    Compute a rate from confusion counts.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Confusion counts with a trailing axis of length 4.
+    metric : str
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+
+    Returns
+    -------
+    np.ndarray
+        Float rates with the leading shape of counts. Entries whose
+        denominator is zero are np.nan.
+    """
+    numer, denom = rate_terms(counts, metric)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(denom > 0, numer / np.where(denom > 0, denom, 1),
+                         np.nan)
+    return rates.astype(float)
+
+
+def pairwise_rates(rates: np.ndarray, kind: str = "diff",
+                   natural_log: bool = True) -> np.ndarray:
+    """
+    Compare every pair of rates in one vectorized operation.
+
+    Follows the group_*_diff and group_*_ratio functions of
+    `fairness.metrics`: differences are absolute, ratios are the larger
+    rate over the smaller (so always >= 1), and a pair is np.nan if either
+    rate is undefined or, for ratios, if either rate is 0.
+
+    Parameters
+    ----------
+    rates : np.ndarray
+        Array of shape (n_groups,), e.g. from `GroupCounts.rates`.
+    kind : str, optional
+        "diff" (default) or "ratio".
+    natural_log : bool, optional
+        If True (default), return the natural log of ratios. Ignored for
+        differences.
+
+    Returns
+    -------
+    np.ndarray
+        Symmetric array of shape (n_groups, n_groups).
+
+    Raises
+    ------
+    ValueError
+        If kind is not "diff" or "ratio".
+    """
+    if kind not in PAIRWISE_KINDS:
+        raise ValueError(
+            f"Unknown kind '{kind}'. Supported: {list(PAIRWISE_KINDS)}"
+        )
+    rates = np.asarray(rates, dtype=float)
+    high = np.maximum(rates[:, None], rates[None, :])
+    low = np.minimum(rates[:, None], rates[None, :])
+    if kind == "diff":
+        return high - low
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(low > 0, high / low, np.nan)
+        if natural_log is True:
+            ratios = np.log(ratios)
+    return ratios
+
+
+def max_diff_and_ratio(counts: np.ndarray, metric: str,
+                       min_support: Optional[int] = None,
+                       natural_log: bool = True
+                       ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rates, max diff and max ratio of a batch of confusion tables.
+
+    Follows `max_intersect_*_diff` / `_ratio`: without min_support the
+    result is np.nan whenever any group's rate is undefined; with it, groups
+    with fewer than min_support observations in the rate's denominator are
+    skipped.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Array of shape (n_tables, n_cells, 4).
+    metric : str
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+    min_support : int or None, optional
+        See `fairness.metrics.max_intersect_acc_diff`.
+    natural_log : bool, optional
+        If True (default), return the natural log of the max ratio.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        Rates of shape (n_tables, n_cells), and max diffs and max ratios of
+        shape (n_tables,).
+    """
+    rates = rates_from_counts(counts, metric)
+    if min_support is None:
+        keep = np.ones(rates.shape, dtype=bool)
+        defined = ~np.isnan(rates).any(axis=1)
+    else:
+        _, denom = rate_terms(counts, metric)
+        # as IntersectCounts.supported_rates
+        keep = (denom >= min_support) & (denom > 0)
+        defined = np.ones(len(rates), dtype=bool)
+    defined &= keep.any(axis=1)
+
+    high = np.where(keep, rates, -np.inf).max(axis=1, initial=-np.inf)
+    low = np.where(keep, rates, np.inf).min(axis=1, initial=np.inf)
+    has_zero = (keep & (rates == 0)).any(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_diff = np.where(defined, high - low, np.nan)
+        max_ratio = np.where(defined & ~has_zero, high / low, np.nan)
+        if natural_log is True:
+            max_ratio = np.log(max_ratio)
+    return rates, max_diff, max_ratio
+
+
+@dataclass(frozen=True)
+class GroupCounts:
+    """
+    Per-group confusion counts for a single list of subject labels.
+
+    Attributes
+    ----------
+    labels:
+        Unique group labels in first-seen order.
+    counts:
+        Array of shape (len(labels), 4) with columns (tn, fp, fn, tp).
+    """
+
+    labels: list
+    counts: np.ndarray
+    _index: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_index",
+                           {label: i for i, label in enumerate(self.labels)})
+
+    @classmethod
+    def from_labels(cls, subject_labels: Sequence, predictions: Sequence,
+                    true_statuses: Sequence,
+                    sample_weight: Optional[Sequence] = None
+                    ) -> "GroupCounts":
+        """
+        Build the table from per-observation labels and outcomes.
+
+        Parameters
+        ----------
+        subject_labels : array-like
+            Group label for every observation in the evaluation dataset.
+        predictions : array-like of bool
+            Predicted diagnoses for each observation.
+        true_statuses : array-like of bool
+            True diagnoses for each observation.
+        sample_weight : array-like of float or None, optional
+            Weight of each observation; see `check_sample_weight`.
+
+        Returns
+        -------
+        GroupCounts
+            The per-group confusion table.
+
+        Raises
+        ------
+        ValueError
+            If the inputs differ in length.
+        """
+        outcomes = outcome_codes(predictions, true_statuses)
+        if len(subject_labels) != len(outcomes):
+            raise ValueError(
+                "subject_labels, predictions and true_statuses must have the "
+                f"same length. Got {len(subject_labels)} and {len(outcomes)}."
+            )
+
+        weights = check_sample_weight(sample_weight, len(outcomes))
+        codes, labels = factorize_labels(subject_labels)
+        return cls(labels=labels,
+                   counts=confusion_counts(codes, outcomes, len(labels),
+                                           weights))
+
+    def index(self, group_label) -> int:
+        """Return the row of a group in the table, or -1 if absent."""
+        return self._index.get(group_label, -1)
+
+    def group(self, group_label) -> np.ndarray:
+        """
+        Return the (tn, fp, fn, tp) counts of one group.
+
+        Groups absent from the data have all-zero counts.
+        """
+        i = self._index.get(group_label)
+        if i is None:
+            return np.zeros(4, dtype=self.counts.dtype)
+        return self.counts[i]
+
+    def rates(self, metric: str) -> np.ndarray:
+        """Return the given rate for every group, aligned with labels."""
+        return rates_from_counts(self.counts, metric)
+
+    def rate(self, group_label, metric: str) -> float:
+        """
+        Return the given rate for one group.
+
+        Returns np.nan if the group has no observations in the rate's
+        denominator.
+        """
+        return float(rates_from_counts(self.group(group_label), metric))
+
+    def pairwise(self, metric: str, kind: str = "diff",
+                 natural_log: bool = True) -> np.ndarray:
+        """
+        Return the (n_groups, n_groups) matrix comparing every pair of
+        groups' rates; see `pairwise_rates`.
+        """
+        return pairwise_rates(self.rates(metric), kind, natural_log)
+
+    def compare(self, group_a_label, group_b_label, metric: str,
+                kind: str = "diff", natural_log: bool = True) -> float:
+        """
+        Compare the rates of two groups; see `pairwise_rates`.
+
+        Groups absent from the data have an undefined rate, so the result
+        is np.nan.
+        """
+        rates = rates_from_counts(np.stack([self.group(group_a_label),
+                                            self.group(group_b_label)]),
+                                  metric)
+        return float(pairwise_rates(rates, kind, natural_log)[0, 1])
+
+
+def encode_categories(subject_labels_dict: dict,
+                      n_samples: int) -> tuple[tuple, tuple, list]:
+    """
+    Factorize every protected category of a subject_labels_dict.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    n_samples : int
+        Expected number of observations.
+
+    Returns
+    -------
+    categories : tuple[str]
+        Category names in sorted order.
+    levels : tuple[list]
+        Sorted unique labels of each category.
+    codes : list[np.ndarray]
+        Level code per observation for each category (-1 if missing).
+
+    Raises
+    ------
+    ValueError
+        If any category's labels are not of length n_samples.
+    """
+    categories = tuple(sorted(subject_labels_dict.keys()))
+    levels = []
+    codes = []
+    for category in categories:
+        labels = subject_labels_dict[category]
+        if len(labels) != n_samples:
+            raise ValueError(
+                f"subject_labels_dict['{category}'] has {len(labels)} "
+                f"labels but there are {n_samples} predictions."
+            )
+        category_codes, category_levels = factorize_labels(labels, sort=True)
+        codes.append(category_codes)
+        levels.append(category_levels)
+
+    return categories, tuple(levels), codes
+
+
+def mixed_radix_codes(codes: Sequence[np.ndarray],
+                      radices: Sequence[int]) -> np.ndarray:
+    """
+    Combine per-category level codes into one integer cell code per row.
+
+    The last category varies fastest, so cell codes enumerate combinations in
+    the same order as `itertools.product` over the levels.
+
+    Parameters
+    ----------
+    codes : Sequence[np.ndarray]
+        Level code per observation for each category (-1 if missing).
+    radices : Sequence[int]
+        Number of levels of each category.
+
+    Returns
+    -------
+    np.ndarray
+        int64 cell code per observation; -1 where any category is missing.
+    """
+    if not codes:
+        return np.zeros(0, dtype=np.int64)
+
+    cell = np.zeros(len(codes[0]), dtype=np.int64)
+    missing = np.zeros(len(codes[0]), dtype=bool)
+    for category_codes, radix in zip(codes, radices):
+        cell *= radix
+        cell += category_codes
+        missing |= category_codes < 0
+
+    cell[missing] = -1
+    return cell
+
+
+def observed_cells(codes: Sequence[np.ndarray],
+                    shape: tuple) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Enumerate the combinations of levels present in the data.
+
+    Parameters
+    ----------
+    codes : Sequence[np.ndarray]
+        Level code per observation for each category (-1 if missing).
+    shape : tuple
+        Number of levels of each category.
+
+    Returns
+    -------
+    cells : np.ndarray
+        Array of shape (n_observed, len(codes)) of level codes, in
+        `itertools.product` order.
+    row_cells : np.ndarray
+        Observed-cell index of every row (-1 where any category is missing).
+    """
+    n_samples = len(codes[0])
+    missing = np.zeros(n_samples, dtype=bool)
+    for category_codes in codes:
+        missing |= category_codes < 0
+    row_cells = np.full(n_samples, -1, dtype=np.int64)
+
+    if math.prod(shape) < 2 ** 62:
+        radix_codes = mixed_radix_codes(codes, shape)[~missing]
+        observed, inverse = np.unique(radix_codes, return_inverse=True)
+        cells = np.stack(np.unravel_index(observed, shape), axis=1)
+    else:
+        # The product of levels overflows int64: hash whole code rows.
+        stacked = np.stack([category_codes[~missing]
+                            for category_codes in codes], axis=1)
+        cells, inverse = np.unique(stacked, axis=0, return_inverse=True)
+
+    row_cells[~missing] = inverse.ravel()
+    return cells.astype(np.int64), row_cells
+
+
+def cell_index(levels: Sequence[list], codes: Sequence[np.ndarray],
+               n_samples: int, *,
+               sparse: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Assign every observation to an intersectional cell.
+
+    Parameters
+    ----------
+    levels, codes:
+        As returned by `encode_categories`.
+    n_samples : int
+        Number of observations.
+    sparse : bool, optional
+        If False (default), cells are every combination of levels.
+        If True, only the combinations present in the data.
+
+    Returns
+    -------
+    cells : np.ndarray
+        Array of shape (n_cells, len(codes)) of level codes, in
+        `itertools.product` order. With no categories there is a single
+        cell holding every observation.
+    row_cells : np.ndarray
+        Cell index of every row (-1 where any category is missing).
+    """
+    if not codes:
+        return (np.zeros((1, 0), dtype=np.int64),
+                np.zeros(n_samples, dtype=np.int64))
+
+    shape = tuple(len(category_levels) for category_levels in levels)
+    if sparse:
+        return observed_cells(codes, shape)
+
+    n_cells = int(np.prod(shape, dtype=np.int64))
+    cells = np.stack(np.unravel_index(np.arange(n_cells), shape), axis=1)
+    return cells, mixed_radix_codes(codes, shape)
+
+
+def membership_mask(group_labels_dict: dict,
+                    subject_labels_dict: dict) -> np.ndarray:
+    """
+    Flag the observations that belong to an intersectional group.
+
+    Parameters
+    ----------
+    group_labels_dict : dict
+        Dictionary mapping category names to the group label required in
+        that category (e.g., {'age': 'Older', 'gender': 'Female'}).
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array, True where every category matches.
+    """
+    mask = None
+    for category in sorted(group_labels_dict.keys()):
+        codes, uniques = factorize_labels(subject_labels_dict[category])
+        lookup = {label: i for i, label in enumerate(uniques)}
+        match = codes == lookup.get(group_labels_dict[category], -2)
+        mask = match if mask is None else mask & match
+    return mask
+
+
+def intersect_group_counts(group_labels_dict: dict, subject_labels_dict: dict,
+                           predictions: Sequence,
+                           true_statuses: Sequence,
+                           sample_weight: Optional[Sequence] = None
+                           ) -> np.ndarray:
+    """
+    Return the (tn, fp, fn, tp) counts of one intersectional group.
+
+    Parameters
+    ----------
+    group_labels_dict : dict
+        Dictionary mapping category names to specific group labels that
+        define the intersectional group.
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; see `check_sample_weight`.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (4,) with the group's confusion counts.
+    """
+    outcomes = outcome_codes(predictions, true_statuses)
+    weights = check_sample_weight(sample_weight, len(outcomes))
+    mask = membership_mask(group_labels_dict, subject_labels_dict)
+    if mask is not None:
+        if len(mask) != len(outcomes):
+            raise ValueError(
+                "subject_labels_dict labels and predictions must have the "
+                f"same length. Got {len(mask)} and {len(outcomes)}."
+            )
+        outcomes = outcomes[mask]
+        if weights is not None:
+            weights = weights[mask]
+    return np.bincount(outcomes, weights=weights, minlength=4)
+
+
+@dataclass(frozen=True)
+class IntersectCounts:
+    """
+    Per-cell confusion counts for intersectional groups.
+
+    A cell is one combination of levels, one per protected category. Cells
+    are stored as rows of level codes, in `itertools.product` order over the
+    sorted levels of the sorted categories.
+
+    Attributes
+    ----------
+    categories:
+        Category names in sorted order.
+    levels:
+        Sorted unique labels of each category.
+    cells:
+        Array of shape (n_cells, len(categories)) of level codes.
+    counts:
+        Array of shape (n_cells, 4) with columns (tn, fp, fn, tp).
+    """
+
+    categories: tuple
+    levels: tuple
+    cells: np.ndarray
+    counts: np.ndarray
+
+    @classmethod
+    def from_labels(cls, subject_labels_dict: dict, predictions: Sequence,
+                    true_statuses: Sequence, *,
+                    sparse: bool = False,
+                    sample_weight: Optional[Sequence] = None
+                    ) -> "IntersectCounts":
+        """
+        Build the table of intersectional cells.
+
+        Every row is encoded into a single mixed-radix cell code so that all
+        cells are counted with one `np.bincount`.
+
+        Parameters
+        ----------
+        subject_labels_dict : dict
+            Dictionary mapping category names to lists of labels for each
+            observation in the evaluation dataset.
+        predictions : array-like of bool
+            Predicted diagnoses for each observation.
+        true_statuses : array-like of bool
+            True diagnoses for each observation.
+        sparse : bool, optional
+            If False (default), include every combination of category levels,
+            including combinations with no observations. If True, include
+            only the combinations present in the data, so memory and time
+            scale with the number of observed cells rather than the size of
+            the Cartesian product.
+        sample_weight : array-like of float or None, optional
+            Weight of each observation; see `check_sample_weight`.
+
+        Returns
+        -------
+        IntersectCounts
+            The per-cell confusion table.
+        """
+        outcomes = outcome_codes(predictions, true_statuses)
+        categories, levels, codes = encode_categories(subject_labels_dict,
+                                                      len(outcomes))
+        return cls.from_codes(
+            categories, levels, codes, outcomes, sparse=sparse,
+            sample_weight=check_sample_weight(sample_weight, len(outcomes)))
+
+    @classmethod
+    def from_codes(cls, categories: tuple, levels: tuple,
+                   codes: Sequence[np.ndarray], outcomes: np.ndarray, *,
+                   sparse: bool = False,
+                   sample_weight: Optional[np.ndarray] = None
+                   ) -> "IntersectCounts":
+        """
+        Build the table from already factorized labels.
+
+        Parameters
+        ----------
+        categories, levels, codes:
+            As returned by `encode_categories`.
+        outcomes : np.ndarray
+            Outcome code per observation, as returned by `outcome_codes`.
+        sparse : bool, optional
+            See `IntersectCounts.from_labels`.
+        sample_weight : np.ndarray or None, optional
+            Validated weight of each observation.
+
+        Returns
+        -------
+        IntersectCounts
+            The per-cell confusion table.
+        """
+        cells, cell_codes = cell_index(levels, codes, len(outcomes),
+                                       sparse=sparse)
+        return cls(categories=tuple(categories),
+                   levels=tuple(levels),
+                   cells=cells,
+                   counts=confusion_counts(cell_codes, outcomes, len(cells),
+                                           sample_weight))
+
+    def densify(self) -> "IntersectCounts":
+        """
+        Return the table with every combination of levels as a cell.
+
+        Cells absent from this table get zero counts. If the table is
+        already dense it is returned unchanged.
+        """
+        shape = tuple(len(category_levels) for category_levels in self.levels)
+        n_cells = int(np.prod(shape, dtype=np.int64))
+        if len(self.cells) == n_cells:
+            return self
+
+        counts = np.zeros((n_cells, 4), dtype=self.counts.dtype)
+        if len(self.cells):
+            counts[np.ravel_multi_index(tuple(self.cells.T), shape)] = \
+                self.counts
+        cells = np.stack(np.unravel_index(np.arange(n_cells), shape), axis=1)
+        return IntersectCounts(categories=self.categories, levels=self.levels,
+                               cells=cells, counts=counts)
+
+    def merge(self, other: "IntersectCounts") -> "IntersectCounts":
+        """
+        Combine the counts of two tables, see `merge_counts`.
+        """
+        return merge_counts([self, other])
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the table to a compact binary string.
+
+        The format is the magic bytes b"FCT1", the length of a JSON header
+        (categories, levels, shapes and dtypes) as a little-endian uint32,
+        the header, and then the zlib-compressed cell codes and counts,
+        each stored with the smallest unsigned integer type that holds them.
+
+        Returns
+        -------
+        bytes
+            The serialized table, readable with `IntersectCounts.from_bytes`.
+
+        Raises
+        ------
+        TypeError
+            If a level is not a str, int, float, bool or None.
+        """
+        cells = self.cells.astype(_min_uint(self.cells))
+        counts = self.counts
+        if counts.dtype.kind in "iu":
+            counts = counts.astype(_min_uint(counts))
+
+        header = json.dumps({
+            "categories": list(self.categories),
+            "levels": [list(category_levels)
+                       for category_levels in self.levels],
+            "n_cells": len(cells),
+            "cells_dtype": cells.dtype.str,
+            "counts_dtype": counts.dtype.str,
+        }).encode("utf-8")
+
+        payload = zlib.compress(cells.tobytes() + counts.tobytes())
+        return _MAGIC + struct.pack("<I", len(header)) + header + payload
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "IntersectCounts":
+        """
+        Rebuild a table serialized with `IntersectCounts.to_bytes`.
+
+        Raises
+        ------
+        ValueError
+            If data is not a serialized table.
+        """
+        if data[:4] != _MAGIC:
+            raise ValueError("data is not a serialized IntersectCounts.")
+
+        (header_len,) = struct.unpack("<I", data[4:8])
+        header = json.loads(data[8:8 + header_len].decode("utf-8"))
+        payload = zlib.decompress(data[8 + header_len:])
+
+        n_cells = header["n_cells"]
+        n_categories = len(header["categories"])
+        cells_dtype = np.dtype(header["cells_dtype"])
+        split = n_cells * n_categories * cells_dtype.itemsize
+        cells = np.frombuffer(payload[:split], dtype=cells_dtype)
+        counts = np.frombuffer(payload[split:],
+                               dtype=np.dtype(header["counts_dtype"]))
+
+        counts = counts.reshape(n_cells, 4)
+        return cls(categories=tuple(header["categories"]),
+                   levels=tuple(header["levels"]),
+                   cells=cells.reshape(n_cells, n_categories).astype(np.int64),
+                   counts=counts.astype(np.int64 if counts.dtype.kind == "u"
+                                        else counts.dtype))
+
+    @property
+    def support(self) -> np.ndarray:
+        """Number of observations in each cell."""
+        return self.counts.sum(axis=1)
+
+    def names(self) -> list[str]:
+        """
+        Return the name of each cell, formatted as "label1 + label2 + ...".
+        """
+        level_names = [[str(level) for level in category_levels]
+                       for category_levels in self.levels]
+        return [" + ".join(level_names[j][code] for j, code in enumerate(row))
+                for row in self.cells.tolist()]
+
+    def rates(self, metric: str) -> np.ndarray:
+        """Return the given rate for every cell, aligned with names()."""
+        return rates_from_counts(self.counts, metric)
+
+    def to_dict(self, metric: str) -> dict:
+        """Return a dict mapping each cell name to the given rate."""
+        return dict(zip(self.names(), self.rates(metric).tolist()))
+
+    def select(self, group_labels_dict: dict) -> np.ndarray:
+        """
+        Return the summed counts of the cells matching a group.
+
+        Parameters
+        ----------
+        group_labels_dict : dict
+            Dictionary mapping some or all of the categories to the required
+            label. Categories left out match any label.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (4,) with the group's confusion counts.
+
+        Raises
+        ------
+        KeyError
+            If group_labels_dict names a category not in the table.
+        """
+        keep = np.ones(len(self.cells), dtype=bool)
+        for category, label in group_labels_dict.items():
+            if category not in self.categories:
+                raise KeyError(category)
+            j = self.categories.index(category)
+            level_codes = {level: i for i, level in
+                           enumerate(self.levels[j])}
+            keep &= self.cells[:, j] == level_codes.get(label, -1)
+        return self.counts[keep].sum(axis=0)
+
+    def marginal(self, categories: Sequence[str]) -> "IntersectCounts":
+        """
+        Return the table over a subset of the categories.
+
+        The counts of cells that only differ in the dropped categories are
+        summed, so no data is rescanned. Observations with a missing label
+        in a dropped category are not in this table and so are not in the
+        marginal either.
+
+        Parameters
+        ----------
+        categories : Sequence[str]
+            Categories to keep, in any order.
+
+        Returns
+        -------
+        IntersectCounts
+            The coarser table; dense if this table is dense, otherwise
+            holding only the combinations present in this table.
+
+        Raises
+        ------
+        KeyError
+            If a category is not in the table.
+        """
+        for category in categories:
+            if category not in self.categories:
+                raise KeyError(category)
+        keep = [j for j, category in enumerate(self.categories)
+                if category in categories]
+        levels = tuple(self.levels[j] for j in keep)
+        shape = tuple(len(category_levels) for category_levels in levels)
+        full_shape = tuple(len(category_levels)
+                           for category_levels in self.levels)
+        categories = tuple(self.categories[j] for j in keep)
+
+        if not keep:
+            return IntersectCounts(categories=(), levels=(),
+                                   cells=np.zeros((1, 0), dtype=np.int64),
+                                   counts=self.counts.sum(axis=0,
+                                                          keepdims=True))
+        if len(self.cells) == math.prod(full_shape):
+            # dense: sum the dropped axes of the (levels..., 4) array
+            drop = tuple(j for j in range(len(full_shape)) if j not in keep)
+            counts = self.counts.reshape(full_shape + (4,)).sum(axis=drop)
+            n_cells = math.prod(shape)
+            cells = np.stack(np.unravel_index(np.arange(n_cells), shape),
+                             axis=1)
+            return IntersectCounts(categories=categories, levels=levels,
+                                   cells=cells.astype(np.int64),
+                                   counts=counts.reshape(n_cells, 4))
+
+        cells, inverse = np.unique(self.cells[:, keep], axis=0,
+                                   return_inverse=True)
+        counts = np.zeros((len(cells), 4), dtype=self.counts.dtype)
+        np.add.at(counts, inverse.ravel(), self.counts)
+        return IntersectCounts(categories=categories, levels=levels,
+                               cells=cells.astype(np.int64), counts=counts)
+
+    def supported_rates(self, metric: str,
+                        min_support: Optional[int] = None) -> np.ndarray:
+        """
+        Return the rates of the cells with enough supporting observations.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+        min_support : int or None, optional
+            Minimum number of observations in the rate's denominator (e.g.
+            true positives + false negatives for "fnr") for a cell to be
+            kept; for weighted tables, the summed weight. If None (default),
+            every cell is kept, including cells whose rate is undefined
+            (np.nan).
+
+        Returns
+        -------
+        np.ndarray
+            Rates of the kept cells.
+        """
+        rates = self.rates(metric)
+        if min_support is None:
+            return rates
+        _, denom = rate_terms(self.counts, metric)
+        return rates[(denom >= min_support) & (denom > 0)]
+
+
+def _min_uint(values: np.ndarray) -> np.dtype:
+    """Smallest unsigned integer dtype holding every value."""
+    top = int(values.max()) if values.size else 0
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if top <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def merge_counts(tables: Sequence[IntersectCounts]) -> IntersectCounts:
+    """
+    Combine intersectional tables built from disjoint parts of the data.
+
+    The result equals the table built from all the data at once, so tables
+    computed by separate workers on their own shards can be reduced to the
+    exact global `all_intersect_*` and `max_intersect_*` values. Merging is
+    associative and commutative.
+
+    Parameters
+    ----------
+    tables : Sequence[IntersectCounts]
+        Tables over the same categories. Their levels may differ; the
+        result uses the sorted union of levels.
+
+    Returns
+    -------
+    IntersectCounts
+        The merged table. It holds the union of the input cells, and is
+        expanded to every level combination if all inputs are dense.
+
+    Raises
+    ------
+    ValueError
+        If no tables are given or their categories differ.
+    """
+    tables = list(tables)
+    if not tables:
+        raise ValueError("merge_counts needs at least one table.")
+
+    categories = tables[0].categories
+    for table in tables[1:]:
+        if table.categories != categories:
+            raise ValueError(
+                f"Cannot merge tables over categories {list(categories)} "
+                f"and {list(table.categories)}."
+            )
+
+    dtype = np.result_type(*(table.counts.dtype for table in tables))
+    counts = np.concatenate([table.counts for table in tables]).astype(dtype)
+    dense = all(len(table.cells) == math.prod(len(category_levels)
+                                              for category_levels in
+                                              table.levels)
+                for table in tables)
+
+    if not categories:
+        return IntersectCounts(categories=(), levels=(),
+                               cells=np.zeros((1, 0), dtype=np.int64),
+                               counts=counts.sum(axis=0, keepdims=True))
+
+    # Map every table's level codes onto the sorted union of levels.
+    levels = []
+    columns = [[] for _ in tables]
+    for j in range(len(categories)):
+        all_levels = [level for table in tables for level in table.levels[j]]
+        union_codes, union_levels = factorize_labels(all_levels, sort=True)
+        levels.append(union_levels)
+        start = 0
+        for i, table in enumerate(tables):
+            remap = union_codes[start:start + len(table.levels[j])]
+            start += len(table.levels[j])
+            columns[i].append(remap[table.cells[:, j]])
+
+    cells = np.concatenate([np.stack(table_columns, axis=1)
+                            for table_columns in columns])
+    cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+    merged = np.zeros((len(cells), 4), dtype=dtype)
+    np.add.at(merged, inverse.ravel(), counts)
+
+    table = IntersectCounts(categories=categories, levels=tuple(levels),
+                            cells=cells.astype(np.int64), counts=merged)
+    return table.densify() if dense else table
@@ -0,0 +1,495 @@
+"""
+fairness.frame
+==============
+
+A reusable container for evaluation data that caches the work shared by
+every fairness metric.
+
+The functions in `fairness.metrics` and `fairness.single_metrics` take raw
+lists and rebuild group membership on every call. `FairnessFrame` factorizes
+the labels once, stores predictions and true labels as int8 arrays and
+lazily caches the confusion tables, so computing many metrics (and their
+differences and ratios) on the same data costs one pass over the rows plus
+cheap lookups.
+
+Every metric function is available as a method of the same name, without
+the subject_labels, predictions and true_statuses arguments.
+
+Typical usage
+-------------
+>>> from fairness.frame import FairnessFrame
+>>> frame = FairnessFrame.from_eval_df(eval_df,
+...                                    subject_labels_dict=subject_labels_dict)
+>>> frame.group_fnr("Sex=F|age_group=older")
+>>> frame.max_intersect_fpr_diff(min_support=10)
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import single_metrics
+from .counts import (GroupCounts, IntersectCounts, check_sample_weight,
+                     confusion_counts, encode_categories, factorize_labels,
+                     max_diff_and_ratio, outcome_codes, pairwise_rates,
+                     rates_from_counts)
+
+
+class RateMetrics:
+    """
+    Metric methods computed from cached confusion tables.
+
+    Subclasses provide a `group_counts` property returning a
+    `fairness.counts.GroupCounts`, an `intersect_counts(sparse)` method
+    returning a `fairness.counts.IntersectCounts`, and a `_rates` dict used
+    to cache derived rates (cleared whenever the tables change).
+    """
+
+    def _cached(self, key: tuple, compute):
+        if key not in self._rates:
+            self._rates[key] = compute()
+        return self._rates[key]
+
+    def _group_rate(self, metric: str, group_label) -> float:
+        table = self.group_counts
+        rates = self._cached(("group", metric),
+                             lambda: table.rates(metric))
+        i = table.index(group_label)
+        return np.nan if i < 0 else float(rates[i])
+
+    def _intersect_rate(self, metric: str, group_labels_dict: dict) -> float:
+        counts = self.intersect_counts(sparse=True).select(group_labels_dict)
+        return float(rates_from_counts(counts, metric))
+
+    def _all_intersect(self, metric: str, sparse: bool) -> dict:
+        table = self.intersect_counts(sparse=sparse)
+        return dict(self._cached(("all_intersect", metric, sparse),
+                                 lambda: table.to_dict(metric)))
+
+    def _group_pair(self, metric: str, group_a_label, group_b_label,
+                    kind: str, natural_log: bool = True) -> float:
+        rates = np.array([self._group_rate(metric, group_a_label),
+                          self._group_rate(metric, group_b_label)])
+        return float(pairwise_rates(rates, kind, natural_log)[0, 1])
+
+    def _max_diff_and_ratio(self, metric: str, sparse: bool,
+                            min_support: Optional[int],
+                            natural_log: bool = True) -> tuple:
+        table = self.intersect_counts(sparse=sparse)
+        _, max_diff, max_ratio = self._cached(
+            ("max", metric, sparse, min_support, natural_log),
+            lambda: max_diff_and_ratio(table.counts[np.newaxis], metric,
+                                       min_support, natural_log))
+        return float(max_diff[0]), float(max_ratio[0])
+
+    # -----------------------------------------------------------------
+    # Accuracy
+    # -----------------------------------------------------------------
+
+    def group_acc(self, group_label):
+        """Equivalent of `fairness.metrics.group_acc`."""
+        return self._group_rate("acc", group_label)
+
+    def group_acc_diff(self, group_a_label, group_b_label):
+        """Equivalent of `fairness.metrics.group_acc_diff`."""
+        return self._group_pair("acc", group_a_label, group_b_label,
+                                "diff")
+
+    def group_acc_ratio(self, group_a_label, group_b_label, natural_log=True):
+        """Equivalent of `fairness.metrics.group_acc_ratio`."""
+        return self._group_pair("acc", group_a_label, group_b_label,
+                                "ratio", natural_log)
+
+    def intersect_acc(self, group_labels_dict):
+        """Equivalent of `fairness.metrics.intersect_acc`."""
+        return self._intersect_rate("acc", group_labels_dict)
+
+    def all_intersect_accs(self, sparse=False):
+        """Equivalent of `fairness.metrics.all_intersect_accs`."""
+        return self._all_intersect("acc", sparse)
+
+    def max_intersect_acc_diff(self, sparse=False, min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_acc_diff`."""
+        return self._max_diff_and_ratio("acc", sparse, min_support)[0]
+
+    def max_intersect_acc_ratio(self, natural_log=True, sparse=False,
+                                min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_acc_ratio`."""
+        return self._max_diff_and_ratio("acc", sparse, min_support,
+                                        natural_log)[1]
+
+    # -----------------------------------------------------------------
+    # False negative rate
+    # -----------------------------------------------------------------
+
+    def group_fnr(self, group_label):
+        """Equivalent of `fairness.metrics.group_fnr`."""
+        return self._group_rate("fnr", group_label)
+
+    def group_fnr_diff(self, group_a_label, group_b_label):
+        """Equivalent of `fairness.metrics.group_fnr_diff`."""
+        return self._group_pair("fnr", group_a_label, group_b_label,
+                                "diff")
+
+    def group_fnr_ratio(self, group_a_label, group_b_label, natural_log=True):
+        """Equivalent of `fairness.metrics.group_fnr_ratio`."""
+        return self._group_pair("fnr", group_a_label, group_b_label,
+                                "ratio", natural_log)
+
+    def intersect_fnr(self, group_labels_dict):
+        """Equivalent of `fairness.metrics.intersect_fnr`."""
+        return self._intersect_rate("fnr", group_labels_dict)
+
+    def all_intersect_fnrs(self, sparse=False):
+        """Equivalent of `fairness.metrics.all_intersect_fnrs`."""
+        return self._all_intersect("fnr", sparse)
+
+    def max_intersect_fnr_diff(self, sparse=False, min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_fnr_diff`."""
+        return self._max_diff_and_ratio("fnr", sparse, min_support)[0]
+
+    def max_intersect_fnr_ratio(self, natural_log=True, sparse=False,
+                                min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_fnr_ratio`."""
+        return self._max_diff_and_ratio("fnr", sparse, min_support,
+                                        natural_log)[1]
+
+    # -----------------------------------------------------------------
+    # False positive rate
+    # -----------------------------------------------------------------
+
+    def group_fpr(self, group_label):
+        """Equivalent of `fairness.metrics.group_fpr`."""
+        return self._group_rate("fpr", group_label)
+
+    def group_fpr_diff(self, group_a_label, group_b_label):
+        """Equivalent of `fairness.metrics.group_fpr_diff`."""
+        return self._group_pair("fpr", group_a_label, group_b_label,
+                                "diff")
+
+    def group_fpr_ratio(self, group_a_label, group_b_label, natural_log=True):
+        """Equivalent of `fairness.metrics.group_fpr_ratio`."""
+        return self._group_pair("fpr", group_a_label, group_b_label,
+                                "ratio", natural_log)
+
+    def intersect_fpr(self, group_labels_dict):
+        """Equivalent of `fairness.metrics.intersect_fpr`."""
+        return self._intersect_rate("fpr", group_labels_dict)
+
+    def all_intersect_fprs(self, sparse=False):
+        """Equivalent of `fairness.metrics.all_intersect_fprs`."""
+        return self._all_intersect("fpr", sparse)
+
+    def max_intersect_fpr_diff(self, sparse=False, min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_fpr_diff`."""
+        return self._max_diff_and_ratio("fpr", sparse, min_support)[0]
+
+    def max_intersect_fpr_ratio(self, natural_log=True, sparse=False,
+                                min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_fpr_ratio`."""
+        return self._max_diff_and_ratio("fpr", sparse, min_support,
+                                        natural_log)[1]
+
+    # -----------------------------------------------------------------
+    # False omission rate
+    # -----------------------------------------------------------------
+
+    def group_for(self, group_label):
+        """Equivalent of `fairness.metrics.group_for`."""
+        return self._group_rate("for", group_label)
+
+    def group_for_diff(self, group_a_label, group_b_label):
+        """Equivalent of `fairness.metrics.group_for_diff`."""
+        return self._group_pair("for", group_a_label, group_b_label,
+                                "diff")
+
+    def group_for_ratio(self, group_a_label, group_b_label, natural_log=True):
+        """Equivalent of `fairness.metrics.group_for_ratio`."""
+        return self._group_pair("for", group_a_label, group_b_label,
+                                "ratio", natural_log)
+
+    def intersect_for(self, group_labels_dict):
+        """Equivalent of `fairness.metrics.intersect_for`."""
+        return self._intersect_rate("for", group_labels_dict)
+
+    def all_intersect_fors(self, sparse=False):
+        """Equivalent of `fairness.metrics.all_intersect_fors`."""
+        return self._all_intersect("for", sparse)
+
+    def max_intersect_for_diff(self, sparse=False, min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_for_diff`."""
+        return self._max_diff_and_ratio("for", sparse, min_support)[0]
+
+    def max_intersect_for_ratio(self, natural_log=True, sparse=False,
+                                min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_for_ratio`."""
+        return self._max_diff_and_ratio("for", sparse, min_support,
+                                        natural_log)[1]
+
+    # -----------------------------------------------------------------
+    # False discovery rate
+    # -----------------------------------------------------------------
+
+    def group_fdr(self, group_label):
+        """Equivalent of `fairness.metrics.group_fdr`."""
+        return self._group_rate("fdr", group_label)
+
+    def group_fdr_diff(self, group_a_label, group_b_label):
+        """Equivalent of `fairness.metrics.group_fdr_diff`."""
+        return self._group_pair("fdr", group_a_label, group_b_label,
+                                "diff")
+
+    def group_fdr_ratio(self, group_a_label, group_b_label, natural_log=True):
+        """Equivalent of `fairness.metrics.group_fdr_ratio`."""
+        return self._group_pair("fdr", group_a_label, group_b_label,
+                                "ratio", natural_log)
+
+    def intersect_fdr(self, group_labels_dict):
+        """Equivalent of `fairness.metrics.intersect_fdr`."""
+        return self._intersect_rate("fdr", group_labels_dict)
+
+    def all_intersect_fdrs(self, sparse=False):
+        """Equivalent of `fairness.metrics.all_intersect_fdrs`."""
+        return self._all_intersect("fdr", sparse)
+
+    def max_intersect_fdr_diff(self, sparse=False, min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_fdr_diff`."""
+        return self._max_diff_and_ratio("fdr", sparse, min_support)[0]
+
+    def max_intersect_fdr_ratio(self, natural_log=True, sparse=False,
+                                min_support=None):
+        """Equivalent of `fairness.metrics.max_intersect_fdr_ratio`."""
+        return self._max_diff_and_ratio("fdr", sparse, min_support,
+                                        natural_log)[1]
+
+
+class FairnessFrame(RateMetrics):
+    """
+    Evaluation data with cached label codes and confusion tables.
+
+    Parameters
+    ----------
+    predictions : array-like of bool
+        Predicted diagnoses for each observation in the evaluation dataset.
+    true_statuses : array-like of bool
+        True diagnoses for each observation in the evaluation dataset.
+    subject_labels : array-like or None, optional
+        Group label for every observation, used by the group_* methods.
+    subject_labels_dict : dict or None, optional
+        Dictionary mapping category names to lists of labels for each
+        observation, used by the intersect_* methods.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; every table then holds float sums of
+        weights (see `fairness.counts`).
+
+    Raises
+    ------
+    ValueError
+        If neither subject_labels nor subject_labels_dict is given, or if the
+        inputs differ in length.
+    """
+
+    def __init__(
+        self,
+        predictions: Sequence,
+        true_statuses: Sequence,
+        *,
+        subject_labels: Optional[Sequence] = None,
+        subject_labels_dict: Optional[dict] = None,
+        sample_weight: Optional[Sequence] = None,
+    ) -> None:
+        if subject_labels is None and subject_labels_dict is None:
+            raise ValueError("Provide subject_labels and/or "
+                             + "subject_labels_dict.")
+
+        self.y_pred = np.asarray(predictions).astype(bool).astype(np.int8)
+        self.y_true = np.asarray(true_statuses).astype(bool).astype(np.int8)
+        self._outcomes = outcome_codes(self.y_pred, self.y_true)
+        n_samples = len(self._outcomes)
+        self.sample_weight = check_sample_weight(sample_weight, n_samples)
+
+        self._group_codes = None
+        self._group_labels = None
+        if subject_labels is not None:
+            if len(subject_labels) != n_samples:
+                raise ValueError(
+                    "subject_labels, predictions and true_statuses must have "
+                    f"the same length. Got {len(subject_labels)} and "
+                    f"{n_samples}."
+                )
+            self._group_codes, self._group_labels = \
+                factorize_labels(subject_labels)
+
+        self._categories = None
+        if subject_labels_dict is not None:
+            self._categories, self._levels, self._category_codes = \
+                encode_categories(subject_labels_dict, n_samples)
+
+        self._group_table = None
+        self._intersect_tables = {}
+        self._rates = {}
+
+    @classmethod
+    def from_eval_df(
+        cls,
+        eval_df: pd.DataFrame,
+        *,
+        subject_labels_dict: Optional[dict] = None,
+        label_col: str = "subject_label",
+        weight_col: Optional[str] = None,
+    ) -> "FairnessFrame":
+        """
+        Build a frame from an eval_df produced by
+        `fairness.groups.make_eval_df`.
+
+        Parameters
+        ----------
+        eval_df : pandas.DataFrame
+            DataFrame with columns `label_col`, `y_pred` and `y_true`.
+        subject_labels_dict : dict or None, optional
+            Per-category labels aligned with eval_df rows (see
+            `fairness.adapters.make_subject_labels_dict`), needed for the
+            intersect_* methods.
+        label_col : str, optional
+            Column name for group labels (default "subject_label").
+        weight_col : str or None, optional
+            Column holding sample weights, if any.
+
+        Returns
+        -------
+        FairnessFrame
+            The frame.
+        """
+        columns = (label_col, "y_pred", "y_true")
+        if weight_col is not None:
+            columns += (weight_col,)
+        for col in columns:
+            if col not in eval_df.columns:
+                raise ValueError(f"eval_df missing '{col}' column.")
+
+        return cls(eval_df["y_pred"].to_numpy(),
+                   eval_df["y_true"].to_numpy(),
+                   subject_labels=eval_df[label_col],
+                   subject_labels_dict=subject_labels_dict,
+                   sample_weight=(None if weight_col is None
+                                  else eval_df[weight_col].to_numpy()))
+
+    def __len__(self) -> int:
+        return len(self._outcomes)
+
+    # -----------------------------------------------------------------
+    # Cached tables
+    # -----------------------------------------------------------------
+
+    @property
+    def group_counts(self) -> GroupCounts:
+        """Per-group confusion counts for subject_labels (cached)."""
+        if self._group_codes is None:
+            raise ValueError("FairnessFrame was built without "
+                             + "subject_labels.")
+        if self._group_table is None:
+            self._group_table = GroupCounts(
+                labels=self._group_labels,
+                counts=confusion_counts(self._group_codes, self._outcomes,
+                                        len(self._group_labels),
+                                        self.sample_weight))
+        return self._group_table
+
+    def intersect_counts(self, sparse: bool = False) -> IntersectCounts:
+        """
+        Per-cell confusion counts for subject_labels_dict (cached).
+
+        Parameters
+        ----------
+        sparse : bool, optional
+            If True, only cells present in the data are included.
+        """
+        if self._categories is None:
+            raise ValueError("FairnessFrame was built without "
+                             + "subject_labels_dict.")
+        if sparse not in self._intersect_tables:
+            self._intersect_tables[sparse] = IntersectCounts.from_codes(
+                self._categories, self._levels, self._category_codes,
+                self._outcomes, sparse=sparse,
+                sample_weight=self.sample_weight)
+        return self._intersect_tables[sparse]
+
+    def _category_table(self, category: Optional[str]) -> GroupCounts:
+        if category is None:
+            return self.group_counts
+        if self._categories is None or category not in self._categories:
+            raise ValueError(f"Unknown category '{category}'.")
+
+        def compute():
+            j = self._categories.index(category)
+            return GroupCounts(
+                labels=list(self._levels[j]),
+                counts=confusion_counts(self._category_codes[j],
+                                        self._outcomes,
+                                        len(self._levels[j]),
+                                        self.sample_weight))
+        return self._cached(("category", category), compute)
+
+    def _privileged_split(self, privileged_label, category: Optional[str]):
+        """(tn, fp, fn, tp) counts of the privileged group and the rest."""
+        table = self._category_table(category)
+        i = single_metrics._privileged_index(table.labels, privileged_label)
+        return table.counts[i], self._total_counts() - table.counts[i]
+
+    def _total_counts(self) -> np.ndarray:
+        return self._cached(("total",),
+                            lambda: np.bincount(self._outcomes,
+                                                weights=self.sample_weight,
+                                                minlength=4))
+
+    # -----------------------------------------------------------------
+    # Single-attribute metrics
+    # -----------------------------------------------------------------
+
+    def calculate_EOD(self, privileged_label, category=None):
+        """
+        Equivalent of `fairness.single_metrics.calculate_EOD`.
+
+        Groups are taken from subject_labels, or from
+        subject_labels_dict[category] if category is given.
+        """
+        return single_metrics._eod_from_counts(
+            *self._privileged_split(privileged_label, category))
+
+    def calculate_AOD(self, privileged_label, category=None):
+        """
+        Equivalent of `fairness.single_metrics.calculate_AOD`.
+
+        Groups are taken from subject_labels, or from
+        subject_labels_dict[category] if category is given.
+        """
+        return single_metrics._aod_from_counts(
+            *self._privileged_split(privileged_label, category))
+
+    def calculate_DI(self, privileged_label, category=None):
+        """
+        Equivalent of `fairness.single_metrics.calculate_DI`.
+
+        Groups are taken from subject_labels, or from
+        subject_labels_dict[category] if category is given.
+        """
+        privileged, rest = self._privileged_split(privileged_label, category)
+        counts = np.stack([rest, privileged])
+        return single_metrics._di_from_counts(
+            counts[:, 1] + counts[:, 3], counts.sum(axis=1))
+
+    def calculate_EOD_AOD_DI_by_group(self, privileged_label, category=None,
+                                      pooled=False):
+        """
+        Equivalent of `fairness.single_metrics.calculate_EOD_AOD_DI_by_group`.
+
+        Groups are taken from subject_labels, or from
+        subject_labels_dict[category] if category is given.
+        """
+        table = self._category_table(category)
+        i = single_metrics._privileged_index(table.labels, privileged_label)
+        return single_metrics._by_group_from_counts(
+            table.labels, table.counts, i, self._total_counts(), pooled)
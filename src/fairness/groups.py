@@ -14,8 +14,29 @@ Primary output: a tidy DataFrame with columns:
 from __future__ import annotations
 
 from typing import Sequence
+
+import numpy as np
 import pandas as pd
 
+from .counts import observed_cells
+
+
+def _label_values(frame: pd.DataFrame, col: str) -> pd.Series:
+    """
+    Return a protected column as it appears in a row of frame.
+
+    Row-wise access upcasts purely numeric frames to a common dtype (e.g. an
+    int column becomes float next to a float column); this is mirrored here
+    so labels are formatted identically.
+    """
+    dtypes = list(frame.dtypes)
+    numeric = all(isinstance(dtype, np.dtype) and dtype.kind in "iuf"
+                  for dtype in dtypes)
+    values = frame[col]
+    if numeric:
+        values = values.astype(np.result_type(*dtypes))
+    return values
+
 
 def make_intersectional_labels(
     df: pd.DataFrame,
@@ -24,13 +45,18 @@ def make_intersectional_labels(
     sep: str = "|",
     kv_sep: str = "=",
     missing: str = "NA",
-) -> list[str]:
+    categorical: bool = False,
+) -> list[str] | pd.Categorical:
     """
     Create an intersectional group label for each row of df.
 
     Example:
         Sex=1|age_group=older
 
+    Labels are built column-wise: each protected column is factorized, each
+    observed combination of values is formatted once, and rows index into
+    the formatted labels.
+
     Parameters
     ----------
     df:
@@ -41,10 +67,14 @@ def make_intersectional_labels(
         Formatting separators for the label.
     missing:
         Placeholder for missing values.
+    categorical:
+        If True, return a pandas Categorical (integer codes plus one string
+        per distinct label) instead of a list of strings. Useful for large
+        datasets, where the list holds one Python string per row.
 
     Returns
     -------
-    list[str]
+    list[str] or pd.Categorical
         One label per row, aligned with df.
     """
     if not protected:
@@ -54,17 +84,43 @@ def make_intersectional_labels(
     if missing_cols:
         raise ValueError(f"Protected columns not found: {missing_cols}")
 
-    labels: list[str] = []
-    for _, row in df[list(protected)].iterrows():
-        parts = []
-        for col in protected:
-            val = row[col]
-            if pd.isna(val):
-                val = missing
-            parts.append(f"{col}{kv_sep}{val}")
-        labels.append(sep.join(parts))
-
-    return labels
+    frame = df[list(protected)]
+    codes = []
+    parts = []
+    for col in protected:
+        col_codes, uniques = pd.factorize(_label_values(frame, col))
+        # missing values (code -1) get their own trailing level
+        col_codes = np.where(col_codes < 0, len(uniques), col_codes)
+        codes.append(col_codes)
+        parts.append([f"{col}{kv_sep}{val}" for val in uniques]
+                     + [f"{col}{kv_sep}{missing}"])
+
+    shape = tuple(len(col_parts) for col_parts in parts)
+    cells, row_cells = observed_cells(codes, shape)
+    cell_labels = [sep.join(parts[j][code] for j, code in enumerate(cell))
+                   for cell in cells.tolist()]
+
+    # distinct values can format to the same label (e.g. 1 and "1")
+    label_codes, categories = pd.factorize(
+        np.asarray(cell_labels, dtype=object))
+    row_codes = label_codes[row_cells]
+
+    if categorical:
+        return pd.Categorical.from_codes(row_codes, categories=categories)
+    return categories[row_codes].tolist()
+
+
+def _compact_outcomes(values: Sequence) -> np.ndarray:
+    """
+    Store binary outcomes as int8, leaving non-binary values (e.g.
+    probability scores) unchanged.
+    """
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values
+    if values.dtype.kind in "iuf" and np.isin(values, (0, 1)).all():
+        return values.astype(np.int8)
+    return values
 
 
 def make_eval_df(
@@ -74,6 +130,7 @@ def make_eval_df(
     y_pred: Sequence,
     y_true: Sequence,
     label_col: str = "subject_label",
+    compact: bool = False,
 ) -> pd.DataFrame:
     """
     Build an evaluation DataFrame for group-based metric functions.
@@ -97,6 +154,11 @@ def make_eval_df(
         True labels aligned to df_test rows.
     label_col:
         Name of the intersectional label column.
+    compact:
+        If True, store the label column as a pandas `category` and binary
+        y_pred/y_true as int8 (bool inputs stay bool), which uses a fraction
+        of the memory on large test sets. Non-binary predictions such as
+        probability scores are kept as they are.
 
     Returns
     -------
@@ -108,13 +170,21 @@ def make_eval_df(
         raise ValueError("df_test, y_pred, and y_true must have the same"
                          + "length")
 
-    subject_labels = make_intersectional_labels(df_test, protected)
+    subject_labels = make_intersectional_labels(df_test, protected,
+                                                categorical=compact)
+
+    if compact:
+        y_pred = _compact_outcomes(y_pred)
+        y_true = _compact_outcomes(y_true)
+    else:
+        y_pred = np.asarray(y_pred)
+        y_true = np.asarray(y_true)
 
     return pd.DataFrame(
         {
             label_col: subject_labels,
-            "y_pred": list(y_pred),
-            "y_true": list(y_true),
+            "y_pred": y_pred,
+            "y_true": y_true,
         },
         index=df_test.index,
     )
@@ -1,9 +1,13 @@
-import math
 import numpy as np
-from itertools import product
+import pandas as pd
 
+from .counts import (GroupCounts, intersect_group_counts,
+                     max_diff_and_ratio, pairwise_rates, rates_from_counts)
+from .parallel import parallel_intersect_counts
 
-def group_acc(group_label, subject_labels, predictions, true_statuses):
+
+def group_acc(group_label, subject_labels, predictions, true_statuses,
+              sample_weight=None):
     """
     Find the accuracy of a group with a specific label.
 
@@ -21,6 +25,9 @@ def group_acc(group_label, subject_labels, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -28,30 +35,16 @@ def group_acc(group_label, subject_labels, predictions, true_statuses):
         The accuracy of the model in the specified group. Returns
         np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
-
-    in_group = [False] * n_samples
-    for observation in range(n_samples):
-        if subject_labels[observation] == group_label:
-            in_group[observation] = True
-    group_results = [acc for acc, include
-                     in zip(accurate_or_not, in_group)
-                     if include is True]
-
-    if len(group_results) > 0:
-        accuracy = sum(group_results) / len(group_results)
-    else:
-        accuracy = np.nan
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    return accuracy
+    return table.rate(group_label, "acc")
 
 
 def group_acc_diff(group_a_label, group_b_label, subject_labels,
-                   predictions, true_statuses):
+                   predictions, true_statuses, sample_weight=None):
     """
     Calculate the absolute difference in accuracy between two groups.
 
@@ -70,6 +63,9 @@ def group_acc_diff(group_a_label, group_b_label, subject_labels,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -77,25 +73,17 @@ def group_acc_diff(group_a_label, group_b_label, subject_labels,
         The absolute difference in accuracy between the two groups. Returns
         np.nan if either group has no observations.
     """
-    group_a_accuracy = group_acc(group_label=group_a_label,
-                                 subject_labels=subject_labels,
-                                 predictions=predictions,
-                                 true_statuses=true_statuses)
-    group_b_accuracy = group_acc(group_label=group_b_label,
-                                 subject_labels=subject_labels,
-                                 predictions=predictions,
-                                 true_statuses=true_statuses)
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    if np.isnan(group_a_accuracy) or np.isnan(group_b_accuracy):
-        diff = np.nan
-    else:
-        diff = abs(group_a_accuracy - group_b_accuracy)
-
-    return diff
+    return table.compare(group_a_label, group_b_label, "acc", kind="diff")
 
 
 def group_acc_ratio(group_a_label, group_b_label, subject_labels,
-                    predictions, true_statuses, natural_log=True):
+                    predictions, true_statuses, natural_log=True,
+                    sample_weight=None):
     """
     Calculate the ratio of accuracies between two groups.
 
@@ -119,6 +107,9 @@ def group_acc_ratio(group_a_label, group_b_label, subject_labels,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -126,32 +117,17 @@ def group_acc_ratio(group_a_label, group_b_label, subject_labels,
         The (log) ratio of accuracies between the two groups. Returns np.nan
         if either group has no observations or if either accuracy is 0.
     """
-    group_a_accuracy = group_acc(group_label=group_a_label,
-                                 subject_labels=subject_labels,
-                                 predictions=predictions,
-                                 true_statuses=true_statuses)
-    group_b_accuracy = group_acc(group_label=group_b_label,
-                                 subject_labels=subject_labels,
-                                 predictions=predictions,
-                                 true_statuses=true_statuses)
-
-    if np.isnan(group_a_accuracy) or np.isnan(group_b_accuracy):
-        ratio = np.nan
-    elif group_a_accuracy == 0 or group_b_accuracy == 0:
-        ratio = np.nan
-    else:
-        ratio_a_b = group_a_accuracy / group_b_accuracy
-        ratio_b_a = group_b_accuracy / group_a_accuracy
-        ratio = max(ratio_a_b, ratio_b_a)
-
-    if natural_log is True:
-        return np.log(ratio)
-    else:
-        return ratio
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
+
+    return table.compare(group_a_label, group_b_label, "acc", kind="ratio",
+                         natural_log=natural_log)
 
 
 def intersect_acc(group_labels_dict, subject_labels_dict,
-                  predictions, true_statuses):
+                  predictions, true_statuses, sample_weight=None):
     """
     Calculate accuracy for an intersectional group.
 
@@ -172,6 +148,9 @@ def intersect_acc(group_labels_dict, subject_labels_dict,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -179,39 +158,18 @@ def intersect_acc(group_labels_dict, subject_labels_dict,
         The accuracy of the model in the specified intersectional group.
         Returns np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-    categories = sorted(group_labels_dict.keys())
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
-
-    in_groups = [False] * n_samples
-    for observation in range(n_samples):
-        category_match = []
-        for category in categories:
-            group = group_labels_dict[category]
-            if subject_labels_dict[category][observation] == group:
-                category_match.append(1)
-            else:
-                category_match.append(0)
-        in_intersectional_group = bool(math.prod(category_match))
-        if in_intersectional_group is True:
-            in_groups[observation] = True
+    counts = intersect_group_counts(group_labels_dict=group_labels_dict,
+                                    subject_labels_dict=subject_labels_dict,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    intersect_group_results = [acc for acc, include
-                               in zip(accurate_or_not, in_groups)
-                               if include is True]
+    return float(rates_from_counts(counts, "acc"))
 
-    if len(intersect_group_results) > 0:
-        accuracy = sum(intersect_group_results) / len(intersect_group_results)
-    else:
-        accuracy = np.nan
 
-    return accuracy
-
-
-def all_intersect_accs(subject_labels_dict, predictions, true_statuses):
+def all_intersect_accs(subject_labels_dict, predictions, true_statuses,
+                       sparse=False, n_jobs=1, chunk_size=None,
+                       sample_weight=None):
     """
     Calculate accuracies for all possible intersectional groups.
 
@@ -229,6 +187,20 @@ def all_intersect_accs(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -236,31 +208,21 @@ def all_intersect_accs(subject_labels_dict, predictions, true_statuses):
         Dictionary mapping intersectional group names (formatted as
         "label1 + label2 + ...") to their respective accuracies.
     """
-    category_names = sorted(subject_labels_dict.keys())
-    unique_groups = {}
-    for category in category_names:
-        unique_groups[category] = sorted(set(subject_labels_dict[category]))
-
-    all_combinations = list(product(*[unique_groups[category]
-                            for category in category_names]))
-
-    accuracies = {}
-    for combination in all_combinations:
-        combination_dict = {}
-        for i, category_name in enumerate(category_names):
-            combination_dict[category_name] = combination[i]
-        intersect_accuracy = intersect_acc(
-                                group_labels_dict=combination_dict,
-                                subject_labels_dict=subject_labels_dict,
-                                predictions=predictions,
-                                true_statuses=true_statuses)
-        intersect_group_name = " + ".join(str(group) for group in combination)
-        accuracies[intersect_group_name] = intersect_accuracy
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
 
-    return accuracies
+    return table.to_dict("acc")
 
 
-def max_intersect_acc_diff(subject_labels_dict, predictions, true_statuses):
+def max_intersect_acc_diff(subject_labels_dict, predictions, true_statuses,
+                           sparse=False, min_support=None, n_jobs=1,
+                           chunk_size=None, sample_weight=None):
     """
     Calculate the maximum difference in accuracy across intersectional groups.
 
@@ -275,6 +237,24 @@ def max_intersect_acc_diff(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -282,22 +262,22 @@ def max_intersect_acc_diff(subject_labels_dict, predictions, true_statuses):
         The maximum difference between any two intersectional group accuracies.
         Returns np.nan if any group has no observations.
     """
-    accuracies = all_intersect_accs(
-                    subject_labels_dict=subject_labels_dict,
-                    predictions=predictions,
-                    true_statuses=true_statuses)
-    accuracy_values = np.array(list(accuracies.values()))
-
-    if any(np.isnan(accuracy_values)):
-        max_diff = np.nan
-    else:
-        max_diff = max(accuracy_values) - min(accuracy_values)
-
-    return max_diff
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, max_diff, _ = max_diff_and_ratio(table.counts[np.newaxis], "acc",
+                                        min_support)
+    return max_diff[0]
 
 
 def max_intersect_acc_ratio(subject_labels_dict, predictions, true_statuses,
-                            natural_log=True):
+                            natural_log=True, sparse=False, min_support=None,
+                            n_jobs=1, chunk_size=None, sample_weight=None):
     """
     Calculate the maximum ratio of accuracies across intersectional groups.
 
@@ -314,6 +294,24 @@ def max_intersect_acc_ratio(subject_labels_dict, predictions, true_statuses,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -322,26 +320,21 @@ def max_intersect_acc_ratio(subject_labels_dict, predictions, true_statuses,
         intersectional groups. Returns np.nan if any group has no observations
         or if any accuracy is 0.
     """
-    accuracies = all_intersect_accs(
-                    subject_labels_dict=subject_labels_dict,
-                    predictions=predictions,
-                    true_statuses=true_statuses)
-    accuracy_values = np.array(list(accuracies.values()))
-
-    if any(np.isnan(accuracy_values)):
-        max_ratio = np.nan
-    elif np.any(accuracy_values == 0):
-        max_ratio = np.nan
-    else:
-        max_ratio = max(accuracy_values) / min(accuracy_values)
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, _, max_ratio = max_diff_and_ratio(table.counts[np.newaxis], "acc",
+                                         min_support, natural_log)
+    return max_ratio[0]
 
-    if natural_log is True:
-        return np.log(max_ratio)
-    else:
-        return max_ratio
 
-
-def group_fnr(group_label, subject_labels, predictions, true_statuses):
+def group_fnr(group_label, subject_labels, predictions, true_statuses,
+              sample_weight=None):
     """
     Find the false negative rate of a group with a specific label.
 
@@ -359,6 +352,9 @@ def group_fnr(group_label, subject_labels, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -366,32 +362,16 @@ def group_fnr(group_label, subject_labels, predictions, true_statuses):
         The false negative rate of the model in the specified group. Returns
         np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
-
-    in_group = [False] * n_samples
-    for observation in range(n_samples):
-        if subject_labels[observation] == group_label:
-            in_group[observation] = True
-    results_for_pos_cases = [acc for acc, include, truth
-                             in zip(accurate_or_not, in_group, true_statuses)
-                             if include is True and bool(truth) is True]
-
-    if len(results_for_pos_cases) > 0:
-        false_neg_rate = (len(results_for_pos_cases)
-                          - sum(results_for_pos_cases)) \
-                         / len(results_for_pos_cases)
-    else:
-        false_neg_rate = np.nan
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    return false_neg_rate
+    return table.rate(group_label, "fnr")
 
 
 def group_fnr_diff(group_a_label, group_b_label, subject_labels,
-                   predictions, true_statuses):
+                   predictions, true_statuses, sample_weight=None):
     """
     Calculate the absolute difference in false negative rate between two
     groups.
@@ -411,6 +391,9 @@ def group_fnr_diff(group_a_label, group_b_label, subject_labels,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -418,25 +401,17 @@ def group_fnr_diff(group_a_label, group_b_label, subject_labels,
         The absolute difference in false negative rate between the two groups.
         Returns np.nan if either group has no observations.
     """
-    group_a_fnr = group_fnr(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_fnr = group_fnr(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    if np.isnan(group_a_fnr) or np.isnan(group_a_fnr):
-        diff = np.nan
-    else:
-        diff = abs(group_a_fnr - group_b_fnr)
-
-    return diff
+    return table.compare(group_a_label, group_b_label, "fnr", kind="diff")
 
 
 def group_fnr_ratio(group_a_label, group_b_label, subject_labels,
-                    predictions, true_statuses, natural_log=True):
+                    predictions, true_statuses, natural_log=True,
+                    sample_weight=None):
     """
     Calculate the ratio of false negative rates between two groups.
 
@@ -460,6 +435,9 @@ def group_fnr_ratio(group_a_label, group_b_label, subject_labels,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -468,32 +446,17 @@ def group_fnr_ratio(group_a_label, group_b_label, subject_labels,
         np.nan if either group has no observations or if either false negative
         rate is 0.
     """
-    group_a_fnr = group_fnr(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_fnr = group_fnr(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-
-    if np.isnan(group_a_fnr) or np.isnan(group_a_fnr):
-        ratio = np.nan
-    elif group_a_fnr == 0 or group_b_fnr == 0:
-        ratio = np.nan
-    else:
-        ratio_a_b = group_a_fnr / group_b_fnr
-        ratio_b_a = group_b_fnr / group_a_fnr
-        ratio = max(ratio_a_b, ratio_b_a)
-
-    if natural_log is True:
-        return np.log(ratio)
-    else:
-        return ratio
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
+
+    return table.compare(group_a_label, group_b_label, "fnr", kind="ratio",
+                         natural_log=natural_log)
 
 
 def intersect_fnr(group_labels_dict, subject_labels_dict,
-                  predictions, true_statuses):
+                  predictions, true_statuses, sample_weight=None):
     """
     Calculate false negative rate for an intersectional group.
 
@@ -515,6 +478,9 @@ def intersect_fnr(group_labels_dict, subject_labels_dict,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -522,41 +488,18 @@ def intersect_fnr(group_labels_dict, subject_labels_dict,
         The false negative rate of the model in the specified intersectional
         group. Returns np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-    categories = sorted(group_labels_dict.keys())
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
+    counts = intersect_group_counts(group_labels_dict=group_labels_dict,
+                                    subject_labels_dict=subject_labels_dict,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    in_groups = [False] * n_samples
-    for observation in range(n_samples):
-        category_match = []
-        for category in categories:
-            group = group_labels_dict[category]
-            if subject_labels_dict[category][observation] == group:
-                category_match.append(1)
-            else:
-                category_match.append(0)
-        in_intersectional_group = bool(math.prod(category_match))
-        if in_intersectional_group is True:
-            in_groups[observation] = True
+    return float(rates_from_counts(counts, "fnr"))
 
-    inter_pos_case_results = [acc for acc, include, truth
-                              in zip(accurate_or_not, in_groups, true_statuses)
-                              if include is True and bool(truth) is True]
 
-    if len(inter_pos_case_results) > 0:
-        false_neg_rate = (len(inter_pos_case_results)
-                          - sum(inter_pos_case_results)) \
-                         / len(inter_pos_case_results)
-    else:
-        false_neg_rate = np.nan
-
-    return false_neg_rate
-
-
-def all_intersect_fnrs(subject_labels_dict, predictions, true_statuses):
+def all_intersect_fnrs(subject_labels_dict, predictions, true_statuses,
+                       sparse=False, n_jobs=1, chunk_size=None,
+                       sample_weight=None):
     """
     Calculate false negative rates for all possible intersectional groups.
 
@@ -574,6 +517,20 @@ def all_intersect_fnrs(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -581,34 +538,21 @@ def all_intersect_fnrs(subject_labels_dict, predictions, true_statuses):
         Dictionary mapping intersectional group names (as strings with ' + '
         separating categories) to their false negative rates.
     """
-    category_names = sorted(subject_labels_dict.keys())
-    unique_groups = {}
-    for category in category_names:
-        unique_groups[category] = sorted(set(subject_labels_dict[category]))
-
-    all_combinations = list(product(*[unique_groups[category]
-                            for category in category_names]))
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
 
-    fnrs = {}
-    for combination in all_combinations:
-        combination_dict = {}
-        for i, category_name in enumerate(category_names):
-            combination_dict[category_name] = combination[i]
-        intersect_fn_rate = intersect_fnr(
-                                group_labels_dict=combination_dict,
-                                subject_labels_dict=subject_labels_dict,
-                                predictions=predictions,
-                                true_statuses=true_statuses)
-        intersect_group_name = " + ".join(str(group) for group in combination)
-        fnrs[intersect_group_name] = intersect_fn_rate
+    return table.to_dict("fnr")
 
-    return fnrs
 
-
-def max_intersect_fnr_diff(subject_labels_dict, predictions, true_statuses):
-    fnrs = all_intersect_fnrs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
+def max_intersect_fnr_diff(subject_labels_dict, predictions, true_statuses,
+                           sparse=False, min_support=None, n_jobs=1,
+                           chunk_size=None, sample_weight=None):
     """
     Calculate the maximum difference in false negative rate across all
     intersectional groups.
@@ -624,6 +568,24 @@ def max_intersect_fnr_diff(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -632,21 +594,22 @@ def max_intersect_fnr_diff(subject_labels_dict, predictions, true_statuses):
         across all intersectional groups. Returns np.nan if any group has no
         observations.
     """
-    fnrs = all_intersect_fnrs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    fnr_values = np.array(list(fnrs.values()))
-
-    if any(np.isnan(fnr_values)):
-        max_diff = np.nan
-    else:
-        max_diff = max(fnr_values) - min(fnr_values)
-
-    return max_diff
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, max_diff, _ = max_diff_and_ratio(table.counts[np.newaxis], "fnr",
+                                        min_support)
+    return max_diff[0]
 
 
 def max_intersect_fnr_ratio(subject_labels_dict, predictions, true_statuses,
-                            natural_log=True):
+                            natural_log=True, sparse=False, min_support=None,
+                            n_jobs=1, chunk_size=None, sample_weight=None):
     """
     Calculate the ratio of the maximum to minimum false negative rate across
     all intersectional groups.
@@ -664,6 +627,24 @@ def max_intersect_fnr_ratio(subject_labels_dict, predictions, true_statuses,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -672,25 +653,21 @@ def max_intersect_fnr_ratio(subject_labels_dict, predictions, true_statuses,
         all intersectional groups. Returns np.nan if any group has no
         observations or if any false negative rate is 0.
     """
-    fnrs = all_intersect_fnrs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    fnr_values = np.array(list(fnrs.values()))
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, _, max_ratio = max_diff_and_ratio(table.counts[np.newaxis], "fnr",
+                                         min_support, natural_log)
+    return max_ratio[0]
 
-    if any(np.isnan(fnr_values)):
-        max_ratio = np.nan
-    elif np.any(fnr_values == 0):
-        max_ratio = np.nan
-    else:
-        max_ratio = max(fnr_values) / min(fnr_values)
 
-    if natural_log is True:
-        return np.log(max_ratio)
-    else:
-        return max_ratio
-
-
-def group_fpr(group_label, subject_labels, predictions, true_statuses):
+def group_fpr(group_label, subject_labels, predictions, true_statuses,
+              sample_weight=None):
     """
     Find the false positive rate of a group with a specific label.
 
@@ -708,6 +685,9 @@ def group_fpr(group_label, subject_labels, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -715,32 +695,16 @@ def group_fpr(group_label, subject_labels, predictions, true_statuses):
         The false positive rate of the model in the specified group. Returns
         np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
-
-    in_group = [False] * n_samples
-    for observation in range(n_samples):
-        if subject_labels[observation] == group_label:
-            in_group[observation] = True
-    results_for_neg_cases = [acc for acc, include, truth
-                             in zip(accurate_or_not, in_group, true_statuses)
-                             if include is True and bool(truth) is False]
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    if len(results_for_neg_cases) > 0:
-        false_pos_rate = (len(results_for_neg_cases)
-                          - sum(results_for_neg_cases)) \
-                         / len(results_for_neg_cases)
-    else:
-        false_pos_rate = np.nan
-
-    return false_pos_rate
+    return table.rate(group_label, "fpr")
 
 
 def group_fpr_diff(group_a_label, group_b_label, subject_labels,
-                   predictions, true_statuses):
+                   predictions, true_statuses, sample_weight=None):
     """
     Calculate the absolute difference in false positive rate between two
     groups.
@@ -760,6 +724,9 @@ def group_fpr_diff(group_a_label, group_b_label, subject_labels,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -767,25 +734,17 @@ def group_fpr_diff(group_a_label, group_b_label, subject_labels,
         The absolute difference in false positive rate between the two groups.
         Returns np.nan if either group has no observations.
     """
-    group_a_fpr = group_fpr(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_fpr = group_fpr(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-
-    if np.isnan(group_a_fpr) or np.isnan(group_a_fpr):
-        diff = np.nan
-    else:
-        diff = abs(group_a_fpr - group_b_fpr)
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    return diff
+    return table.compare(group_a_label, group_b_label, "fpr", kind="diff")
 
 
 def group_fpr_ratio(group_a_label, group_b_label, subject_labels,
-                    predictions, true_statuses, natural_log=True):
+                    predictions, true_statuses, natural_log=True,
+                    sample_weight=None):
     """
     Calculate the ratio of false positive rates between two groups.
 
@@ -809,6 +768,9 @@ def group_fpr_ratio(group_a_label, group_b_label, subject_labels,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -817,32 +779,17 @@ def group_fpr_ratio(group_a_label, group_b_label, subject_labels,
         np.nan if either group has no observations or if either false positive
         rate is 0.
     """
-    group_a_fpr = group_fpr(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_fpr = group_fpr(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-
-    if np.isnan(group_a_fpr) or np.isnan(group_a_fpr):
-        ratio = np.nan
-    elif group_a_fpr == 0 or group_b_fpr == 0:
-        ratio = np.nan
-    else:
-        ratio_a_b = group_a_fpr / group_b_fpr
-        ratio_b_a = group_b_fpr / group_a_fpr
-        ratio = max(ratio_a_b, ratio_b_a)
-
-    if natural_log is True:
-        return np.log(ratio)
-    else:
-        return ratio
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
+
+    return table.compare(group_a_label, group_b_label, "fpr", kind="ratio",
+                         natural_log=natural_log)
 
 
 def intersect_fpr(group_labels_dict, subject_labels_dict,
-                  predictions, true_statuses):
+                  predictions, true_statuses, sample_weight=None):
     """
     Calculate false positive rate for an intersectional group.
 
@@ -864,6 +811,9 @@ def intersect_fpr(group_labels_dict, subject_labels_dict,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -871,41 +821,18 @@ def intersect_fpr(group_labels_dict, subject_labels_dict,
         The false positive rate of the model in the specified intersectional
         group. Returns np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-    categories = sorted(group_labels_dict.keys())
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
+    counts = intersect_group_counts(group_labels_dict=group_labels_dict,
+                                    subject_labels_dict=subject_labels_dict,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    in_groups = [False] * n_samples
-    for observation in range(n_samples):
-        category_match = []
-        for category in categories:
-            group = group_labels_dict[category]
-            if subject_labels_dict[category][observation] == group:
-                category_match.append(1)
-            else:
-                category_match.append(0)
-        in_intersectional_group = bool(math.prod(category_match))
-        if in_intersectional_group is True:
-            in_groups[observation] = True
+    return float(rates_from_counts(counts, "fpr"))
 
-    inter_neg_case_results = [acc for acc, include, truth
-                              in zip(accurate_or_not, in_groups, true_statuses)
-                              if include is True and bool(truth) is False]
 
-    if len(inter_neg_case_results) > 0:
-        false_pos_rate = (len(inter_neg_case_results)
-                          - sum(inter_neg_case_results)) \
-                         / len(inter_neg_case_results)
-    else:
-        false_pos_rate = np.nan
-
-    return false_pos_rate
-
-
-def all_intersect_fprs(subject_labels_dict, predictions, true_statuses):
+def all_intersect_fprs(subject_labels_dict, predictions, true_statuses,
+                       sparse=False, n_jobs=1, chunk_size=None,
+                       sample_weight=None):
     """
     Calculate false positive rates for all possible intersectional groups.
 
@@ -923,6 +850,20 @@ def all_intersect_fprs(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -930,31 +871,21 @@ def all_intersect_fprs(subject_labels_dict, predictions, true_statuses):
         Dictionary mapping intersectional group names (as strings with ' + '
         separating categories) to their false positive rates.
     """
-    category_names = sorted(subject_labels_dict.keys())
-    unique_groups = {}
-    for category in category_names:
-        unique_groups[category] = sorted(set(subject_labels_dict[category]))
-
-    all_combinations = list(product(*[unique_groups[category]
-                            for category in category_names]))
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
 
-    fprs = {}
-    for combination in all_combinations:
-        combination_dict = {}
-        for i, category_name in enumerate(category_names):
-            combination_dict[category_name] = combination[i]
-        intersect_fp_rate = intersect_fpr(
-                                group_labels_dict=combination_dict,
-                                subject_labels_dict=subject_labels_dict,
-                                predictions=predictions,
-                                true_statuses=true_statuses)
-        intersect_group_name = " + ".join(str(group) for group in combination)
-        fprs[intersect_group_name] = intersect_fp_rate
+    return table.to_dict("fpr")
 
-    return fprs
 
-
-def max_intersect_fpr_diff(subject_labels_dict, predictions, true_statuses):
+def max_intersect_fpr_diff(subject_labels_dict, predictions, true_statuses,
+                           sparse=False, min_support=None, n_jobs=1,
+                           chunk_size=None, sample_weight=None):
     """
     Calculate the maximum difference in false positive rate across all
     intersectional groups.
@@ -970,6 +901,24 @@ def max_intersect_fpr_diff(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -978,21 +927,22 @@ def max_intersect_fpr_diff(subject_labels_dict, predictions, true_statuses):
         across all intersectional groups. Returns np.nan if any group has no
         observations.
     """
-    fprs = all_intersect_fprs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    fpr_values = np.array(list(fprs.values()))
-
-    if any(np.isnan(fpr_values)):
-        max_diff = np.nan
-    else:
-        max_diff = max(fpr_values) - min(fpr_values)
-
-    return max_diff
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, max_diff, _ = max_diff_and_ratio(table.counts[np.newaxis], "fpr",
+                                        min_support)
+    return max_diff[0]
 
 
 def max_intersect_fpr_ratio(subject_labels_dict, predictions, true_statuses,
-                            natural_log=True):
+                            natural_log=True, sparse=False, min_support=None,
+                            n_jobs=1, chunk_size=None, sample_weight=None):
     """
     Calculate the ratio of the maximum to minimum false positive rate across
     all intersectional groups.
@@ -1010,6 +960,24 @@ def max_intersect_fpr_ratio(subject_labels_dict, predictions, true_statuses,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1018,25 +986,21 @@ def max_intersect_fpr_ratio(subject_labels_dict, predictions, true_statuses,
         all intersectional groups. Returns np.nan if any group has no
         observations or if any false positive rate is 0.
     """
-    fprs = all_intersect_fprs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    fpr_values = np.array(list(fprs.values()))
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, _, max_ratio = max_diff_and_ratio(table.counts[np.newaxis], "fpr",
+                                         min_support, natural_log)
+    return max_ratio[0]
 
-    if any(np.isnan(fpr_values)):
-        max_ratio = np.nan
-    elif np.any(fpr_values == 0):
-        max_ratio = np.nan
-    else:
-        max_ratio = max(fpr_values) / min(fpr_values)
 
-    if natural_log is True:
-        return np.log(max_ratio)
-    else:
-        return max_ratio
-
-
-def group_for(group_label, subject_labels, predictions, true_statuses):
+def group_for(group_label, subject_labels, predictions, true_statuses,
+              sample_weight=None):
     """
     Find the false omission rate of a group with a specific label.
 
@@ -1054,6 +1018,9 @@ def group_for(group_label, subject_labels, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1061,31 +1028,16 @@ def group_for(group_label, subject_labels, predictions, true_statuses):
         The false omission rate of the model in the specified group. Returns
         np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
-
-    in_group = [False] * n_samples
-    for observation in range(n_samples):
-        if subject_labels[observation] == group_label:
-            in_group[observation] = True
-    group_neg_results = [acc for acc, include, pos
-                         in zip(accurate_or_not, in_group, predictions)
-                         if include is True and bool(pos) is False]
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    if len(group_neg_results) > 0:
-        false_omi_rate = (len(group_neg_results)-sum(group_neg_results)) \
-                         / len(group_neg_results)
-    else:
-        false_omi_rate = np.nan
-
-    return false_omi_rate
+    return table.rate(group_label, "for")
 
 
 def group_for_diff(group_a_label, group_b_label, subject_labels,
-                   predictions, true_statuses):
+                   predictions, true_statuses, sample_weight=None):
     """
     Calculate the absolute difference in false omission rate between two
     groups.
@@ -1105,6 +1057,9 @@ def group_for_diff(group_a_label, group_b_label, subject_labels,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1112,25 +1067,17 @@ def group_for_diff(group_a_label, group_b_label, subject_labels,
         The absolute difference in false omission rate between the two groups.
         Returns np.nan if either group has no observations.
     """
-    group_a_for = group_for(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_for = group_for(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-
-    if np.isnan(group_a_for) or np.isnan(group_b_for):
-        diff = np.nan
-    else:
-        diff = abs(group_a_for - group_b_for)
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    return diff
+    return table.compare(group_a_label, group_b_label, "for", kind="diff")
 
 
 def group_for_ratio(group_a_label, group_b_label, subject_labels,
-                    predictions, true_statuses, natural_log=True):
+                    predictions, true_statuses, natural_log=True,
+                    sample_weight=None):
     """
     Calculate the ratio of false omission rates between two groups.
 
@@ -1154,6 +1101,9 @@ def group_for_ratio(group_a_label, group_b_label, subject_labels,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1162,32 +1112,17 @@ def group_for_ratio(group_a_label, group_b_label, subject_labels,
         np.nan if either group has no observations or if either false omission
         rate is 0.
     """
-    group_a_for = group_for(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_for = group_for(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-
-    if np.isnan(group_a_for) or np.isnan(group_b_for):
-        ratio = np.nan
-    elif group_a_for == 0 or group_b_for == 0:
-        ratio = np.nan
-    else:
-        ratio_a_b = group_a_for / group_b_for
-        ratio_b_a = group_b_for / group_a_for
-        ratio = max(ratio_a_b, ratio_b_a)
-
-    if natural_log is True:
-        return np.log(ratio)
-    else:
-        return ratio
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
+
+    return table.compare(group_a_label, group_b_label, "for", kind="ratio",
+                         natural_log=natural_log)
 
 
 def intersect_for(group_labels_dict, subject_labels_dict,
-                  predictions, true_statuses):
+                  predictions, true_statuses, sample_weight=None):
     """
     Calculate false omission rate for an intersectional group.
 
@@ -1209,6 +1144,9 @@ def intersect_for(group_labels_dict, subject_labels_dict,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1216,40 +1154,18 @@ def intersect_for(group_labels_dict, subject_labels_dict,
         The false omission rate of the model in the specified intersectional
         group. Returns np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-    categories = sorted(group_labels_dict.keys())
+    counts = intersect_group_counts(group_labels_dict=group_labels_dict,
+                                    subject_labels_dict=subject_labels_dict,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
+    return float(rates_from_counts(counts, "for"))
 
-    in_groups = [False] * n_samples
-    for observation in range(n_samples):
-        category_match = []
-        for category in categories:
-            group = group_labels_dict[category]
-            if subject_labels_dict[category][observation] == group:
-                category_match.append(1)
-            else:
-                category_match.append(0)
-        in_intersectional_group = bool(math.prod(category_match))
-        if in_intersectional_group is True:
-            in_groups[observation] = True
 
-    inter_neg_results = [acc for acc, include, pos
-                         in zip(accurate_or_not, in_groups, predictions)
-                         if include is True and bool(pos) is False]
-
-    if len(inter_neg_results) > 0:
-        false_omi_rate = (len(inter_neg_results)-sum(inter_neg_results)) \
-                          / len(inter_neg_results)
-    else:
-        false_omi_rate = np.nan
-
-    return false_omi_rate
-
-
-def all_intersect_fors(subject_labels_dict, predictions, true_statuses):
+def all_intersect_fors(subject_labels_dict, predictions, true_statuses,
+                       sparse=False, n_jobs=1, chunk_size=None,
+                       sample_weight=None):
     """
     Calculate false omission rates for all possible intersectional groups.
 
@@ -1267,6 +1183,20 @@ def all_intersect_fors(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1274,31 +1204,21 @@ def all_intersect_fors(subject_labels_dict, predictions, true_statuses):
         Dictionary mapping intersectional group names (as strings with ' + '
         separating categories) to their false omission rates.
     """
-    category_names = sorted(subject_labels_dict.keys())
-    unique_groups = {}
-    for category in category_names:
-        unique_groups[category] = sorted(set(subject_labels_dict[category]))
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
 
-    all_combinations = list(product(*[unique_groups[category]
-                            for category in category_names]))
+    return table.to_dict("for")
 
-    fors = {}
-    for combination in all_combinations:
-        combination_dict = {}
-        for i, category_name in enumerate(category_names):
-            combination_dict[category_name] = combination[i]
-        intersect_fo_rate = intersect_for(
-                                group_labels_dict=combination_dict,
-                                subject_labels_dict=subject_labels_dict,
-                                predictions=predictions,
-                                true_statuses=true_statuses)
-        intersect_group_name = " + ".join(str(group) for group in combination)
-        fors[intersect_group_name] = intersect_fo_rate
 
-    return fors
-
-
-def max_intersect_for_diff(subject_labels_dict, predictions, true_statuses):
+def max_intersect_for_diff(subject_labels_dict, predictions, true_statuses,
+                           sparse=False, min_support=None, n_jobs=1,
+                           chunk_size=None, sample_weight=None):
     """
     Calculate the maximum difference in false omission rate across all
     intersectional groups.
@@ -1314,6 +1234,24 @@ def max_intersect_for_diff(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1322,21 +1260,22 @@ def max_intersect_for_diff(subject_labels_dict, predictions, true_statuses):
         across all intersectional groups. Returns np.nan if any group has no
         observations.
     """
-    fors = all_intersect_fors(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    for_values = np.array(list(fors.values()))
-
-    if any(np.isnan(for_values)):
-        max_diff = np.nan
-    else:
-        max_diff = max(for_values) - min(for_values)
-
-    return max_diff
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, max_diff, _ = max_diff_and_ratio(table.counts[np.newaxis], "for",
+                                        min_support)
+    return max_diff[0]
 
 
 def max_intersect_for_ratio(subject_labels_dict, predictions, true_statuses,
-                            natural_log=True):
+                            natural_log=True, sparse=False, min_support=None,
+                            n_jobs=1, chunk_size=None, sample_weight=None):
     """
     Calculate the ratio of the maximum to minimum false omission rate across
     all intersectional groups.
@@ -1354,6 +1293,24 @@ def max_intersect_for_ratio(subject_labels_dict, predictions, true_statuses,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1362,25 +1319,21 @@ def max_intersect_for_ratio(subject_labels_dict, predictions, true_statuses,
         all intersectional groups. Returns np.nan if any group has no
         observations or if any false omission rate is 0.
     """
-    fors = all_intersect_fors(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    for_values = np.array(list(fors.values()))
-
-    if any(np.isnan(for_values)):
-        max_ratio = np.nan
-    elif np.any(for_values == 0):
-        max_ratio = np.nan
-    else:
-        max_ratio = max(for_values) / min(for_values)
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, _, max_ratio = max_diff_and_ratio(table.counts[np.newaxis], "for",
+                                         min_support, natural_log)
+    return max_ratio[0]
 
-    if natural_log is True:
-        return np.log(max_ratio)
-    else:
-        return max_ratio
 
-
-def group_fdr(group_label, subject_labels, predictions, true_statuses):
+def group_fdr(group_label, subject_labels, predictions, true_statuses,
+              sample_weight=None):
     """
     Find the false discovery rate of a group with a specific label.
 
@@ -1398,6 +1351,9 @@ def group_fdr(group_label, subject_labels, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1405,31 +1361,16 @@ def group_fdr(group_label, subject_labels, predictions, true_statuses):
         The false discovery rate of the model in the specified group. Returns
         np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    in_group = [False] * n_samples
-    for observation in range(n_samples):
-        if subject_labels[observation] == group_label:
-            in_group[observation] = True
-    group_pos_results = [acc for acc, include, pos
-                         in zip(accurate_or_not, in_group, predictions)
-                         if include is True and bool(pos) is True]
-
-    if len(group_pos_results) > 0:
-        false_dis_rate = (len(group_pos_results)-sum(group_pos_results)) \
-                         / len(group_pos_results)
-    else:
-        false_dis_rate = np.nan
-
-    return false_dis_rate
+    return table.rate(group_label, "fdr")
 
 
 def group_fdr_diff(group_a_label, group_b_label, subject_labels,
-                   predictions, true_statuses):
+                   predictions, true_statuses, sample_weight=None):
     """
     Calculate the absolute difference in false discovery rate between two
     groups.
@@ -1449,6 +1390,9 @@ def group_fdr_diff(group_a_label, group_b_label, subject_labels,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1456,25 +1400,17 @@ def group_fdr_diff(group_a_label, group_b_label, subject_labels,
         The absolute difference in false discovery rate between the two groups.
         Returns np.nan if either group has no observations.
     """
-    group_a_fdr = group_fdr(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_fdr = group_fdr(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    if np.isnan(group_a_fdr) or np.isnan(group_b_fdr):
-        diff = np.nan
-    else:
-        diff = abs(group_a_fdr - group_b_fdr)
-
-    return diff
+    return table.compare(group_a_label, group_b_label, "fdr", kind="diff")
 
 
 def group_fdr_ratio(group_a_label, group_b_label, subject_labels,
-                    predictions, true_statuses, natural_log=True):
+                    predictions, true_statuses, natural_log=True,
+                    sample_weight=None):
     """
     Calculate the ratio of false discovery rates between two groups.
 
@@ -1498,6 +1434,9 @@ def group_fdr_ratio(group_a_label, group_b_label, subject_labels,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1506,32 +1445,17 @@ def group_fdr_ratio(group_a_label, group_b_label, subject_labels,
         Returns np.nan if either group has no observations or if either false
         discovery rate is 0.
     """
-    group_a_fdr = group_fdr(group_label=group_a_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-    group_b_fdr = group_fdr(group_label=group_b_label,
-                            subject_labels=subject_labels,
-                            predictions=predictions,
-                            true_statuses=true_statuses)
-
-    if np.isnan(group_a_fdr) or np.isnan(group_b_fdr):
-        ratio = np.nan
-    elif group_a_fdr == 0 or group_b_fdr == 0:
-        ratio = np.nan
-    else:
-        ratio_a_b = group_a_fdr / group_b_fdr
-        ratio_b_a = group_b_fdr / group_a_fdr
-        ratio = max(ratio_a_b, ratio_b_a)
-
-    if natural_log is True:
-        return np.log(ratio)
-    else:
-        return ratio
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
+
+    return table.compare(group_a_label, group_b_label, "fdr", kind="ratio",
+                         natural_log=natural_log)
 
 
 def intersect_fdr(group_labels_dict, subject_labels_dict,
-                  predictions, true_statuses):
+                  predictions, true_statuses, sample_weight=None):
     """
     Calculate false discovery rate for an intersectional group.
 
@@ -1553,6 +1477,9 @@ def intersect_fdr(group_labels_dict, subject_labels_dict,
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1560,40 +1487,18 @@ def intersect_fdr(group_labels_dict, subject_labels_dict,
         The false discovery rate of the model in the specified intersectional
         group. Returns np.nan if the group has no observations.
     """
-    n_samples = len(predictions)
-    categories = sorted(group_labels_dict.keys())
+    counts = intersect_group_counts(group_labels_dict=group_labels_dict,
+                                    subject_labels_dict=subject_labels_dict,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
 
-    accurate_or_not = [pred == truth
-                       for pred, truth
-                       in zip(predictions, true_statuses)]
+    return float(rates_from_counts(counts, "fdr"))
 
-    in_groups = [False] * n_samples
-    for observation in range(n_samples):
-        category_match = []
-        for category in categories:
-            group = group_labels_dict[category]
-            if subject_labels_dict[category][observation] == group:
-                category_match.append(1)
-            else:
-                category_match.append(0)
-        in_intersectional_group = bool(math.prod(category_match))
-        if in_intersectional_group is True:
-            in_groups[observation] = True
 
-    inter_pos_results = [acc for acc, include, pos
-                         in zip(accurate_or_not, in_groups, predictions)
-                         if include is True and bool(pos) is True]
-
-    if len(inter_pos_results) > 0:
-        false_dis_rate = (len(inter_pos_results)-sum(inter_pos_results)) \
-                          / len(inter_pos_results)
-    else:
-        false_dis_rate = np.nan
-
-    return false_dis_rate
-
-
-def all_intersect_fdrs(subject_labels_dict, predictions, true_statuses):
+def all_intersect_fdrs(subject_labels_dict, predictions, true_statuses,
+                       sparse=False, n_jobs=1, chunk_size=None,
+                       sample_weight=None):
     """
     Calculate false discovery rates for all possible intersectional groups.
 
@@ -1611,6 +1516,20 @@ def all_intersect_fdrs(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1618,31 +1537,21 @@ def all_intersect_fdrs(subject_labels_dict, predictions, true_statuses):
         Dictionary mapping intersectional group names (as strings with ' + '
         separating categories) to their false discovery rates.
     """
-    category_names = sorted(subject_labels_dict.keys())
-    unique_groups = {}
-    for category in category_names:
-        unique_groups[category] = sorted(set(subject_labels_dict[category]))
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
 
-    all_combinations = list(product(*[unique_groups[category]
-                            for category in category_names]))
+    return table.to_dict("fdr")
 
-    fdrs = {}
-    for combination in all_combinations:
-        combination_dict = {}
-        for i, category_name in enumerate(category_names):
-            combination_dict[category_name] = combination[i]
-        intersect_fd_rate = intersect_fdr(
-                                group_labels_dict=combination_dict,
-                                subject_labels_dict=subject_labels_dict,
-                                predictions=predictions,
-                                true_statuses=true_statuses)
-        intersect_group_name = " + ".join(str(group) for group in combination)
-        fdrs[intersect_group_name] = intersect_fd_rate
 
-    return fdrs
-
-
-def max_intersect_fdr_diff(subject_labels_dict, predictions, true_statuses):
+def max_intersect_fdr_diff(subject_labels_dict, predictions, true_statuses,
+                           sparse=False, min_support=None, n_jobs=1,
+                           chunk_size=None, sample_weight=None):
     """
     Calculate the maximum difference in false discovery rate across all
     intersectional groups.
@@ -1658,6 +1567,24 @@ def max_intersect_fdr_diff(subject_labels_dict, predictions, true_statuses):
     true_statuses : list[bool]
         A list of true diagnoses for each observation in the
         evaluation dataset.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1666,21 +1593,22 @@ def max_intersect_fdr_diff(subject_labels_dict, predictions, true_statuses):
         across all intersectional groups. Returns np.nan if any group has no
         observations.
     """
-    fdrs = all_intersect_fdrs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    fdr_values = np.array(list(fdrs.values()))
-
-    if any(np.isnan(fdr_values)):
-        max_diff = np.nan
-    else:
-        max_diff = max(fdr_values) - min(fdr_values)
-
-    return max_diff
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, max_diff, _ = max_diff_and_ratio(table.counts[np.newaxis], "fdr",
+                                        min_support)
+    return max_diff[0]
 
 
 def max_intersect_fdr_ratio(subject_labels_dict, predictions, true_statuses,
-                            natural_log=True):
+                            natural_log=True, sparse=False, min_support=None,
+                            n_jobs=1, chunk_size=None, sample_weight=None):
     """
     Calculate the ratio of the maximum to minimum false discovery rate across
     all intersectional groups.
@@ -1698,6 +1626,24 @@ def max_intersect_fdr_ratio(subject_labels_dict, predictions, true_statuses,
         evaluation dataset.
     natural_log : bool, optional
         If True, return the natural logarithm of the ratio. Default is True.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included, so cost scales with the number of observed groups rather
+        than the number of possible combinations. Default is False.
+    min_support : int or None, optional
+        If given, intersectional groups with fewer than min_support
+        observations in the rate's denominator are skipped instead of
+        making the result np.nan. Default is None (no groups skipped).
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
 
     Returns
     -------
@@ -1706,19 +1652,120 @@ def max_intersect_fdr_ratio(subject_labels_dict, predictions, true_statuses,
         all intersectional groups. Returns np.nan if any group has no
         observations or if any false discovery rate is 0.
     """
-    fdrs = all_intersect_fdrs(subject_labels_dict=subject_labels_dict,
-                              predictions=predictions,
-                              true_statuses=true_statuses)
-    fdr_values = np.array(list(fdrs.values()))
-
-    if any(np.isnan(fdr_values)):
-        max_ratio = np.nan
-    elif np.any(fdr_values == 0):
-        max_ratio = np.nan
-    else:
-        max_ratio = max(fdr_values) / min(fdr_values)
-
-    if natural_log is True:
-        return np.log(max_ratio)
-    else:
-        return max_ratio
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    _, _, max_ratio = max_diff_and_ratio(table.counts[np.newaxis], "fdr",
+                                         min_support, natural_log)
+    return max_ratio[0]
+
+
+def pairwise_group_metric(subject_labels, predictions, true_statuses,
+                          metric="acc", kind="diff", natural_log=True,
+                          sample_weight=None):
+    """
+    Compare a rate between every pair of groups.
+
+    Returns the values of group_<metric>_diff or group_<metric>_ratio for
+    all pairs of groups at once, from a single count of the data.
+
+    Parameters
+    ----------
+    subject_labels : dict
+        A dictionary containing subject labels for every observation in the
+        evaluation dataset.
+    predictions : list[bool]
+        A list of predicted diagnoses for each observation in the
+        evaluation dataset.
+    true_statuses : list[bool]
+        A list of true diagnoses for each observation in the
+        evaluation dataset.
+    metric : str, optional
+        One of "acc", "fnr", "fpr", "for" or "fdr". Default is "acc".
+    kind : str, optional
+        "diff" for absolute differences (default) or "ratio" for the larger
+        rate over the smaller.
+    natural_log : bool, optional
+        If True, ratios are returned as natural logarithms. Default is True.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
+
+    Returns
+    -------
+    pd.DataFrame
+        Symmetric matrix indexed by group label on both axes, in first-seen
+        order. Entries are np.nan where either group's rate is undefined,
+        and for ratios where either rate is 0.
+    """
+    table = GroupCounts.from_labels(subject_labels=subject_labels,
+                                    predictions=predictions,
+                                    true_statuses=true_statuses,
+                                    sample_weight=sample_weight)
+
+    return pd.DataFrame(table.pairwise(metric, kind, natural_log),
+                        index=table.labels, columns=table.labels)
+
+
+def pairwise_intersect_metric(subject_labels_dict, predictions,
+                              true_statuses, metric="acc", kind="diff",
+                              natural_log=True, sparse=False, n_jobs=1,
+                              chunk_size=None, sample_weight=None):
+    """
+    Compare a rate between every pair of intersectional groups.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : list[bool]
+        A list of predicted diagnoses for each observation in the
+        evaluation dataset.
+    true_statuses : list[bool]
+        A list of true diagnoses for each observation in the
+        evaluation dataset.
+    metric : str, optional
+        One of "acc", "fnr", "fpr", "for" or "fdr". Default is "acc".
+    kind : str, optional
+        "diff" for absolute differences (default) or "ratio" for the larger
+        rate over the smaller.
+    natural_log : bool, optional
+        If True, ratios are returned as natural logarithms. Default is True.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included. Default is False.
+    n_jobs : int or None, optional
+        Number of worker processes that count chunks of rows in parallel
+        (see `fairness.parallel`). None uses every CPU. Default is 1
+        (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1. Default splits the rows
+        evenly between the workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation (e.g. survey weights); counts become
+        sums of weights. Default is None (every observation counts once).
+
+    Returns
+    -------
+    pd.DataFrame
+        Symmetric matrix indexed on both axes by the intersectional group
+        names of the all_intersect_* functions.
+    """
+    table = parallel_intersect_counts(
+                subject_labels_dict=subject_labels_dict,
+                predictions=predictions,
+                true_statuses=true_statuses,
+                sparse=sparse,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                sample_weight=sample_weight)
+    names = table.names()
+
+    return pd.DataFrame(pairwise_rates(table.rates(metric), kind, natural_log),
+                        index=names, columns=names)
@@ -0,0 +1,544 @@
+"""
+fairness.multiclass
+===================
+
+Intersectional fairness metrics for multiclass and multilabel models.
+
+The functions in `fairness.metrics` assume a boolean positive class, so a
+K-class model would otherwise be evaluated one-vs-rest with a rescan of the
+data per class. `multiclass_intersect_counts` instead counts every
+(cell, true class, predicted class) triple with a single `np.bincount`,
+giving a K x K confusion matrix per intersectional cell. The one-vs-rest
+(tn, fp, fn, tp) counts of every class follow from its row and column sums,
+so per-class FNR/FPR/FOR/FDR reuse `fairness.counts.rates_from_counts`.
+
+`multilabel_intersect_counts` does the same for L independent binary
+labels, counting every (cell, label, outcome) triple in one pass.
+
+Both tables report per-class rates, or aggregates over classes:
+
+- "macro" averages the per-class rates of each cell, leaving out classes
+  whose rate is undefined in that cell;
+- "micro" sums the one-vs-rest counts over classes before taking the rate.
+
+`to_dict` returns the same {group name: rate} mapping as the
+`all_intersect_*` functions, and `class_table` returns the one-vs-rest
+`fairness.counts.IntersectCounts` of one class, so existing helpers such as
+`fairness.resampling.bootstrap_counts` apply per class.
+
+Typical usage
+-------------
+>>> from fairness.multiclass import multiclass_intersect_counts
+>>> table = multiclass_intersect_counts(subject_labels_dict, y_pred, y_true)
+>>> table.to_dict("fnr", average="macro")
+>>> table.class_table("urgent").to_dict("fnr")
+>>> table.max_diff("fpr")            # one value per class
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .counts import (IntersectCounts, cell_index, check_sample_weight,
+                     encode_categories, encode_levels, factorize_labels,
+                     max_diff_and_ratio, rate_terms, rates_from_counts)
+
+AVERAGES = ("macro", "micro")
+
+
+def _check_average(average: Optional[str]) -> None:
+    if average is not None and average not in AVERAGES:
+        raise ValueError(
+            f"Unknown average '{average}'. Supported: None, {list(AVERAGES)}"
+        )
+
+
+def class_codes(predictions, true_statuses,
+                classes: Optional[Sequence] = None
+                ) -> tuple[np.ndarray, np.ndarray, list]:
+    """
+    Code predicted and true class labels against a common list of classes.
+
+    Parameters
+    ----------
+    predictions : array-like
+        Predicted class of each observation.
+    true_statuses : array-like
+        True class of each observation.
+    classes : Sequence or None, optional
+        The classes, in the order used for the class axis. Default is the
+        sorted union of the predicted and true labels.
+
+    Returns
+    -------
+    y_pred : np.ndarray
+        int64 class code of each prediction.
+    y_true : np.ndarray
+        int64 class code of each true label.
+    classes : list
+        The label of each class code.
+
+    Raises
+    ------
+    ValueError
+        If the inputs differ in length, or contain missing labels or
+        labels not in classes.
+    """
+    predictions = np.asarray(predictions)
+    true_statuses = np.asarray(true_statuses)
+    if predictions.shape != true_statuses.shape or predictions.ndim != 1:
+        raise ValueError(
+            "predictions and true_statuses must be 1-D and of the same "
+            f"length. Got shapes {predictions.shape} and "
+            f"{true_statuses.shape}."
+        )
+
+    if classes is None:
+        _, classes = factorize_labels(
+            np.concatenate([true_statuses, predictions]), sort=True)
+    classes = list(classes)
+
+    y_pred = encode_levels(predictions, classes)
+    y_true = encode_levels(true_statuses, classes)
+    if (y_pred < 0).any() or (y_true < 0).any():
+        raise ValueError(
+            "predictions and true_statuses must only contain labels from "
+            f"classes {classes}."
+        )
+    return y_pred, y_true, classes
+
+
+def multiclass_confusion(row_cells: np.ndarray, n_cells: int,
+                         y_true: np.ndarray, y_pred: np.ndarray,
+                         n_classes: int,
+                         sample_weight: Optional[np.ndarray] = None
+                         ) -> np.ndarray:
+    """
+    Count (cell, true class, predicted class) triples in one pass.
+
+    Parameters
+    ----------
+    row_cells : np.ndarray
+        Cell index of every row (-1 rows are ignored).
+    n_cells : int
+        Number of cells.
+    y_true, y_pred : np.ndarray
+        Class code of every row, in ``[0, n_classes)``.
+    n_classes : int
+        Number of classes.
+    sample_weight : np.ndarray or None, optional
+        Weight of each observation. If given, the counts are float sums of
+        weights.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_cells, n_classes, n_classes); entry [c, i, j]
+        counts observations of cell c with true class i predicted as j.
+    """
+    keep = row_cells >= 0
+    if not keep.all():
+        row_cells, y_true, y_pred = row_cells[keep], y_true[keep], \
+            y_pred[keep]
+        if sample_weight is not None:
+            sample_weight = sample_weight[keep]
+
+    index = (row_cells * n_classes + y_true) * n_classes + y_pred
+    flat = np.bincount(index, weights=sample_weight,
+                       minlength=n_cells * n_classes * n_classes)
+    return flat.reshape(n_cells, n_classes, n_classes)
+
+
+def one_vs_rest_counts(confusion: np.ndarray) -> np.ndarray:
+    """
+    Turn K x K confusion matrices into per-class binary confusion counts.
+
+    Parameters
+    ----------
+    confusion : np.ndarray
+        Array of shape (..., K, K) with true classes on the second-to-last
+        axis and predicted classes on the last.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (..., K, 4) with columns (tn, fp, fn, tp), where
+        class k is the positive class of row k.
+    """
+    tp = np.diagonal(confusion, axis1=-2, axis2=-1)
+    fn = confusion.sum(axis=-1) - tp
+    fp = confusion.sum(axis=-2) - tp
+    tn = confusion.sum(axis=(-2, -1))[..., None] - tp - fn - fp
+    return np.stack([tn, fp, fn, tp], axis=-1)
+
+
+class _ClassRates:
+    """
+    Rates of a table with one-vs-rest counts of shape (n_cells, K, 4).
+
+    Subclasses provide categories, levels, cells, classes and counts.
+    """
+
+    def class_table(self, class_label) -> IntersectCounts:
+        """
+        Return the one-vs-rest table of one class.
+
+        Raises
+        ------
+        KeyError
+            If class_label is not one of the classes.
+        """
+        if class_label not in self.classes:
+            raise KeyError(class_label)
+        k = self.classes.index(class_label)
+        return IntersectCounts(categories=self.categories, levels=self.levels,
+                               cells=self.cells, counts=self.counts[:, k])
+
+    def names(self) -> list[str]:
+        """
+        Return the name of each cell, formatted as "label1 + label2 + ...".
+        """
+        return IntersectCounts(categories=self.categories, levels=self.levels,
+                               cells=self.cells,
+                               counts=np.zeros((len(self.cells), 4))).names()
+
+    def _kept_rates(self, metric: str, min_support: Optional[int]
+                    ) -> tuple[np.ndarray, np.ndarray]:
+        rates = rates_from_counts(self.counts, metric)
+        if min_support is None:
+            return rates, ~np.isnan(rates)
+        _, denom = rate_terms(self.counts, metric)
+        return rates, denom >= max(min_support, 1)
+
+    def rates(self, metric: str, average: Optional[str] = None,
+              min_support: Optional[int] = None) -> np.ndarray:
+        """
+        Return the given rate of every cell.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+        average : str or None, optional
+            None (default) for per-class rates, "macro" for the mean of the
+            per-class rates of each cell, or "micro" for the rate of the
+            one-vs-rest counts summed over classes.
+        min_support : int or None, optional
+            With "macro", classes with fewer than min_support observations
+            in the rate's denominator are left out of a cell's average.
+            Ignored otherwise.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_cells, n_classes) without an average, and of
+            shape (n_cells,) with one; np.nan where undefined.
+        """
+        _check_average(average)
+        if average is None:
+            return rates_from_counts(self.counts, metric)
+        if average == "micro":
+            return rates_from_counts(self.counts.sum(axis=1), metric)
+
+        rates, keep = self._kept_rates(metric, min_support)
+        with warnings.catch_warnings():
+            # cells with no defined class give an all-NaN slice
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmean(np.where(keep, rates, np.nan), axis=1)
+
+    def to_dict(self, metric: str, average: str = "macro") -> dict:
+        """
+        Return a dict mapping each cell name to its averaged rate, in the
+        format of the `all_intersect_*` functions.
+        """
+        if average is None:
+            raise ValueError(
+                "to_dict needs an average; use class_table(label).to_dict() "
+                "for the rates of one class."
+            )
+        return dict(zip(self.names(), self.rates(metric, average).tolist()))
+
+    def to_frame(self, metric: str) -> pd.DataFrame:
+        """
+        Return the per-class rates as a DataFrame with one row per
+        intersectional group and one column per class.
+        """
+        return pd.DataFrame(self.rates(metric), index=self.names(),
+                            columns=self.classes)
+
+    def _max_diff_and_ratio(self, metric: str, average: Optional[str],
+                            min_support: Optional[int], natural_log: bool):
+        _check_average(average)
+        if average is None:
+            _, max_diff, max_ratio = max_diff_and_ratio(
+                self.counts.transpose(1, 0, 2), metric, min_support,
+                natural_log)
+            return max_diff, max_ratio
+        if average == "micro":
+            _, max_diff, max_ratio = max_diff_and_ratio(
+                self.counts.sum(axis=1)[None], metric, min_support,
+                natural_log)
+            return float(max_diff[0]), float(max_ratio[0])
+
+        rates = self.rates(metric, "macro", min_support)
+        if min_support is not None:
+            rates = rates[~np.isnan(rates)]
+        if len(rates) == 0 or np.isnan(rates).any():
+            return np.nan, np.nan
+        high, low = rates.max(), rates.min()
+        max_ratio = high / low if low > 0 else np.nan
+        if natural_log is True:
+            max_ratio = np.log(max_ratio)
+        return float(high - low), float(max_ratio)
+
+    def max_diff(self, metric: str, average: Optional[str] = None,
+                 min_support: Optional[int] = None):
+        """
+        Return the maximum difference in a rate across intersectional
+        groups.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+        average : str or None, optional
+            None (default) for one value per class, or "macro" / "micro"
+            (see `rates`) for a single value.
+        min_support : int or None, optional
+            See `fairness.metrics.max_intersect_acc_diff`. With "macro",
+            also drops unsupported classes from each cell's average.
+
+        Returns
+        -------
+        np.ndarray or float
+            Array of shape (n_classes,) without an average; a float with
+            one. np.nan follows `max_intersect_*_diff`.
+        """
+        max_diff, _ = self._max_diff_and_ratio(metric, average, min_support,
+                                               True)
+        return max_diff
+
+    def max_ratio(self, metric: str, average: Optional[str] = None,
+                  min_support: Optional[int] = None,
+                  natural_log: bool = True):
+        """
+        Return the maximum ratio of a rate across intersectional groups.
+
+        Parameters are as for `max_diff`; with natural_log (default True)
+        the natural log of the ratio is returned.
+        """
+        _, max_ratio = self._max_diff_and_ratio(metric, average, min_support,
+                                                natural_log)
+        return max_ratio
+
+
+@dataclass(frozen=True)
+class MulticlassCounts(_ClassRates):
+    """
+    Per-cell K x K confusion matrices for intersectional groups.
+
+    Attributes
+    ----------
+    categories:
+        Category names in sorted order.
+    levels:
+        Sorted unique labels of each category.
+    cells:
+        Array of shape (n_cells, len(categories)) of level codes, as in
+        `fairness.counts.IntersectCounts`.
+    classes:
+        The label of each class.
+    confusion:
+        Array of shape (n_cells, n_classes, n_classes) of counts of true
+        class (rows) by predicted class (columns).
+    """
+
+    categories: tuple
+    levels: tuple
+    cells: np.ndarray
+    classes: list
+    confusion: np.ndarray
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        One-vs-rest counts of shape (n_cells, n_classes, 4) with columns
+        (tn, fp, fn, tp).
+        """
+        return one_vs_rest_counts(self.confusion)
+
+    def accuracy(self) -> np.ndarray:
+        """
+        Return the multiclass accuracy (share of observations predicted as
+        their true class) of every cell; np.nan for empty cells.
+        """
+        correct = np.trace(self.confusion, axis1=1, axis2=2)
+        total = self.confusion.sum(axis=(1, 2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(total > 0, correct / np.where(total > 0, total, 1),
+                            np.nan).astype(float)
+
+
+@dataclass(frozen=True)
+class MultilabelCounts(_ClassRates):
+    """
+    Per-cell binary confusion counts of several labels.
+
+    Attributes
+    ----------
+    categories:
+        Category names in sorted order.
+    levels:
+        Sorted unique labels of each category.
+    cells:
+        Array of shape (n_cells, len(categories)) of level codes, as in
+        `fairness.counts.IntersectCounts`.
+    classes:
+        The name of each label.
+    counts:
+        Array of shape (n_cells, n_labels, 4) with columns
+        (tn, fp, fn, tp).
+    """
+
+    categories: tuple
+    levels: tuple
+    cells: np.ndarray
+    classes: list
+    counts: np.ndarray
+
+
+def multiclass_intersect_counts(subject_labels_dict: dict,
+                                predictions: Sequence,
+                                true_statuses: Sequence, *,
+                                classes: Optional[Sequence] = None,
+                                sparse: bool = False,
+                                sample_weight: Optional[Sequence] = None
+                                ) -> MulticlassCounts:
+    """
+    Build per-cell multiclass confusion matrices in one pass.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like
+        Predicted class of each observation.
+    true_statuses : array-like
+        True class of each observation.
+    classes : Sequence or None, optional
+        The classes, in order. Default is the sorted union of the predicted
+        and true labels.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included. Default is False.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; counts become sums of weights.
+
+    Returns
+    -------
+    MulticlassCounts
+        The per-cell confusion matrices.
+
+    Raises
+    ------
+    ValueError
+        If the inputs differ in length, or a label is missing or not in
+        classes.
+    """
+    y_pred, y_true, classes = class_codes(predictions, true_statuses, classes)
+    weights = check_sample_weight(sample_weight, len(y_true))
+    categories, levels, codes = encode_categories(subject_labels_dict,
+                                                  len(y_true))
+    cells, row_cells = cell_index(levels, codes, len(y_true), sparse=sparse)
+    return MulticlassCounts(
+        categories=categories, levels=levels, cells=cells, classes=classes,
+        confusion=multiclass_confusion(row_cells, len(cells), y_true, y_pred,
+                                       len(classes), weights))
+
+
+def _as_label_matrix(values, name: str) -> np.ndarray:
+    matrix = np.asarray(values)
+    if matrix.ndim != 2:
+        raise ValueError(
+            f"{name} must be 2-D (observations x labels). "
+            f"Got shape {matrix.shape}."
+        )
+    return matrix.astype(bool)
+
+
+def multilabel_intersect_counts(subject_labels_dict: dict,
+                                predictions, true_statuses, *,
+                                labels: Optional[Sequence] = None,
+                                sparse: bool = False,
+                                sample_weight: Optional[Sequence] = None
+                                ) -> MultilabelCounts:
+    """
+    Build per-cell confusion counts of every label in one pass.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like of bool
+        Indicator matrix of shape (n_samples, n_labels) of predicted labels.
+    true_statuses : array-like of bool
+        Indicator matrix of the same shape of true labels.
+    labels : Sequence or None, optional
+        Name of each label. Default is the columns of true_statuses if it is
+        a DataFrame, and 0, 1, ... otherwise.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included. Default is False.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; counts become sums of weights.
+
+    Returns
+    -------
+    MultilabelCounts
+        The per-cell, per-label confusion counts.
+
+    Raises
+    ------
+    ValueError
+        If the indicator matrices differ in shape or do not match labels.
+    """
+    if labels is None and isinstance(true_statuses, pd.DataFrame):
+        labels = true_statuses.columns.tolist()
+    y_pred = _as_label_matrix(predictions, "predictions")
+    y_true = _as_label_matrix(true_statuses, "true_statuses")
+    if y_pred.shape != y_true.shape:
+        raise ValueError(
+            "predictions and true_statuses must have the same shape. "
+            f"Got {y_pred.shape} and {y_true.shape}."
+        )
+    n_samples, n_labels = y_true.shape
+    labels = list(range(n_labels)) if labels is None else list(labels)
+    if len(labels) != n_labels:
+        raise ValueError(
+            f"Got {len(labels)} label names for {n_labels} labels."
+        )
+
+    weights = check_sample_weight(sample_weight, n_samples)
+    categories, levels, codes = encode_categories(subject_labels_dict,
+                                                  n_samples)
+    cells, row_cells = cell_index(levels, codes, n_samples, sparse=sparse)
+
+    # (cell, label, outcome) code of every (row, label) pair.
+    outcomes = (y_true.astype(np.int64) << 1) | y_pred
+    index = (row_cells[:, None] * n_labels + np.arange(n_labels)) * 4 \
+        + outcomes
+    keep = np.broadcast_to((row_cells >= 0)[:, None], index.shape)
+    if weights is not None:
+        weights = np.broadcast_to(weights[:, None], index.shape)[keep]
+    flat = np.bincount(index[keep], weights=weights,
+                       minlength=len(cells) * n_labels * 4)
+    return MultilabelCounts(categories=categories, levels=levels,
+                            cells=cells, classes=labels,
+                            counts=flat.reshape(len(cells), n_labels, 4))
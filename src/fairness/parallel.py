@@ -0,0 +1,227 @@
+"""
+fairness.parallel
+=================
+
+Multi-process counting of intersectional confusion tables.
+
+A single vectorized pass over the rows (see `fairness.counts`) runs on one
+core. For very large evaluation sets, `parallel_intersect_counts` splits
+that pass in two:
+
+- serially, in the calling process: the labels of each category are
+  factorized once into integer level codes with `encode_categories`, and
+  the level codes and outcome codes are copied into shared memory;
+- in parallel: a `ProcessPoolExecutor` combines the codes of each chunk of
+  rows into cells and counts them with `np.bincount`. The partial tables
+  are then summed (dense) or merged with `fairness.counts.merge_counts`
+  (sparse).
+
+Only the second step scales with n_jobs. The labels arrive as Python
+objects in the calling process, and factorizing them there avoids pickling
+them to the workers, but it bounds the speed-up when factorizing dominates,
+e.g. with many categories of string labels. Counts are integers, so the
+result is identical to the serial path; weighted counts can differ from it
+in the last bits, since the chunks are summed in a different order.
+
+The `all_intersect_*` and `max_intersect_*` functions of `fairness.metrics`
+use this when called with n_jobs other than 1.
+
+Typical usage
+-------------
+>>> from fairness.metrics import all_intersect_fprs
+>>> all_intersect_fprs(subject_labels_dict, y_pred, y_true, n_jobs=4)
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Sequence
+import math
+import os
+
+import numpy as np
+
+from .counts import (IntersectCounts, check_sample_weight, confusion_counts,
+                     encode_categories, merge_counts, mixed_radix_codes,
+                     observed_cells, outcome_codes)
+
+
+def resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """
+    Turn an n_jobs argument into a number of worker processes.
+
+    None means every available CPU and negative values count back from it
+    (-1 is every CPU, -2 all but one, ...).
+
+    Raises
+    ------
+    ValueError
+        If n_jobs is 0.
+    """
+    n_cpus = os.cpu_count() or 1
+    if n_jobs is None:
+        return n_cpus
+    if n_jobs == 0:
+        raise ValueError("n_jobs must not be 0.")
+    if n_jobs < 0:
+        return max(n_cpus + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def _chunk_bounds(n_samples: int, n_jobs: int,
+                  chunk_size: Optional[int]) -> list[tuple[int, int]]:
+    if chunk_size is None:
+        chunk_size = math.ceil(n_samples / n_jobs)
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1. Got {chunk_size}.")
+    return [(start, min(start + chunk_size, n_samples))
+            for start in range(0, n_samples, chunk_size)]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a block created by the parent process, which owns and
+    unlinks it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument; pool workers share the
+        # parent's resource tracker, so registering the block again is
+        # harmless.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _count_chunk(shm_name: str, block_shape: tuple, dtype: str, start: int,
+                 stop: int, shape: tuple, sparse: bool,
+                 weights_name: Optional[str] = None):
+    """
+    Count one chunk of rows held in shared memory.
+
+    Returns (cells, counts) for sparse tables and (None, counts) for dense
+    ones.
+    """
+    shm = _attach(shm_name)
+    try:
+        block = np.ndarray(block_shape, dtype=dtype, buffer=shm.buf)
+        codes = [block[j, start:stop].astype(np.int64)
+                 for j in range(len(shape))]
+        outcomes = block[-1, start:stop].astype(np.int8)
+        del block
+    finally:
+        shm.close()
+
+    weights = None
+    if weights_name is not None:
+        weights_shm = _attach(weights_name)
+        try:
+            weights = np.ndarray((block_shape[1],), dtype=np.float64,
+                                 buffer=weights_shm.buf)[start:stop].copy()
+        finally:
+            weights_shm.close()
+
+    if sparse:
+        cells, row_cells = observed_cells(codes, shape)
+        return cells, confusion_counts(row_cells, outcomes, len(cells),
+                                       weights)
+
+    n_cells = int(np.prod(shape, dtype=np.int64))
+    return None, confusion_counts(mixed_radix_codes(codes, shape), outcomes,
+                                  n_cells, weights)
+
+
+def parallel_intersect_counts(subject_labels_dict: dict,
+                              predictions: Sequence,
+                              true_statuses: Sequence, *,
+                              sparse: bool = False,
+                              n_jobs: Optional[int] = None,
+                              chunk_size: Optional[int] = None,
+                              sample_weight: Optional[Sequence] = None
+                              ) -> IntersectCounts:
+    """
+    Build the table of intersectional cells with several processes.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    sparse : bool, optional
+        See `fairness.counts.IntersectCounts.from_labels`.
+    n_jobs : int or None, optional
+        Number of worker processes; see `resolve_n_jobs`. With 1 the table
+        is built serially in this process. Default is None (every CPU).
+    chunk_size : int or None, optional
+        Rows counted per task. Default splits the rows evenly between the
+        workers.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; shared with the workers in a separate
+        float64 block.
+
+    Returns
+    -------
+    IntersectCounts
+        The same table as `IntersectCounts.from_labels`.
+    """
+    n_jobs = resolve_n_jobs(n_jobs)
+    outcomes = outcome_codes(predictions, true_statuses)
+    weights = check_sample_weight(sample_weight, len(outcomes))
+    categories, levels, codes = encode_categories(subject_labels_dict,
+                                                  len(outcomes))
+
+    if n_jobs == 1 or not categories or len(outcomes) == 0:
+        return IntersectCounts.from_codes(categories, levels, codes,
+                                          outcomes, sparse=sparse,
+                                          sample_weight=weights)
+
+    shape = tuple(len(category_levels) for category_levels in levels)
+    bounds = _chunk_bounds(len(outcomes), n_jobs, chunk_size)
+
+    # One row per category plus the outcome codes.
+    dtype = np.dtype(np.int32 if max(shape) < 2 ** 31 else np.int64)
+    block_shape = (len(codes) + 1, len(outcomes))
+    shm = shared_memory.SharedMemory(
+        create=True, size=int(np.prod(block_shape)) * dtype.itemsize)
+    weights_shm = None
+    try:
+        block = np.ndarray(block_shape, dtype=dtype, buffer=shm.buf)
+        for j, category_codes in enumerate(codes):
+            block[j] = category_codes
+        block[-1] = outcomes
+        del block
+
+        if weights is not None:
+            weights_shm = shared_memory.SharedMemory(create=True,
+                                                     size=weights.nbytes)
+            np.ndarray(weights.shape, dtype=np.float64,
+                       buffer=weights_shm.buf)[:] = weights
+        weights_name = None if weights_shm is None else weights_shm.name
+
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(bounds))) as pool:
+            futures = [pool.submit(_count_chunk, shm.name, block_shape,
+                                   dtype.str, start, stop, shape, sparse,
+                                   weights_name)
+                       for start, stop in bounds]
+            parts = [future.result() for future in futures]
+    finally:
+        for block_shm in (shm, weights_shm):
+            if block_shm is not None:
+                block_shm.close()
+                block_shm.unlink()
+
+    if sparse:
+        return merge_counts([
+            IntersectCounts(categories=categories, levels=levels,
+                            cells=cells, counts=counts)
+            for cells, counts in parts])
+
+    n_cells = int(np.prod(shape, dtype=np.int64))
+    return IntersectCounts(
+        categories=categories, levels=levels,
+        cells=np.stack(np.unravel_index(np.arange(n_cells), shape), axis=1),
+        counts=sum(counts for _, counts in parts))
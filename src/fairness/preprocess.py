@@ -8,6 +8,8 @@ This module includes:
 - feature engineering (e.g., binning age into age_group)
 - converting raw tabular data into numeric features suitable for ML
 - producing reproducible train/test splits while preserving indices
+- reweighing training rows so that labels are independent of protected
+  groups (a bias-mitigation pre-processor)
 
 Design notes
 ------------
@@ -28,6 +30,9 @@ Typical usage
 >>> df_model = preprocess_tabular(df)
 >>> split = make_train_test_split(df_model, target_col="HeartDisease",
                                   drop_cols=("age_group",))
+>>> weights = Reweighing(["Sex", "age_group"], "HeartDisease").fit_transform(
+...     df.loc[split.X_train.index])
+>>> model.fit(split.X_train, split.y_train, clf__sample_weight=weights)
 """
 
 from __future__ import annotations
@@ -35,9 +40,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Callable, Mapping, Sequence
 
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from .counts import (encode_levels, factorize_labels, mixed_radix_codes,
+                     observed_cells)
+
 
 @dataclass(frozen=True)
 class SplitData:
@@ -294,3 +303,159 @@ def make_train_test_split(
 
     return SplitData(X_train=X_train, X_test=X_test,
                      y_train=y_train, y_test=y_test)
+
+
+# ---------------------------------------------------------------------
+# Bias mitigation
+# ---------------------------------------------------------------------
+
+
+class Reweighing:
+    """
+    Reweigh rows so that the label is independent of the protected groups.
+
+    Each (intersectional group, label) cell gets the weight
+
+        n_group * n_label / (N * n_group_label)
+
+    i.e. the count expected if group and label were independent, divided by
+    the observed count (Kamiran & Calders, 2012). Under-represented
+    combinations, such as positive labels in a group where they are rare,
+    are weighted up.
+
+    Weights are learned with `fit` and applied to any DataFrame with the
+    same columns with `transform`, so weights fitted on the training rows
+    can be reused on new data. Cells not seen during fit, and rows with a
+    missing protected value or label, get weight 1.0. Both steps encode the
+    rows with one pass of integer codes, with no per-row Python work.
+
+    Parameters
+    ----------
+    protected_cols:
+        Columns defining the intersectional groups.
+    target_col:
+        Label column.
+
+    Attributes
+    ----------
+    levels_:
+        Sorted unique values of each protected column and of the label,
+        set by `fit`.
+    weights_:
+        DataFrame with one row per observed (group, label) cell, the
+        protected columns, the label and a "weight" column, set by `fit`.
+
+    Examples
+    --------
+    Fit on the training rows only: weights fitted on the whole dataset
+    leak the test labels into training.
+
+    >>> weights = Reweighing(["Sex", "age_group"], "HeartDisease") \
+    ...     .fit_transform(df_fair.loc[split.X_train.index])
+    >>> model.fit(split.X_train, split.y_train, clf__sample_weight=weights)
+
+    `run_demo_pipeline` does the split itself, so give it the bound
+    fit_transform and it fits the weights on the training rows:
+
+    >>> rw = Reweighing(["Sex", "age_group"], "HeartDisease")
+    >>> run_demo_pipeline(..., sample_weight=rw.fit_transform)
+    """
+
+    def __init__(self, protected_cols: Sequence[str], target_col: str):
+        self.protected_cols = list(protected_cols)
+        self.target_col = target_col
+
+    def _columns(self, df: pd.DataFrame) -> list[str]:
+        columns = [*self.protected_cols, self.target_col]
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+        return columns
+
+    def fit(self, df: pd.DataFrame) -> "Reweighing":
+        """
+        Learn the weight of every (group, label) cell.
+
+        Parameters
+        ----------
+        df:
+            Training dataset with the protected and target columns.
+
+        Returns
+        -------
+        Reweighing
+            The fitted instance.
+
+        Raises
+        ------
+        ValueError
+            If a column is missing or df has no complete rows.
+        """
+        columns = self._columns(df)
+        codes, levels = zip(*(factorize_labels(df[col], sort=True)
+                              for col in columns))
+        shape = tuple(len(col_levels) for col_levels in levels)
+        if 0 in shape:
+            raise ValueError("df has no rows with every column present.")
+
+        cells, row_cells = observed_cells(list(codes), shape)
+        n_cell = np.bincount(row_cells[row_cells >= 0],
+                             minlength=len(cells))
+
+        # the label is the last column, so its code varies fastest
+        group_codes = np.ravel_multi_index(tuple(cells[:, :-1].T),
+                                           shape[:-1])
+        _, group_index = np.unique(group_codes, return_inverse=True)
+        n_group = np.bincount(group_index.ravel(), weights=n_cell)
+        n_label = np.bincount(cells[:, -1], weights=n_cell,
+                              minlength=shape[-1])
+
+        weights = (n_group[group_index.ravel()] * n_label[cells[:, -1]]
+                   / (n_cell.sum() * n_cell))
+
+        self.levels_ = levels
+        self._cell_codes = np.ravel_multi_index(tuple(cells.T), shape)
+        self._weights = weights
+        self.weights_ = pd.DataFrame(
+            {col: [col_levels[code] for code in cells[:, j]]
+             for j, (col, col_levels) in enumerate(zip(columns, levels))})
+        self.weights_["weight"] = weights
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Return the weight of every row.
+
+        Parameters
+        ----------
+        df:
+            Dataset with the protected and target columns.
+
+        Returns
+        -------
+        pd.Series
+            Float weights indexed like df.
+
+        Raises
+        ------
+        ValueError
+            If the instance is not fitted or a column is missing.
+        """
+        if not hasattr(self, "levels_"):
+            raise ValueError("Reweighing is not fitted; call fit first.")
+
+        columns = self._columns(df)
+        codes = [encode_levels(df[col], col_levels)
+                 for col, col_levels in zip(columns, self.levels_)]
+        shape = tuple(len(col_levels) for col_levels in self.levels_)
+        row_codes = mixed_radix_codes(codes, shape)
+
+        pos = np.searchsorted(self._cell_codes, row_codes)
+        pos = np.minimum(pos, len(self._cell_codes) - 1)
+        found = (row_codes >= 0) & (self._cell_codes[pos] == row_codes)
+        return pd.Series(np.where(found, self._weights[pos], 1.0),
+                         index=df.index, name="weight")
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.Series:
+        """Fit on df and return its row weights."""
+        return self.fit(df).transform(df)
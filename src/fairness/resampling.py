@@ -0,0 +1,704 @@
+"""
+fairness.resampling
+===================
+
+Bootstrap confidence intervals for intersectional metrics, and permutation
+tests for differences between two groups.
+
+Resampling the rows of the evaluation set with replacement only changes how
+many observations fall into each (cell, outcome) bucket of the confusion
+table. Instead of copying rows, the replicate tables are drawn directly from
+the per-cell counts:
+
+- "multinomial": N draws over the C x 4 buckets with probabilities
+  count / N, which is exactly the classical row bootstrap;
+- "poisson": every bucket count is replaced by a Poisson(count) draw, the
+  Poisson bootstrap (each row gets a Poisson(1) weight).
+
+Replicates are generated in batches as (batch, C, 4) arrays, and the rates
+and max diff/ratio of a whole batch are computed with array operations.
+Batches can run in several processes; each batch has its own seed derived
+from random_state, so results do not depend on n_jobs.
+
+`permutation_test_group_diff` tests whether a `group_*_diff` gap is larger
+than expected if the two groups' labels were exchangeable. Shuffling the
+labels of the pooled rows only changes how many of each outcome land in
+group A, which follows a multivariate hypergeometric distribution over the
+pooled (tn, fp, fn, tp) counts. Permuted tables are drawn from it in
+batches, and sampling stops early once a Hoeffding bound shows the p-value
+is clearly above or below alpha.
+
+Both shortcuts need the table to hold row counts. A table of summed sample
+weights says nothing about how many rows stand behind each bucket, so
+`bootstrap_counts` and `permutation_test_counts` reject float counts. With
+sample_weight, `bootstrap_intersect` and `permutation_test_group_diff`
+resample the rows themselves instead, carrying each row's weight.
+
+Typical usage
+-------------
+>>> from fairness.resampling import bootstrap_intersect
+>>> result = bootstrap_intersect(subject_labels_dict, y_pred, y_true, "fnr",
+...                              n_boot=2000, sparse=True, random_state=0)
+>>> result.max_diff, result.max_diff_interval
+>>> result.to_dict()["F + older"]
+>>> test = permutation_test_group_diff("F|older", "M|older", subject_labels,
+...                                    y_pred, y_true, "fpr", random_state=0)
+>>> test.p_value
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import math
+import warnings
+
+import numpy as np
+
+from .counts import (GroupCounts, IntersectCounts, cell_index,
+                     check_sample_weight, confusion_counts, encode_categories,
+                     factorize_labels, max_diff_and_ratio, outcome_codes,
+                     rates_from_counts)
+from .parallel import resolve_n_jobs
+
+BOOTSTRAP_METHODS = ("multinomial", "poisson")
+
+
+@dataclass(frozen=True)
+class BootstrapResult:
+    """
+    Point estimates, percentile intervals and replicates of a bootstrap.
+
+    Attributes
+    ----------
+    metric:
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+    confidence:
+        Confidence level of the intervals, e.g. 0.95.
+    names:
+        Intersectional group names, as keys of `all_intersect_*`.
+    rates:
+        Rate of each group on the original data.
+    rate_intervals:
+        Array of shape (n_groups, 2) with the lower and upper bounds.
+    max_diff, max_ratio:
+        `max_intersect_*_diff` and `max_intersect_*_ratio` on the original
+        data.
+    max_diff_interval, max_ratio_interval:
+        (lower, upper) bounds of the max diff and max ratio.
+    rate_samples:
+        Array of shape (n_boot, n_groups) of replicate rates.
+    max_diff_samples, max_ratio_samples:
+        Arrays of shape (n_boot,) of replicate max diffs and ratios.
+
+    Notes
+    -----
+    Replicates where a value is undefined (np.nan) are left out of its
+    interval.
+    """
+
+    metric: str
+    confidence: float
+    names: list
+    rates: np.ndarray
+    rate_intervals: np.ndarray
+    max_diff: float
+    max_diff_interval: tuple
+    max_ratio: float
+    max_ratio_interval: tuple
+    rate_samples: np.ndarray
+    max_diff_samples: np.ndarray
+    max_ratio_samples: np.ndarray
+
+    def to_dict(self) -> dict:
+        """
+        Return a dict mapping each group name to (rate, lower, upper).
+        """
+        return {name: (rate, lower, upper) for name, rate, (lower, upper)
+                in zip(self.names, self.rates.tolist(),
+                       self.rate_intervals.tolist())}
+
+
+@dataclass(frozen=True)
+class PermutationResult:
+    """
+    Outcome of a permutation test of a group rate difference.
+
+    Attributes
+    ----------
+    metric:
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+    statistic:
+        Observed absolute difference, as returned by `group_*_diff`.
+    p_value:
+        (1 + number of permutations at least as extreme) /
+        (1 + number of permutations). np.nan if the statistic is undefined.
+    n_permutations:
+        Number of permutations with a defined statistic that were used.
+    stopped_early:
+        True if sampling stopped before the requested number of
+        permutations because the p-value was clearly above or below alpha.
+    alpha:
+        Significance level used for early stopping.
+    """
+
+    metric: str
+    statistic: float
+    p_value: float
+    n_permutations: int
+    stopped_early: bool
+    alpha: float
+
+    @property
+    def significant(self) -> bool:
+        """Whether p_value is below alpha."""
+        return bool(self.p_value < self.alpha)
+
+
+def replicate_counts(counts: np.ndarray, n_rep: int,
+                     rng: np.random.Generator,
+                     method: str = "multinomial") -> np.ndarray:
+    """
+    Draw bootstrap replicates of a confusion table.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Array of shape (n_cells, 4) of confusion counts.
+    n_rep : int
+        Number of replicates.
+    rng : numpy.random.Generator
+        Source of randomness.
+    method : {"multinomial", "poisson"}, optional
+        Resampling scheme, see the module docstring.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_rep, n_cells, 4) of replicate counts.
+
+    Raises
+    ------
+    ValueError
+        If the method is unknown or the counts are not integers.
+    """
+    _check_method(method)
+    counts = _row_counts(counts)
+    if method == "poisson":
+        return rng.poisson(counts, size=(n_rep,) + counts.shape)
+
+    flat = counts.ravel()
+    total = int(flat.sum())
+    if total == 0:
+        return np.zeros((n_rep,) + counts.shape, dtype=np.int64)
+    draws = rng.multinomial(total, flat / total, size=n_rep)
+    return draws.reshape((n_rep,) + counts.shape)
+
+
+def replicate_rows(buckets: np.ndarray, weights: np.ndarray, n_cells: int,
+                   n_rep: int, rng: np.random.Generator,
+                   method: str = "multinomial") -> np.ndarray:
+    """
+    Draw bootstrap replicates of a weighted confusion table by resampling
+    its rows.
+
+    Parameters
+    ----------
+    buckets : np.ndarray
+        ``4 * cell + outcome`` of every row in the table.
+    weights : np.ndarray
+        Weight of every row.
+    n_cells : int
+        Number of cells in the table.
+    n_rep : int
+        Number of replicates.
+    rng : numpy.random.Generator
+        Source of randomness.
+    method : {"multinomial", "poisson"}, optional
+        "multinomial" draws as many rows as there are with replacement;
+        "poisson" gives every row a Poisson(1) multiplicity.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_rep, n_cells, 4) of replicate sums of weights.
+    """
+    _check_method(method)
+    n_rows = len(buckets)
+    replicates = np.empty((n_rep, n_cells * 4))
+    for i in range(n_rep):
+        if method == "poisson":
+            replicates[i] = np.bincount(
+                buckets, weights=weights * rng.poisson(1.0, size=n_rows),
+                minlength=n_cells * 4)
+        else:
+            rows = rng.integers(0, n_rows, size=n_rows)
+            replicates[i] = np.bincount(buckets[rows], weights=weights[rows],
+                                        minlength=n_cells * 4)
+    return replicates.reshape(n_rep, n_cells, 4)
+
+
+def _check_method(method: str):
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(
+            f"Unknown method '{method}'. Supported: {list(BOOTSTRAP_METHODS)}"
+        )
+
+
+def _row_counts(counts) -> np.ndarray:
+    """Return counts as an integer array, rejecting sums of weights."""
+    counts = np.asarray(counts)
+    if counts.dtype.kind not in "iub":
+        raise ValueError(
+            "Resampling a table needs integer row counts; got counts of "
+            f"dtype {counts.dtype}. For weighted observations, pass "
+            "sample_weight to bootstrap_intersect or "
+            "permutation_test_group_diff instead."
+        )
+    return counts.astype(np.int64, copy=False)
+
+
+def _run_batch(counts, n_rep, seed, method, metric, min_support,
+               natural_log):
+    rng = np.random.default_rng(seed)
+    replicates = replicate_counts(counts, n_rep, rng, method)
+    return max_diff_and_ratio(replicates, metric, min_support, natural_log)
+
+
+def _run_row_batch(rows, n_rep, seed, method, metric, min_support,
+                   natural_log):
+    rng = np.random.default_rng(seed)
+    replicates = replicate_rows(*rows, n_rep, rng, method)
+    return max_diff_and_ratio(replicates, metric, min_support, natural_log)
+
+
+def _interval(samples: np.ndarray, confidence: float) -> np.ndarray:
+    alpha = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        # groups undefined in every replicate give an all-NaN slice
+        warnings.simplefilter("ignore", RuntimeWarning)
+        bounds = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+    return np.moveaxis(bounds, 0, -1)
+
+
+def _batch_seeds(random_state, n: int) -> list:
+    """
+    Return n independent seeds derived from random_state.
+
+    A SeedSequence passed in is copied before spawning, since spawning
+    advances its counter, so the same argument always gives the same seeds.
+    """
+    if isinstance(random_state, np.random.SeedSequence):
+        seed_sequence = np.random.SeedSequence(
+            random_state.entropy, spawn_key=random_state.spawn_key,
+            pool_size=random_state.pool_size)
+    else:
+        seed_sequence = np.random.SeedSequence(random_state)
+    return seed_sequence.spawn(n)
+
+
+def bootstrap_counts(table: IntersectCounts, metric: str, *,
+                     n_boot: int = 1000, confidence: float = 0.95,
+                     method: str = "multinomial",
+                     min_support: Optional[int] = None,
+                     natural_log: bool = True,
+                     batch_size: int = 200,
+                     n_jobs: Optional[int] = 1,
+                     random_state=None) -> BootstrapResult:
+    """
+    Bootstrap the intersectional metrics of a confusion table.
+
+    Parameters
+    ----------
+    table : IntersectCounts
+        Per-cell confusion counts, e.g. from `IntersectCounts.from_labels`,
+        `FairnessFrame.intersect_counts` or a streaming accumulator.
+    metric : str
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+    n_boot : int, optional
+        Number of bootstrap replicates (default 1000).
+    confidence : float, optional
+        Confidence level of the percentile intervals (default 0.95).
+    method : {"multinomial", "poisson"}, optional
+        Resampling scheme, see the module docstring.
+    min_support : int or None, optional
+        Passed to the max diff and ratio, see
+        `fairness.counts.max_diff_and_ratio`.
+    natural_log : bool, optional
+        If True (default), the max ratio is reported as a natural log.
+    batch_size : int, optional
+        Replicates generated per batch (default 200). Memory use is about
+        batch_size * n_cells * 4 integers.
+    n_jobs : int or None, optional
+        Number of processes running batches (see
+        `fairness.parallel.resolve_n_jobs`). Default is 1.
+    random_state : int, numpy.random.SeedSequence or None, optional
+        Seed. Results are reproducible for a given random_state and
+        batch_size, whatever n_jobs.
+
+    Returns
+    -------
+    BootstrapResult
+        Estimates, intervals and replicates.
+
+    Raises
+    ------
+    ValueError
+        If an argument is out of range, or the table holds sums of sample
+        weights rather than row counts (see `bootstrap_intersect`).
+    """
+    _row_counts(table.counts)
+    return _bootstrap(table, metric, _run_batch, table.counts, n_boot=n_boot,
+                      confidence=confidence, method=method,
+                      min_support=min_support, natural_log=natural_log,
+                      batch_size=batch_size, n_jobs=n_jobs,
+                      random_state=random_state)
+
+
+def _bootstrap(table: IntersectCounts, metric: str, run_batch, data, *,
+               n_boot: int = 1000, confidence: float = 0.95,
+               method: str = "multinomial",
+               min_support: Optional[int] = None,
+               natural_log: bool = True,
+               batch_size: int = 200,
+               n_jobs: Optional[int] = 1,
+               random_state=None) -> BootstrapResult:
+    """
+    Bootstrap a table in seeded batches of run_batch(data, n_rep, seed,
+    method, metric, min_support, natural_log).
+    """
+    _check_method(method)
+    if n_boot < 1:
+        raise ValueError(f"n_boot must be at least 1. Got {n_boot}.")
+    if not 0 < confidence < 1:
+        raise ValueError(
+            f"confidence must be between 0 and 1. Got {confidence}."
+        )
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1. Got {batch_size}.")
+
+    counts = table.counts
+    rates, max_diff, max_ratio = max_diff_and_ratio(
+        counts[np.newaxis], metric, min_support, natural_log)
+
+    sizes = [min(batch_size, n_boot - start)
+             for start in range(0, n_boot, batch_size)]
+    seeds = _batch_seeds(random_state, len(sizes))
+    args = [(data, size, seed, method, metric, min_support, natural_log)
+            for size, seed in zip(sizes, seeds)]
+
+    n_jobs = min(resolve_n_jobs(n_jobs), len(sizes))
+    if n_jobs == 1:
+        batches = [run_batch(*batch_args) for batch_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            batches = list(pool.map(run_batch, *zip(*args)))
+
+    rate_samples = np.concatenate([batch[0] for batch in batches])
+    diff_samples = np.concatenate([batch[1] for batch in batches])
+    ratio_samples = np.concatenate([batch[2] for batch in batches])
+
+    return BootstrapResult(
+        metric=metric,
+        confidence=confidence,
+        names=table.names(),
+        rates=rates[0],
+        rate_intervals=_interval(rate_samples, confidence),
+        max_diff=float(max_diff[0]),
+        max_diff_interval=tuple(_interval(diff_samples, confidence).tolist()),
+        max_ratio=float(max_ratio[0]),
+        max_ratio_interval=tuple(
+            _interval(ratio_samples, confidence).tolist()),
+        rate_samples=rate_samples,
+        max_diff_samples=diff_samples,
+        max_ratio_samples=ratio_samples,
+    )
+
+
+def bootstrap_intersect(subject_labels_dict: dict, predictions: Sequence,
+                        true_statuses: Sequence, metric: str = "acc", *,
+                        sparse: bool = False,
+                        sample_weight: Optional[Sequence] = None,
+                        **kwargs) -> BootstrapResult:
+    """
+    Bootstrap confidence intervals for `all_intersect_*` and the
+    `max_intersect_*` diff and ratio.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    metric : str, optional
+        One of "acc" (default), "fnr", "fpr", "for" or "fdr".
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included. Default is False, as in `all_intersect_*`.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation. The rows are resampled with their
+        weights (see `replicate_rows`), so intervals reflect the number of
+        rows rather than the summed weight.
+    **kwargs
+        Passed to `bootstrap_counts` (n_boot, confidence, method,
+        min_support, natural_log, batch_size, n_jobs, random_state).
+
+    Returns
+    -------
+    BootstrapResult
+        Estimates, intervals and replicates.
+    """
+    if sample_weight is None:
+        table = IntersectCounts.from_labels(subject_labels_dict, predictions,
+                                            true_statuses, sparse=sparse)
+        return bootstrap_counts(table, metric, **kwargs)
+
+    outcomes = outcome_codes(predictions, true_statuses)
+    weights = check_sample_weight(sample_weight, len(outcomes))
+    categories, levels, codes = encode_categories(subject_labels_dict,
+                                                  len(outcomes))
+    cells, row_cells = cell_index(levels, codes, len(outcomes),
+                                  sparse=sparse)
+    table = IntersectCounts(categories=tuple(categories),
+                            levels=tuple(levels), cells=cells,
+                            counts=confusion_counts(row_cells, outcomes,
+                                                    len(cells), weights))
+    # rows with a missing label are not in the table
+    in_table = row_cells >= 0
+    rows = (4 * row_cells[in_table] + outcomes[in_table],
+            weights[in_table], len(cells))
+    return _bootstrap(table, metric, _run_row_batch, rows, **kwargs)
+
+
+def _permutation_batch(data, n_rep, seed, metric):
+    """
+    Absolute rate differences of n_rep random relabellings of the pooled
+    rows into a group of n_a rows and the rest.
+    """
+    pooled, n_a = data
+    rng = np.random.default_rng(seed)
+    counts_a = rng.multivariate_hypergeometric(pooled, n_a, size=n_rep)
+    counts_b = pooled - counts_a
+    with np.errstate(invalid="ignore"):
+        return np.abs(rates_from_counts(counts_a, metric)
+                      - rates_from_counts(counts_b, metric))
+
+
+def _weighted_permutation_batch(data, n_rep, seed, metric):
+    """
+    As `_permutation_batch`, moving whole weighted rows between the groups.
+    """
+    outcomes, weights, n_a = data
+    rng = np.random.default_rng(seed)
+    pooled = np.bincount(outcomes, weights=weights, minlength=4)
+    counts_a = np.empty((n_rep, 4))
+    for i in range(n_rep):
+        rows = rng.choice(len(outcomes), size=n_a, replace=False)
+        counts_a[i] = np.bincount(outcomes[rows], weights=weights[rows],
+                                  minlength=4)
+    counts_b = pooled - counts_a
+    with np.errstate(invalid="ignore"):
+        return np.abs(rates_from_counts(counts_a, metric)
+                      - rates_from_counts(counts_b, metric))
+
+
+def permutation_test_counts(counts_a: np.ndarray, counts_b: np.ndarray,
+                            metric: str, *,
+                            n_permutations: int = 10000,
+                            alpha: float = 0.05,
+                            early_stop: bool = True,
+                            delta: float = 1e-3,
+                            batch_size: int = 1000,
+                            n_jobs: Optional[int] = 1,
+                            random_state=None) -> PermutationResult:
+    """
+    Permutation test of the rate difference between two confusion tables.
+
+    Parameters
+    ----------
+    counts_a, counts_b : np.ndarray
+        (tn, fp, fn, tp) counts of the two groups.
+    metric : str
+        One of "acc", "fnr", "fpr", "for" or "fdr".
+    n_permutations : int, optional
+        Maximum number of permutations (default 10000).
+    alpha : float, optional
+        Significance level (default 0.05).
+    early_stop : bool, optional
+        If True (default), stop once the Hoeffding bound
+        sqrt(log(2 / delta) / (2 m)) around the running p-value after m
+        permutations excludes alpha.
+    delta : float, optional
+        Probability that early stopping reaches the wrong side of alpha
+        (default 1e-3).
+    batch_size : int, optional
+        Permutations drawn per batch (default 1000); early stopping is
+        checked after each batch.
+    n_jobs : int or None, optional
+        Number of processes drawing batches (see
+        `fairness.parallel.resolve_n_jobs`). Default is 1.
+    random_state : int, numpy.random.SeedSequence or None, optional
+        Seed. Results are reproducible for a given random_state and
+        batch_size, whatever n_jobs.
+
+    Returns
+    -------
+    PermutationResult
+        Observed statistic, p-value and sampling details.
+
+    Raises
+    ------
+    ValueError
+        If an argument is out of range, or the counts are sums of sample
+        weights rather than row counts (see `permutation_test_group_diff`).
+
+    Notes
+    -----
+    Permutations in which either group's rate is undefined are left out.
+    """
+    counts_a = _row_counts(counts_a)
+    counts_b = _row_counts(counts_b)
+    pooled = counts_a + counts_b
+    return _permutation_test(counts_a, counts_b, metric, _permutation_batch,
+                             (pooled, int(counts_a.sum())),
+                             n_permutations=n_permutations, alpha=alpha,
+                             early_stop=early_stop, delta=delta,
+                             batch_size=batch_size, n_jobs=n_jobs,
+                             random_state=random_state)
+
+
+def _permutation_test(counts_a, counts_b, metric, run_batch, data, *,
+                      n_permutations: int = 10000,
+                      alpha: float = 0.05,
+                      early_stop: bool = True,
+                      delta: float = 1e-3,
+                      batch_size: int = 1000,
+                      n_jobs: Optional[int] = 1,
+                      random_state=None) -> PermutationResult:
+    """
+    Permutation test of the observed tables with permuted differences
+    drawn in seeded batches of run_batch(data, n_rep, seed, metric).
+    """
+    if n_permutations < 1:
+        raise ValueError(
+            f"n_permutations must be at least 1. Got {n_permutations}."
+        )
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1. Got {batch_size}.")
+
+    statistic = abs(float(rates_from_counts(counts_a, metric))
+                    - float(rates_from_counts(counts_b, metric)))
+    if np.isnan(statistic):
+        return PermutationResult(metric=metric, statistic=np.nan,
+                                 p_value=np.nan, n_permutations=0,
+                                 stopped_early=False, alpha=alpha)
+
+    sizes = [min(batch_size, n_permutations - start)
+             for start in range(0, n_permutations, batch_size)]
+    seeds = _batch_seeds(random_state, len(sizes))
+    # tolerance so that permutations tying with the observed table count as
+    # extreme despite floating-point noise
+    threshold = statistic - 1e-12
+
+    n_jobs = min(resolve_n_jobs(n_jobs), len(sizes))
+    pool = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else None
+    n_extreme = n_used = 0
+    stopped_early = False
+    try:
+        for start in range(0, len(sizes), n_jobs):
+            args = [(data, size, seed, metric) for size, seed in
+                    zip(sizes[start:start + n_jobs],
+                        seeds[start:start + n_jobs])]
+            if pool is None:
+                batches = [run_batch(*batch_args) for batch_args in args]
+            else:
+                batches = list(pool.map(run_batch, *zip(*args)))
+
+            # check batches in order so that results do not depend on n_jobs
+            for diffs in batches:
+                diffs = diffs[~np.isnan(diffs)]
+                n_extreme += int(np.count_nonzero(diffs >= threshold))
+                n_used += len(diffs)
+                if early_stop and n_used:
+                    p_hat = n_extreme / n_used
+                    bound = math.sqrt(math.log(2 / delta) / (2 * n_used))
+                    if p_hat - bound > alpha or p_hat + bound < alpha:
+                        stopped_early = n_used < n_permutations
+                        break
+            else:
+                continue
+            break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return PermutationResult(
+        metric=metric,
+        statistic=statistic,
+        p_value=(1 + n_extreme) / (1 + n_used),
+        n_permutations=n_used,
+        stopped_early=stopped_early,
+        alpha=alpha,
+    )
+
+
+def permutation_test_group_diff(group_a_label, group_b_label,
+                                subject_labels: Sequence,
+                                predictions: Sequence,
+                                true_statuses: Sequence,
+                                metric: str = "acc", *,
+                                sample_weight: Optional[Sequence] = None,
+                                **kwargs) -> PermutationResult:
+    """
+    Permutation test of `group_*_diff` between two groups.
+
+    Parameters
+    ----------
+    group_a_label, group_b_label:
+        Labels of the two groups to compare.
+    subject_labels : array-like
+        Group label for every observation in the evaluation dataset.
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    metric : str, optional
+        One of "acc" (default), "fnr", "fpr", "for" or "fdr".
+    sample_weight : array-like of float or None, optional
+        Weight of each observation. The statistic compares weighted rates,
+        and each permutation reassigns whole rows, with their weights,
+        between the two groups.
+    **kwargs
+        Passed to `permutation_test_counts` (n_permutations, alpha,
+        early_stop, delta, batch_size, n_jobs, random_state).
+
+    Returns
+    -------
+    PermutationResult
+        Observed statistic, p-value and sampling details.
+    """
+    if sample_weight is None:
+        table = GroupCounts.from_labels(subject_labels, predictions,
+                                        true_statuses)
+        return permutation_test_counts(table.group(group_a_label),
+                                       table.group(group_b_label), metric,
+                                       **kwargs)
+
+    table = GroupCounts.from_labels(subject_labels, predictions,
+                                    true_statuses, sample_weight)
+    outcomes = outcome_codes(predictions, true_statuses)
+    weights = check_sample_weight(sample_weight, len(outcomes))
+    codes, labels = factorize_labels(subject_labels)
+    lookup = {label: i for i, label in enumerate(labels)}
+    in_a = codes == lookup.get(group_a_label, -2)
+    in_b = codes == lookup.get(group_b_label, -2)
+    pooled = in_a | in_b
+    data = (outcomes[pooled], weights[pooled],
+            int(np.count_nonzero(in_a)))
+    return _permutation_test(table.group(group_a_label),
+                             table.group(group_b_label), metric,
+                             _weighted_permutation_batch, data, **kwargs)
@@ -0,0 +1,224 @@
+"""
+fairness.rollup
+===============
+
+Fairness metrics at every level of intersection, from one pass over the
+data.
+
+Reporting a metric for each protected category on its own, for every pair,
+every triple, and so on up to the full intersection would mean calling
+`all_intersect_*` once per subset of categories, i.e. 2^k scans of the data
+for k categories. `rollup_cube` instead counts the finest intersectional
+table once and derives each coarser table with
+`fairness.counts.IntersectCounts.marginal`, summing counts along the dropped
+category. Every subset is rolled up from a parent one category larger, so
+the work after the single pass is proportional to the size of the tables,
+not the number of observations.
+
+Observations with a missing label in any category are left out of the
+finest table, and so of every level of the cube.
+
+Typical usage
+-------------
+>>> from fairness.rollup import rollup_cube
+>>> cube = rollup_cube(subject_labels_dict, y_pred, y_true)
+>>> cube.summary("fnr")              # max diff / ratio for every subset
+>>> cube.to_dict("acc")[("Sex",)]    # as all_intersect_accs on Sex alone
+>>> cube.to_frame("fpr")             # one row per group at every level
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from .counts import IntersectCounts, max_diff_and_ratio, rate_terms
+from .parallel import parallel_intersect_counts
+
+
+@dataclass(frozen=True)
+class RollupCube:
+    """
+    Intersectional confusion tables for subsets of the categories.
+
+    Attributes
+    ----------
+    categories:
+        Category names in sorted order.
+    tables:
+        Dict mapping each subset of categories (a tuple in sorted order) to
+        its `fairness.counts.IntersectCounts`, ordered from single
+        categories up to the full intersection.
+    """
+
+    categories: tuple
+    tables: dict
+
+    @classmethod
+    def from_table(cls, table: IntersectCounts, *, min_order: int = 1,
+                   max_order: Optional[int] = None) -> "RollupCube":
+        """
+        Roll a table up to every subset of its categories.
+
+        Parameters
+        ----------
+        table : IntersectCounts
+            The finest table.
+        min_order, max_order : int, optional
+            Smallest and largest number of categories in a subset. Default
+            is every subset from single categories to all of them.
+
+        Returns
+        -------
+        RollupCube
+            The cube of marginal tables.
+
+        Raises
+        ------
+        ValueError
+            If the orders are out of range.
+        """
+        n_categories = len(table.categories)
+        if max_order is None:
+            max_order = n_categories
+        if not 0 <= min_order <= max_order <= n_categories:
+            raise ValueError(
+                "Need 0 <= min_order <= max_order <= number of categories "
+                f"({n_categories}). Got {min_order} and {max_order}."
+            )
+
+        # Roll down one category at a time, each subset from its smallest
+        # parent (the subset plus one more category).
+        rolled = {table.categories: table}
+        for order in range(n_categories - 1, min_order - 1, -1):
+            for subset in combinations(table.categories, order):
+                parents = [rolled[tuple(c for c in table.categories
+                                        if c in subset or c == extra)]
+                           for extra in table.categories
+                           if extra not in subset]
+                parent = min(parents, key=lambda t: len(t.cells))
+                rolled[subset] = parent.marginal(subset)
+
+        tables = {subset: rolled[subset]
+                  for order in range(min_order, max_order + 1)
+                  for subset in combinations(table.categories, order)}
+        return cls(categories=table.categories, tables=tables)
+
+    def __getitem__(self, categories) -> IntersectCounts:
+        """Return the table over the given categories, in any order."""
+        if isinstance(categories, str):
+            categories = (categories,)
+        return self.tables[tuple(sorted(categories))]
+
+    def to_dict(self, metric: str) -> dict:
+        """
+        Return a dict mapping each subset of categories to the
+        {group name: rate} dict of `all_intersect_*` over that subset.
+        """
+        return {subset: table.to_dict(metric)
+                for subset, table in self.tables.items()}
+
+    def to_frame(self, metric: str) -> pd.DataFrame:
+        """
+        Return the given rate of every group at every level.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per group with columns "categories" (joined by " + "),
+            "order", "group", the rate (named after metric) and "support"
+            (observations, or summed weight, in the rate's denominator).
+        """
+        frames = []
+        for subset, table in self.tables.items():
+            _, denom = rate_terms(table.counts, metric)
+            frames.append(pd.DataFrame({
+                "categories": " + ".join(subset),
+                "order": len(subset),
+                "group": table.names(),
+                metric: table.rates(metric),
+                "support": denom,
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def summary(self, metric: str, min_support: Optional[int] = None,
+                natural_log: bool = True) -> pd.DataFrame:
+        """
+        Return the `max_intersect_*` summaries of every subset.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+        min_support : int or None, optional
+            See `fairness.metrics.max_intersect_acc_diff`.
+        natural_log : bool, optional
+            If True (default), report the natural log of the max ratio.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by the subsets' categories joined by " + ", with columns
+            "order", "n_groups", "max_diff" and "max_ratio".
+        """
+        rows = []
+        for subset, table in self.tables.items():
+            _, max_diff, max_ratio = max_diff_and_ratio(
+                table.counts[None], metric, min_support, natural_log)
+            rows.append({"categories": " + ".join(subset),
+                         "order": len(subset),
+                         "n_groups": len(table.cells),
+                         "max_diff": float(max_diff[0]),
+                         "max_ratio": float(max_ratio[0])})
+        return pd.DataFrame(rows).set_index("categories")
+
+
+def rollup_cube(subject_labels_dict: dict, predictions: Sequence,
+                true_statuses: Sequence, *,
+                min_order: int = 1,
+                max_order: Optional[int] = None,
+                sparse: bool = False,
+                n_jobs: Optional[int] = 1,
+                chunk_size: Optional[int] = None,
+                sample_weight: Optional[Sequence] = None) -> RollupCube:
+    """
+    Count the finest intersectional table once and roll it up to every
+    subset of the categories.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    min_order, max_order : int, optional
+        Smallest and largest number of categories in a subset. Default is
+        every subset from single categories to the full intersection.
+    sparse : bool, optional
+        If True, every table holds only the groups present in the data.
+        Default is False.
+    n_jobs : int or None, optional
+        Worker processes counting the finest table (see
+        `fairness.parallel`). Default is 1 (serial).
+    chunk_size : int or None, optional
+        Rows per chunk when n_jobs is not 1.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; counts become sums of weights.
+
+    Returns
+    -------
+    RollupCube
+        The table of every subset of categories.
+    """
+    table = parallel_intersect_counts(subject_labels_dict, predictions,
+                                      true_statuses, sparse=sparse,
+                                      n_jobs=n_jobs, chunk_size=chunk_size,
+                                      sample_weight=sample_weight)
+    return RollupCube.from_table(table, min_order=min_order,
+                                 max_order=max_order)
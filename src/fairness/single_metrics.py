@@ -1,5 +1,7 @@
 import numpy as np
 
+from .counts import check_sample_weight, confusion_counts, factorize_labels
+
 
 def group_to_binary(labels, privileged_label):
     """
@@ -20,11 +22,63 @@ def group_to_binary(labels, privileged_label):
     return (labels == privileged_label).astype(int)
 
 
-def calculate_TP_FN_FP_TN(y_test, y_pred):
+def _as_binary(values, name):
+    """
+    Validate that values only contain {0, 1} and return them as int8.
+
+    A single vectorized pass replaces separate np.unique / membership scans.
+    """
+    values = np.asarray(values)
+
+    if values.dtype == bool:
+        return values.astype(np.int8)
+
+    if values.dtype.kind in "iufO":
+        if ((values == 0) | (values == 1)).all():
+            return values.astype(np.int8)
+
+    raise ValueError(
+        f"{name} must contain only {{0, 1}}, where 1 is the positive outcome."
+    )
+
+
+def _check_both_classes(tp, fn, tn, fp):
+    """
+    Raise if the true labels lack positive or negative samples.
+    """
+    if tp + fn == 0:
+        raise ValueError(
+            "y_test contains no positive samples (label=1). "
+            "TPR-based metrics are undefined."
+        )
+
+    if tn + fp == 0:
+        raise ValueError(
+            "y_test contains no negative samples (label=0). "
+            "FPR-based metrics are undefined."
+        )
+
+
+def _unpack_counts(counts):
+    """
+    Convert a (tn, fp, fn, tp) count row (see `fairness.counts.OUTCOMES`)
+    into validated Python numbers in (tp, fn, tn, fp) order: ints, or
+    floats for weighted counts.
+    """
+    tn, fp, fn, tp = np.asarray(counts).tolist()
+    _check_both_classes(tp, fn, tn, fp)
+    return tp, fn, tn, fp
+
+
+def calculate_TP_FN_FP_TN(y_test, y_pred, sample_weight=None):
     """
     Computes the confusion matrix components: True Positives (TP),
     False Negatives (FN), True Negatives (TN), and False Positives (FP).
 
+    The counts are obtained with a single bincount of 2 * y_test + y_pred.
+    With sample_weight, each component is the float sum of the weights of
+    its observations.
+
     Notes
     -----
     - Binary classification is assumed.
@@ -32,49 +86,116 @@ def calculate_TP_FN_FP_TN(y_test, y_pred):
     - Label 0 denotes the negative outcome.
     """
 
-    y_test = np.array(y_test)
-    y_pred = np.array(y_pred)
+    y_test = np.asarray(y_test)
+    y_pred = np.asarray(y_pred)
 
     if len(y_test) != len(y_pred):
         raise ValueError("y_test and y_pred must have the same length.")
 
-    valid_values = {0, 1}
+    y_test = _as_binary(y_test, "y_test")
+    y_pred = _as_binary(y_pred, "y_pred")
+    weights = check_sample_weight(sample_weight, len(y_test))
 
-    if not set(np.unique(y_test)).issubset(valid_values):
-        raise ValueError(
-            "y_test must contain only {0, 1}, where 1 is the positive outcome."
-        )
+    counts = np.bincount(2 * y_test + y_pred, weights=weights, minlength=4)
+
+    return _unpack_counts(counts)
+
+
+def _privileged_mask(group_labels, privileged_label):
+    """
+    Flag the privileged observations, raising if there are none.
+    """
+    codes, uniques = factorize_labels(group_labels)
+
+    return codes == _privileged_index(uniques, privileged_label)
 
-    if not set(np.unique(y_pred)).issubset(valid_values):
-        raise ValueError(
-            "y_pred must contain only {0, 1}, where 1 is the positive outcome."
-        )
 
-    if 1 not in y_test:
+def _privileged_index(uniques, privileged_label):
+    """
+    Position of privileged_label in the factorized labels.
+    """
+    lookup = {label: i for i, label in enumerate(uniques)}
+
+    if privileged_label not in lookup:
         raise ValueError(
-            "y_test contains no positive samples (label=1). "
-            "TPR-based metrics are undefined."
+            f"Privileged label '{privileged_label}' not found in "
+            f"group_labels. Available labels: {sorted(uniques, key=str)}"
         )
 
-    if 0 not in y_test:
+    return lookup[privileged_label]
+
+
+def _privileged_counts(y_test, y_pred, group_labels, privileged_label,
+                       sample_weight=None):
+    """
+    Confusion counts of the privileged and unprivileged groups in one pass.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        (tn, fp, fn, tp) counts of the privileged group, then of all
+        other groups.
+    """
+    y_test = np.asarray(y_test)
+    y_pred = np.asarray(y_pred)
+
+    if not (len(y_test) == len(y_pred) == len(group_labels)):
         raise ValueError(
-            "y_test contains no negative samples (label=0). "
-            "FPR-based metrics are undefined."
+            "y_test, y_pred, and group_labels must have the same length."
         )
 
-    tp = fp = tn = fn = 0
+    privileged = _privileged_mask(group_labels, privileged_label)
+    y_test = _as_binary(y_test, "y_test")
+    y_pred = _as_binary(y_pred, "y_pred")
+    weights = check_sample_weight(sample_weight, len(y_test))
 
-    for a, b in zip(y_test, y_pred):
-        if a == 1 and b == 1:
-            tp += 1
-        elif a == 1 and b == 0:
-            fn += 1
-        elif a == 0 and b == 1:
-            fp += 1
-        elif a == 0 and b == 0:
-            tn += 1
+    counts = np.bincount(
+        4 * privileged.astype(np.int8) + 2 * y_test + y_pred,
+        weights=weights, minlength=8
+    ).reshape(2, 4)
 
-    return tp, fn, tn, fp
+    return counts[1], counts[0]
+
+
+def _eod_from_counts(privileged, unprivileged):
+    """
+    EOD from (tn, fp, fn, tp) counts of the two groups.
+    """
+    TPR_p, _, _, _ = calculate_TPR_TNR_FPR_FNR(*_unpack_counts(privileged))
+    TPR_u, _, _, _ = calculate_TPR_TNR_FPR_FNR(*_unpack_counts(unprivileged))
+
+    return abs(TPR_u - TPR_p)
+
+
+def _aod_from_counts(privileged, unprivileged):
+    """
+    AOD from (tn, fp, fn, tp) counts of the two groups.
+    """
+    TPR_p, _, FPR_p, _ = calculate_TPR_TNR_FPR_FNR(
+        *_unpack_counts(privileged)
+    )
+    TPR_u, _, FPR_u, _ = calculate_TPR_TNR_FPR_FNR(
+        *_unpack_counts(unprivileged)
+    )
+
+    return ((FPR_u - FPR_p) + (TPR_u - TPR_p)) / 2
+
+
+def _di_from_counts(n_positive, n_group):
+    """
+    DI from positive-prediction counts and sizes, indexed
+    [unprivileged, privileged].
+    """
+    P_priv = n_positive[1] / n_group[1]
+    P_unpriv = n_positive[0] / n_group[0] if n_group[0] > 0 else np.nan
+
+    if P_priv == 0:
+        raise ZeroDivisionError(
+            "Disparate Impact is undefined when the privileged group "
+            "has zero positive predictions."
+        )
+
+    return float(P_unpriv / P_priv)
 
 
 def calculate_TPR_TNR_FPR_FNR(tp, fn, tn, fp):
@@ -83,14 +204,20 @@ def calculate_TPR_TNR_FPR_FNR(tp, fn, tn, fp):
 
     Notes
     -----
-    - Counts must be non-negative integers.
+    - Counts must be non-negative integers, or non-negative finite floats
+      for weighted counts (see `calculate_TP_FN_FP_TN`).
     - Label 1 is assumed to be the positive outcome.
     """
 
     # Type check
     for name, value in zip(["tp", "fn", "tn", "fp"], [tp, fn, tn, fp]):
-        if not isinstance(value, (int,)):
-            raise TypeError(f"{name} must be an integer. Got {type(value)}.")
+        if not isinstance(value, (int, float)):
+            raise TypeError(
+                f"{name} must be an integer or float. Got {type(value)}."
+            )
+
+        if not np.isfinite(value):
+            raise ValueError(f"{name} must be finite. Got {value}.")
 
         if value < 0:
             raise ValueError(f"{name} must be non-negative. Got {value}.")
@@ -116,7 +243,8 @@ def calculate_TPR_TNR_FPR_FNR(tp, fn, tn, fp):
     return TPR, TNR, FPR, FNR
 
 
-def calculate_EOD(y_test, y_pred, group_labels, privileged_label):
+def calculate_EOD(y_test, y_pred, group_labels, privileged_label,
+                  sample_weight=None):
     """
     Compute the Equal Opportunity Difference (EOD) between demographic groups.
 
@@ -144,6 +272,10 @@ def calculate_EOD(y_test, y_pred, group_labels, privileged_label):
         (e.g. 'Male' for sex, 'Older' for age). All other labels are treated
         as unprivileged.
 
+    sample_weight : array-like of shape (n_samples,), optional
+        Weight of each sample (e.g. survey weights). Rates become ratios
+        of summed weights. Default is None (every sample counts once).
+
     Returns
     -------
     EOD : float
@@ -157,50 +289,15 @@ def calculate_EOD(y_test, y_pred, group_labels, privileged_label):
     -----
     - EOD focuses exclusively on the positive class (y = 1).
     """
-    group_labels = np.array(group_labels)
-    y_test = np.array(y_test)
-    y_pred = np.array(y_pred)
-
-    if not (len(y_test) == len(y_pred) == len(group_labels)):
-        raise ValueError(
-            "y_test, y_pred, and group_labels must have the same length."
-        )
-
-    if privileged_label not in group_labels:
-        raise ValueError(
-            f"Privileged label '{privileged_label}' not found in group_labels."
-            f"Available labels: {np.unique(group_labels)}"
-        )
-
-    privileged_group = group_to_binary(group_labels, privileged_label)
-    # Masks
-
-    mask_priv = privileged_group == 1
-    mask_unpriv = privileged_group == 0
-
-    # Privileged group
-    tp_p, fn_p, fp_p, tn_p = calculate_TP_FN_FP_TN(
-        y_test[mask_priv], y_pred[mask_priv]
-    )
-    TPR_p, TNR_p, FPR_p, FNR_p = calculate_TPR_TNR_FPR_FNR(
-        tp_p, fn_p, tn_p, fp_p
-    )
-
-    # Underprivileged group
-    tp_u, fn_u, fp_u, tn_u = calculate_TP_FN_FP_TN(
-        y_test[mask_unpriv], y_pred[mask_unpriv]
+    counts_p, counts_u = _privileged_counts(
+        y_test, y_pred, group_labels, privileged_label, sample_weight
     )
-    TPR_u, TNR_u, FPR_u, FNR_u = calculate_TPR_TNR_FPR_FNR(
-        tp_u, fn_u, tn_u, fp_u
-    )
-
-    # Equal Opportunity Difference
-    EOD = abs(TPR_u - TPR_p)
 
-    return EOD
+    return _eod_from_counts(counts_p, counts_u)
 
 
-def calculate_AOD(y_test, y_pred, group_labels, privileged_label):
+def calculate_AOD(y_test, y_pred, group_labels, privileged_label,
+                  sample_weight=None):
     """
     Compute the Average Odds Difference (AOD) between demographic groups.
 
@@ -228,6 +325,10 @@ def calculate_AOD(y_test, y_pred, group_labels, privileged_label):
         (e.g. 'Male' for sex, 'Older' for age). All other labels are treated
         as unprivileged.
 
+    sample_weight : array-like of shape (n_samples,), optional
+        Weight of each sample (e.g. survey weights). Rates become ratios
+        of summed weights. Default is None (every sample counts once).
+
     Returns
     -------
     AOD : float
@@ -238,51 +339,14 @@ def calculate_AOD(y_test, y_pred, group_labels, privileged_label):
 
         Values closer to 0 indicate better fairness.
     """
-    # Masks
-    group_labels = np.array(group_labels)
-    y_test = np.array(y_test)
-    y_pred = np.array(y_pred)
-
-    if not (len(y_test) == len(y_pred) == len(group_labels)):
-        raise ValueError(
-            "y_test, y_pred, and group_labels must have the same length."
-        )
-
-    if privileged_label not in group_labels:
-        raise ValueError(
-            f"Privileged label '{privileged_label}' not found in group_labels."
-            f"Available labels: {np.unique(group_labels)}"
-        )
-
-    privileged_group = group_to_binary(group_labels, privileged_label)
-    # Masks
-
-    mask_priv = privileged_group == 1
-    mask_unpriv = privileged_group == 0
-
-    # Privileged group
-    tp_p, fn_p, fp_p, tn_p = calculate_TP_FN_FP_TN(
-        y_test[mask_priv], y_pred[mask_priv]
-    )
-    TPR_p, TNR_p, FPR_p, FNR_p = calculate_TPR_TNR_FPR_FNR(
-        tp_p, fn_p, tn_p, fp_p
+    counts_p, counts_u = _privileged_counts(
+        y_test, y_pred, group_labels, privileged_label, sample_weight
     )
 
-    # Underprivileged group
-    tp_u, fn_u, fp_u, tn_u = calculate_TP_FN_FP_TN(
-        y_test[mask_unpriv], y_pred[mask_unpriv]
-    )
-    TPR_u, TNR_u, FPR_u, FNR_u = calculate_TPR_TNR_FPR_FNR(
-        tp_u, fn_u, tn_u, fp_u
-    )
-
-    # Average Odds Difference
-    AOD = ((FPR_u - FPR_p) + (TPR_u - TPR_p)) / 2
-
-    return AOD
+    return _aod_from_counts(counts_p, counts_u)
 
 
-def calculate_DI(y_pred, group_labels, privileged_label):
+def calculate_DI(y_pred, group_labels, privileged_label, sample_weight=None):
     """
     Compute Disparate Impact (DI) between demographic groups.
 
@@ -306,6 +370,10 @@ def calculate_DI(y_pred, group_labels, privileged_label):
         (e.g. 'Male' for sex, 'Older' for age). All other labels are treated
         as unprivileged.
 
+    sample_weight : array-like of shape (n_samples,), optional
+        Weight of each sample (e.g. survey weights). Rates become ratios
+        of summed weights. Default is None (every sample counts once).
+
     Returns
     -------
     DI : float
@@ -317,21 +385,151 @@ def calculate_DI(y_pred, group_labels, privileged_label):
         for the specified group.
 
     """
-    group_labels = np.array(group_labels)
-    y_pred = np.array(y_pred)
-    privileged_group = group_to_binary(group_labels, privileged_label)
-    mask_priv = privileged_group == 1
-    mask_unpriv = privileged_group == 0
+    y_pred = np.asarray(y_pred)
 
-    P_priv = np.mean(y_pred[mask_priv] == 1)
-    P_unpriv = np.mean(y_pred[mask_unpriv] == 1)
+    if len(y_pred) != len(group_labels):
+        raise ValueError("y_pred and group_labels must have the same length.")
 
-    if P_priv == 0:
+    privileged = _privileged_mask(group_labels, privileged_label)
+    weights = check_sample_weight(sample_weight, len(y_pred))
+    if weights is None:
+        weights = np.ones(len(y_pred))
+
+    # group sizes and positive predictions, indexed [unprivileged, privileged]
+    n_group = np.bincount(privileged, weights=weights, minlength=2)
+    n_positive = np.bincount(privileged, weights=weights * (y_pred == 1),
+                             minlength=2)
+
+    return _di_from_counts(n_positive, n_group)
+
+
+def _safe_divide(numer, denom):
+    """
+    Elementwise numer / denom with NaN where denom is 0.
+    """
+    numer = np.asarray(numer, dtype=float)
+    denom = np.asarray(denom, dtype=float)
+    out = np.full(np.broadcast(numer, denom).shape, np.nan)
+    np.divide(numer, denom, out=out, where=denom > 0)
+    return out
+
+
+def _by_group_from_counts(labels, counts, privileged_index, total, pooled):
+    """
+    EOD, AOD and DI of every unprivileged group from a (G, 4) table of
+    (tn, fp, fn, tp) counts, see `calculate_EOD_AOD_DI_by_group`.
+    """
+    privileged = counts[privileged_index]
+
+    # the privileged group must support every metric, as in the
+    # single-pair functions
+    TPR_p, _, FPR_p, _ = calculate_TPR_TNR_FPR_FNR(*_unpack_counts(privileged))
+    P_p = (privileged[1] + privileged[3]) / privileged.sum()
+    if P_p == 0:
         raise ZeroDivisionError(
             "Disparate Impact is undefined when the privileged group "
             "has zero positive predictions."
         )
 
-    DI = P_unpriv / P_priv
+    others = [i for i in range(len(labels)) if i != privileged_index]
+    names = [labels[i] for i in others]
+    rows = counts[others].reshape(-1, 4)
+
+    if pooled:
+        if "pooled" in names:
+            raise ValueError(
+                "group_labels contains the label 'pooled', which clashes "
+                "with pooled=True."
+            )
+        names.append("pooled")
+        rows = np.vstack([rows, total - privileged])
+
+    tn, fp, fn, tp = rows.T
+    TPR_u = _safe_divide(tp, tp + fn)
+    FPR_u = _safe_divide(fp, fp + tn)
+    P_u = _safe_divide(fp + tp, rows.sum(axis=1))
+
+    EOD = np.abs(TPR_u - TPR_p)
+    AOD = ((FPR_u - FPR_p) + (TPR_u - TPR_p)) / 2
+    DI = P_u / P_p
+
+    return {
+        name: {"EOD": float(eod), "AOD": float(aod), "DI": float(di)}
+        for name, eod, aod, di in zip(names, EOD, AOD, DI)
+    }
+
 
-    return float(DI)
+def calculate_EOD_AOD_DI_by_group(
+    y_test, y_pred, group_labels, privileged_label, *, pooled=False,
+    sample_weight=None
+):
+    """
+    Compute EOD, AOD and DI of every unprivileged group against the
+    privileged group in one pass over the data.
+
+    `calculate_EOD`, `calculate_AOD` and `calculate_DI` pool all
+    non-privileged labels together. This function keeps each label
+    separate, building a single grouped confusion table instead of
+    rescanning the data once per group.
+
+    Parameters
+    ----------
+    y_test : array-like of shape (n_samples,)
+        Ground-truth binary labels.
+        Expected values: 0 (negative outcome) or 1 (positive outcome).
+
+    y_pred : array-like of shape (n_samples,)
+        Predicted binary labels from a classifier.
+        Expected values: 0 (negative outcome) or 1 (positive outcome).
+
+    group_labels : array-like of shape (n_samples,)
+        Categorical group membership labels for a protected attribute.
+
+    privileged_label : str
+        The label within group_labels considered to be the privileged group.
+
+    pooled : bool, optional
+        If True, also report the metrics for all unprivileged groups
+        pooled together under the key "pooled" (the values returned by
+        the single-pair functions).
+
+    sample_weight : array-like of shape (n_samples,), optional
+        Weight of each sample (e.g. survey weights). Rates become ratios
+        of summed weights. Default is None (every sample counts once).
+
+    Returns
+    -------
+    dict
+        Maps each unprivileged label, in order of first appearance, to a
+        dict with keys "EOD", "AOD" and "DI". Metrics that are undefined
+        for an unprivileged group (e.g. it has no positive samples) are
+        NaN.
+
+    Raises
+    ------
+    ValueError
+        If the inputs differ in length, contain values other than {0, 1},
+        if privileged_label is missing, or if the privileged group has no
+        positive or no negative samples.
+    ZeroDivisionError
+        If the privileged group has zero positive predictions.
+    """
+    y_test = np.asarray(y_test)
+    y_pred = np.asarray(y_pred)
+
+    if not (len(y_test) == len(y_pred) == len(group_labels)):
+        raise ValueError(
+            "y_test, y_pred, and group_labels must have the same length."
+        )
+
+    codes, uniques = factorize_labels(group_labels)
+    privileged_index = _privileged_index(uniques, privileged_label)
+
+    outcomes = 2 * _as_binary(y_test, "y_test") + _as_binary(y_pred, "y_pred")
+    weights = check_sample_weight(sample_weight, len(outcomes))
+    counts = confusion_counts(codes, outcomes, len(uniques), weights)
+    total = np.bincount(outcomes, weights=weights, minlength=4)
+
+    return _by_group_from_counts(
+        uniques, counts, privileged_index, total, pooled
+    )
@@ -0,0 +1,791 @@
+"""
+fairness.streaming
+==================
+
+Incremental fairness metrics for prediction streams.
+
+`FairnessAccumulator` consumes mini-batches of labels, predictions and true
+statuses and keeps only confusion counts per group and per intersectional
+cell, so memory depends on the number of groups and cells rather than on
+the length of the stream. Every metric of `fairness.metrics` is available as
+a method of the same name (as for `fairness.frame.FairnessFrame`) and is
+computed from the counts in O(cells).
+
+Accumulators fed from different parts of a stream can be combined with
+`FairnessAccumulator.merge`, and tables counted elsewhere folded in with
+`FairnessAccumulator.update_counts`.
+
+Batches may carry a sample_weight; counts then become float sums of
+weights (see `fairness.counts`).
+
+For monitoring, `SlidingWindowAccumulator` reports the same metrics over the
+last K observations or the last T seconds, and `DecayedAccumulator` weights
+observations by an exponential decay with a given half-life. Both update in
+O(1) amortized time per observation instead of rescanning the window, and
+only accept observations, not other accumulators or count tables.
+
+Typical usage
+-------------
+>>> from fairness.streaming import FairnessAccumulator
+>>> acc = FairnessAccumulator()
+>>> for batch in batches:
+...     acc.update(batch["y_pred"], batch["y_true"],
+...                subject_labels_dict=batch["labels"])
+>>> acc.max_intersect_fpr_diff(min_support=30)
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from collections import deque
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from .counts import (GroupCounts, IntersectCounts, check_sample_weight,
+                     factorize_labels, observed_cells, outcome_codes)
+from .frame import RateMetrics
+
+
+class _Registry:
+    """
+    Rows of confusion counts keyed by a hashable key, grown on demand.
+
+    Keys are group labels, category levels, or tuples of level codes
+    identifying an intersectional cell. Rows are numbered in first-seen
+    order.
+    """
+
+    def __init__(self, dtype=np.int64) -> None:
+        self.keys = []
+        self._index = {}
+        self._counts = np.zeros((16, 4), dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def rows(self, keys: Sequence) -> np.ndarray:
+        """Return the row of each key, registering unseen keys."""
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            row = self._index.get(key)
+            if row is None:
+                row = len(self.keys)
+                self._index[key] = row
+                self.keys.append(key)
+            rows[i] = row
+
+        if len(self.keys) > len(self._counts):
+            grown = np.zeros((max(2 * len(self._counts), len(self.keys)), 4),
+                             dtype=self._counts.dtype)
+            grown[:len(self._counts)] = self._counts
+            self._counts = grown
+        return rows
+
+    def add(self, keys: Sequence, counts: np.ndarray) -> None:
+        """Add (n_keys, 4) counts to the rows of distinct keys."""
+        rows = self.rows(keys)
+        self._counts[rows] += counts
+
+    def add_rows(self, rows: np.ndarray, outcomes: np.ndarray,
+                 weights: Optional[np.ndarray] = None, sign: int = 1) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) individual observations, given the
+        row of each one (-1 to skip) and its outcome code.
+        """
+        keep = rows >= 0
+        if not keep.all():
+            rows = rows[keep]
+            outcomes = outcomes[keep]
+            if weights is not None:
+                weights = weights[keep]
+
+        n_rows = len(self.keys)
+        if len(rows) >= n_rows:
+            # one bincount over the whole registry is cheapest
+            flat = np.bincount(rows * 4 + outcomes, weights=weights,
+                               minlength=4 * n_rows).reshape(n_rows, 4)
+            if sign > 0:
+                self._counts[:n_rows] += flat
+            else:
+                self._counts[:n_rows] -= flat
+        else:
+            values = 1 if weights is None else weights
+            np.add.at(self._counts, (rows, outcomes), sign * values)
+
+        if sign < 0 and self._counts.dtype.kind == "f":
+            # removing weights leaves rounding residue where counts should
+            # be exactly zero
+            self._counts[np.abs(self._counts) < 1e-9] = 0.0
+
+    def to_float(self) -> None:
+        """Store the counts as float64, e.g. for weighted observations."""
+        self._counts = self._counts.astype(np.float64)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[:len(self.keys)]
+
+
+class _BaseAccumulator(RateMetrics):
+    """
+    Confusion counts per group and per intersectional cell, grown as new
+    labels are seen, with the tables and metrics built from them.
+    Subclasses define how batches are added.
+    """
+
+    # dtype of the stored counts
+    _dtype = np.int64
+    # drop levels with no observations from the tables (for windows)
+    _drop_unused_levels = False
+
+    def __init__(self) -> None:
+        self._n_seen = 0
+        self._groups = None
+        self._categories = None
+        self._levels = None
+        self._cells = None
+        self._tables = {}
+        self._rates = {}
+
+    def __len__(self) -> int:
+        """Number of observations consumed so far."""
+        return self._n_seen
+
+    # -----------------------------------------------------------------
+    # Tables
+    # -----------------------------------------------------------------
+
+    @property
+    def group_counts(self) -> GroupCounts:
+        """Per-group confusion counts of the stream so far."""
+        if self._groups is None:
+            raise ValueError("No batch with subject_labels has been seen.")
+        if "group" not in self._tables:
+            self._tables["group"] = GroupCounts(
+                labels=list(self._groups.keys),
+                counts=self._scaled(self._groups.counts))
+        return self._tables["group"]
+
+    def intersect_counts(self, sparse: bool = False) -> IntersectCounts:
+        """
+        Per-cell confusion counts of the stream so far.
+
+        Parameters
+        ----------
+        sparse : bool, optional
+            If True, only cells seen in the stream are included.
+        """
+        if self._cells is None:
+            raise ValueError("No batch with subject_labels_dict has been "
+                             + "seen.")
+        if sparse not in self._tables:
+            table = self._sorted_cells()
+            self._tables[sparse] = table if sparse else table.densify()
+        return self._tables[sparse]
+
+    # -----------------------------------------------------------------
+    # Internals
+    # -----------------------------------------------------------------
+
+    def _invalidate(self) -> None:
+        self._tables = {}
+        self._rates = {}
+
+    def _to_float(self) -> None:
+        """Switch to float counts, for weighted observations."""
+        if self._dtype == np.float64:
+            return
+        self._dtype = np.float64
+        for registry in (self._groups, self._cells):
+            if registry is not None:
+                registry.to_float()
+
+    def _weights(self, sample_weight, n_samples) -> Optional[np.ndarray]:
+        weights = check_sample_weight(sample_weight, n_samples)
+        if weights is not None:
+            self._to_float()
+        return weights
+
+    def _check_categories(self, categories) -> tuple:
+        """Return the sorted categories, checking them against earlier ones."""
+        categories = tuple(sorted(categories))
+        if not categories:
+            raise ValueError("subject_labels_dict must contain at least "
+                             + "one category.")
+        if self._categories is not None and categories != self._categories:
+            raise ValueError(
+                f"Expected categories {list(self._categories)}, got "
+                f"{list(categories)}."
+            )
+        return categories
+
+    def _register_categories(self, categories) -> None:
+        categories = self._check_categories(categories)
+        if self._categories is None:
+            self._categories = categories
+            self._levels = [_Registry() for _ in categories]
+            self._cells = _Registry(self._dtype)
+
+    def _check_batch(self, predictions, true_statuses, subject_labels,
+                     subject_labels_dict) -> np.ndarray:
+        """
+        Validate a batch and return its outcome codes, without registering
+        any of its labels.
+        """
+        if subject_labels is None and subject_labels_dict is None:
+            raise ValueError("Provide subject_labels and/or "
+                             + "subject_labels_dict.")
+
+        outcomes = outcome_codes(predictions, true_statuses)
+        n_samples = len(outcomes)
+
+        if subject_labels is not None:
+            if len(subject_labels) != n_samples:
+                raise ValueError(
+                    "subject_labels, predictions and true_statuses must have "
+                    f"the same length. Got {len(subject_labels)} and "
+                    f"{n_samples}."
+                )
+        if subject_labels_dict is not None:
+            for category, labels in subject_labels_dict.items():
+                if len(labels) != n_samples:
+                    raise ValueError(
+                        f"subject_labels_dict['{category}'] has "
+                        f"{len(labels)} labels but there are {n_samples} "
+                        "predictions."
+                    )
+            self._check_categories(subject_labels_dict)
+        return outcomes
+
+    def _encode(self, outcomes, subject_labels, subject_labels_dict):
+        """
+        Return the registry row of every observation's group and cell (None
+        if the batch has no such labels, -1 for missing labels), registering
+        new labels. The batch must have passed `_check_batch`.
+        """
+        group_rows = cell_rows = None
+        if subject_labels is not None:
+            group_rows = self._group_rows(subject_labels)
+        if subject_labels_dict is not None:
+            self._register_categories(subject_labels_dict)
+            cell_rows = self._cell_rows(subject_labels_dict, len(outcomes))
+        return group_rows, cell_rows
+
+    def _add(self, group_rows, cell_rows, outcomes, weights=None,
+             sign=1) -> None:
+        if group_rows is not None:
+            self._groups.add_rows(group_rows, outcomes, weights, sign)
+        if cell_rows is not None:
+            self._cells.add_rows(cell_rows, outcomes, weights, sign)
+
+    def _group_rows(self, subject_labels) -> np.ndarray:
+        if self._groups is None:
+            self._groups = _Registry(self._dtype)
+        codes, labels = factorize_labels(subject_labels)
+        # trailing -1 maps missing labels (code -1) to -1
+        return np.append(self._groups.rows(labels), -1)[codes]
+
+    def _cell_rows(self, subject_labels_dict, n_samples) -> np.ndarray:
+        codes = []
+        for j, category in enumerate(self._categories):
+            batch_codes, batch_levels = factorize_labels(
+                subject_labels_dict[category])
+            codes.append(np.append(self._levels[j].rows(batch_levels),
+                                   -1)[batch_codes])
+
+        if n_samples == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        shape = tuple(len(levels) for levels in self._levels)
+        cells, row_cells = observed_cells(codes, shape)
+        cell_rows = self._cells.rows([tuple(row) for row in cells.tolist()])
+        return np.append(cell_rows, -1)[row_cells]
+
+    def _add_cell_rows(self, levels, cells, counts) -> None:
+        """Add counts of cells given as codes into their own levels."""
+        remap = [self._levels[j].rows(category_levels)
+                 for j, category_levels in enumerate(levels)]
+        remapped = np.stack([remap[j][cells[:, j]] for j in range(len(remap))],
+                            axis=1)
+        self._cells.add([tuple(row) for row in remapped.tolist()], counts)
+
+    def _scaled(self, counts: np.ndarray) -> np.ndarray:
+        """Copy of stored counts in the units reported by the tables."""
+        return counts.copy()
+
+    def _sorted_cells(self) -> IntersectCounts:
+        """
+        Sparse table with levels sorted and cells in product order, as
+        built by `IntersectCounts.from_labels`. Cells without observations
+        are left out.
+        """
+        k = len(self._categories)
+        cells = np.array(self._cells.keys, dtype=np.int64).reshape(-1, k)
+        counts = self._cells.counts
+        observed = counts.sum(axis=1) > 0
+        cells, counts = cells[observed], counts[observed]
+
+        levels = []
+        for j in range(k):
+            category_levels = self._levels[j].keys
+            if self._drop_unused_levels:
+                used = np.unique(cells[:, j])
+                category_levels = [category_levels[i] for i in used]
+                cells[:, j] = np.searchsorted(used, cells[:, j])
+            ranks, sorted_levels = pd.factorize(
+                pd.Series(category_levels, dtype=object), sort=True)
+            levels.append(sorted_levels.tolist())
+            if len(cells):
+                cells[:, j] = ranks[cells[:, j]]
+
+        order = np.lexsort(cells.T[::-1]) if len(cells) else np.zeros(
+            0, dtype=np.int64)
+        return IntersectCounts(categories=self._categories,
+                               levels=tuple(levels),
+                               cells=cells[order],
+                               counts=self._scaled(counts[order]))
+
+
+class FairnessAccumulator(_BaseAccumulator):
+    """
+    Running confusion counts for a stream of predictions.
+
+    Batches may provide subject_labels (used by the group_* methods),
+    subject_labels_dict (used by the intersect_* methods) or both. The
+    categories of subject_labels_dict must be the same in every batch.
+
+    Notes
+    -----
+    Results equal those of `fairness.metrics` applied to the concatenation
+    of every batch seen so far.
+    """
+
+    def update(
+        self,
+        predictions: Sequence,
+        true_statuses: Sequence,
+        *,
+        subject_labels: Optional[Sequence] = None,
+        subject_labels_dict: Optional[dict] = None,
+        sample_weight: Optional[Sequence] = None,
+    ) -> "FairnessAccumulator":
+        """
+        Add a batch of observations.
+
+        Parameters
+        ----------
+        predictions : array-like of bool
+            Predicted diagnoses for each observation in the batch.
+        true_statuses : array-like of bool
+            True diagnoses for each observation in the batch.
+        subject_labels : array-like or None, optional
+            Group label for every observation in the batch.
+        subject_labels_dict : dict or None, optional
+            Dictionary mapping category names to lists of labels for each
+            observation in the batch.
+        sample_weight : array-like of float or None, optional
+            Weight of each observation in the batch. Once a weighted batch
+            has been seen, counts are stored as floats.
+
+        Returns
+        -------
+        FairnessAccumulator
+            self, to allow chaining.
+
+        Raises
+        ------
+        ValueError
+            If neither subject_labels nor subject_labels_dict is given, if
+            the inputs differ in length, or if the categories differ from
+            earlier batches.
+        """
+        outcomes = self._check_batch(predictions, true_statuses,
+                                     subject_labels, subject_labels_dict)
+        weights = self._weights(sample_weight, len(outcomes))
+        group_rows, cell_rows = self._encode(outcomes, subject_labels,
+                                             subject_labels_dict)
+        self._add(group_rows, cell_rows, outcomes, weights)
+
+        self._n_seen += len(outcomes)
+        self._invalidate()
+        return self
+
+    def merge(self, other: "FairnessAccumulator") -> "FairnessAccumulator":
+        """
+        Add the counts of another accumulator to this one.
+
+        Parameters
+        ----------
+        other : FairnessAccumulator
+            Accumulator over the same categories. It is not modified.
+
+        Returns
+        -------
+        FairnessAccumulator
+            self, to allow chaining.
+
+        Raises
+        ------
+        TypeError
+            If other is not a FairnessAccumulator (e.g. a window).
+        ValueError
+            If the accumulators track different categories.
+        """
+        if not isinstance(other, FairnessAccumulator):
+            raise TypeError("Can only merge a FairnessAccumulator, got "
+                            f"{type(other).__name__}.")
+        if other._dtype != self._dtype:
+            self._to_float()
+        if other._groups is not None:
+            if self._groups is None:
+                self._groups = _Registry(self._dtype)
+            self._groups.add(other._groups.keys, other._groups.counts)
+
+        if other._cells is not None:
+            self._register_categories(other._categories)
+            cells = np.array(other._cells.keys, dtype=np.int64).reshape(
+                -1, len(self._categories))
+            self._add_cell_rows([levels.keys for levels in other._levels],
+                                cells, other._cells.counts)
+
+        self._n_seen += other._n_seen
+        self._invalidate()
+        return self
+
+    def update_counts(self, table: IntersectCounts,
+                      n_rows: Optional[int] = None) -> "FairnessAccumulator":
+        """
+        Add the counts of an intersectional table.
+
+        This lets a reducer fold in tables computed elsewhere, e.g. by
+        workers calling `IntersectCounts.from_labels` on their shard and
+        shipping the result with `IntersectCounts.to_bytes`.
+
+        Parameters
+        ----------
+        table : IntersectCounts
+            Table over the same categories as earlier batches.
+        n_rows : int or None, optional
+            Number of observations behind the table, added to len(self).
+            Defaults to the sum of the counts, which is only the number of
+            observations for an unweighted table.
+
+        Returns
+        -------
+        FairnessAccumulator
+            self, to allow chaining.
+
+        Raises
+        ------
+        ValueError
+            If the table holds sums of weights and n_rows is not given.
+        """
+        weighted = table.counts.dtype.kind == "f"
+        if n_rows is None:
+            if weighted:
+                raise ValueError("The table holds sums of sample weights; "
+                                 + "pass its number of rows as n_rows.")
+            n_rows = int(table.counts.sum())
+        self._register_categories(table.categories)
+        if weighted:
+            self._to_float()
+        observed = table.support > 0
+        self._add_cell_rows(table.levels, table.cells[observed],
+                            table.counts[observed])
+
+        self._n_seen += n_rows
+        self._invalidate()
+        return self
+
+
+class SlidingWindowAccumulator(_BaseAccumulator):
+    """
+    Running confusion counts over the most recent observations.
+
+    Exactly one of size and seconds must be given. Observations are kept
+    (as group and cell row codes) until they leave the window, when their
+    counts are subtracted again, so each observation costs O(1) amortized.
+
+    Parameters
+    ----------
+    size : int or None, optional
+        Keep the last `size` observations.
+    seconds : float or None, optional
+        Keep the observations whose timestamp is within `seconds` of the
+        latest timestamp (or of the time passed to `expire`).
+
+    Notes
+    -----
+    Tables only include levels present in the window, so results equal
+    those of `fairness.metrics` applied to the observations in the window.
+    Windows only accept observations: unlike `FairnessAccumulator` they
+    have no merge or update_counts, since counts carry no timestamps to
+    expire them by.
+    """
+
+    _drop_unused_levels = True
+
+    def __init__(self, size: Optional[int] = None,
+                 seconds: Optional[float] = None) -> None:
+        if (size is None) == (seconds is None):
+            raise ValueError("Provide exactly one of size and seconds.")
+        if size is not None and size < 1:
+            raise ValueError(f"size must be at least 1. Got {size}.")
+        if seconds is not None and seconds <= 0:
+            raise ValueError(f"seconds must be positive. Got {seconds}.")
+
+        super().__init__()
+        self.size = size
+        self.seconds = seconds
+        # chunks of (timestamps, group_rows, cell_rows, outcomes, weights),
+        # oldest first
+        self._window = deque()
+        self._n_window = 0
+
+    def __len__(self) -> int:
+        """Number of observations currently in the window."""
+        return self._n_window
+
+    def update(
+        self,
+        predictions: Sequence,
+        true_statuses: Sequence,
+        *,
+        subject_labels: Optional[Sequence] = None,
+        subject_labels_dict: Optional[dict] = None,
+        timestamps: Optional[Sequence[float]] = None,
+        sample_weight: Optional[Sequence] = None,
+    ) -> "SlidingWindowAccumulator":
+        """
+        Add a batch of observations and drop those leaving the window.
+
+        Parameters
+        ----------
+        predictions, true_statuses, subject_labels, subject_labels_dict,
+        sample_weight:
+            See `FairnessAccumulator.update`.
+        timestamps : array-like of float or None, optional
+            Time of each observation in seconds, non-decreasing across
+            batches. Only used by time windows; defaults to the current
+            time for the whole batch.
+
+        Returns
+        -------
+        SlidingWindowAccumulator
+            self, to allow chaining.
+        """
+        outcomes = self._check_batch(predictions, true_statuses,
+                                     subject_labels, subject_labels_dict)
+        n_samples = len(outcomes)
+
+        stamps = None
+        if self.seconds is not None:
+            stamps = self._check_timestamps(timestamps, n_samples)
+        weights = self._weights(sample_weight, n_samples)
+
+        group_rows, cell_rows = self._encode(outcomes, subject_labels,
+                                             subject_labels_dict)
+        self._add(group_rows, cell_rows, outcomes, weights)
+        if n_samples:
+            self._window.append((stamps, group_rows, cell_rows, outcomes,
+                                 weights))
+            self._n_window += n_samples
+        self._n_seen += n_samples
+
+        if self.size is not None:
+            self._evict(self._n_window - self.size)
+        elif n_samples:
+            self.expire(stamps[-1])
+        self._invalidate()
+        return self
+
+    def expire(self,
+               now: Optional[float] = None) -> "SlidingWindowAccumulator":
+        """
+        Drop observations older than `seconds` before `now`.
+
+        Parameters
+        ----------
+        now : float or None, optional
+            Current time in seconds (default: time.time()).
+
+        Returns
+        -------
+        SlidingWindowAccumulator
+            self, to allow chaining.
+        """
+        if self.seconds is None:
+            raise ValueError("expire() only applies to time windows.")
+        cutoff = (time.time() if now is None else now) - self.seconds
+
+        n_old = 0
+        for stamps, *_ in self._window:
+            k = int(np.searchsorted(stamps, cutoff, side="right"))
+            n_old += k
+            if k < len(stamps):
+                break
+        self._evict(n_old)
+        self._invalidate()
+        return self
+
+    def _check_timestamps(self, timestamps, n_samples) -> np.ndarray:
+        if timestamps is None:
+            return np.full(n_samples, time.time())
+
+        stamps = np.asarray(timestamps, dtype=float)
+        if len(stamps) != n_samples:
+            raise ValueError(
+                "timestamps and predictions must have the same length. "
+                f"Got {len(stamps)} and {n_samples}."
+            )
+        last = self._window[-1][0][-1] if self._window else -np.inf
+        if n_samples and (stamps[0] < last or np.any(np.diff(stamps) < 0)):
+            raise ValueError("timestamps must be non-decreasing.")
+        return stamps
+
+    def _evict(self, n_old: int) -> None:
+        """Remove the n_old oldest observations from the counts."""
+        while n_old > 0:
+            _, group_rows, cell_rows, outcomes, weights = self._window[0]
+            k = min(n_old, len(outcomes))
+            self._add(*(None if part is None else part[:k]
+                        for part in (group_rows, cell_rows, outcomes,
+                                     weights)),
+                      sign=-1)
+            if k == len(outcomes):
+                self._window.popleft()
+            else:
+                self._window[0] = tuple(
+                    None if part is None else part[k:]
+                    for part in self._window[0])
+            self._n_window -= k
+            n_old -= k
+
+
+class DecayedAccumulator(_BaseAccumulator):
+    """
+    Exponentially decayed confusion counts for a stream of predictions.
+
+    Each observation is weighted by 0.5 ** (age / half_life), where age is
+    measured in observations or in seconds. Rates are ratios of decayed
+    counts, and `min_support` compares against the decayed (effective)
+    number of observations.
+
+    Parameters
+    ----------
+    half_life : float
+        Age at which an observation's weight halves.
+    unit : {"records", "seconds"}, optional
+        Whether ages count observations (default) or seconds.
+
+    Notes
+    -----
+    Counts are stored relative to a reference time and only rescaled when
+    the weights of new observations would grow too large, so each
+    observation costs O(1) amortized. Decayed accumulators only accept
+    observations: unlike `FairnessAccumulator` they have no merge or
+    update_counts, since counts carry no ages to decay them by.
+    """
+
+    _dtype = np.float64
+
+    # rescale stored counts once new weights exceed exp(_MAX_EXPONENT)
+    _MAX_EXPONENT = 50.0
+
+    def __init__(self, half_life: float, unit: str = "records") -> None:
+        if half_life <= 0:
+            raise ValueError(f"half_life must be positive. Got {half_life}.")
+        if unit not in ("records", "seconds"):
+            raise ValueError(
+                f"unit must be 'records' or 'seconds'. Got '{unit}'."
+            )
+
+        super().__init__()
+        self.half_life = half_life
+        self.unit = unit
+        self._decay = math.log(2) / half_life
+        self._reference = None
+        self._now = None
+
+    def update(
+        self,
+        predictions: Sequence,
+        true_statuses: Sequence,
+        *,
+        subject_labels: Optional[Sequence] = None,
+        subject_labels_dict: Optional[dict] = None,
+        timestamps: Optional[Sequence[float]] = None,
+        sample_weight: Optional[Sequence] = None,
+    ) -> "DecayedAccumulator":
+        """
+        Add a batch of observations.
+
+        Parameters
+        ----------
+        predictions, true_statuses, subject_labels, subject_labels_dict:
+            See `FairnessAccumulator.update`.
+        sample_weight : array-like of float or None, optional
+            Weight of each observation, multiplied by its decay weight.
+        timestamps : array-like of float or None, optional
+            Time of each observation in seconds. Only used when unit is
+            "seconds"; defaults to the current time for the whole batch.
+
+        Returns
+        -------
+        DecayedAccumulator
+            self, to allow chaining.
+        """
+        outcomes = self._check_batch(predictions, true_statuses,
+                                     subject_labels, subject_labels_dict)
+        n_samples = len(outcomes)
+
+        if self.unit == "records":
+            ages = np.arange(self._n_seen, self._n_seen + n_samples,
+                             dtype=float)
+        elif timestamps is None:
+            ages = np.full(n_samples, time.time())
+        else:
+            ages = np.asarray(timestamps, dtype=float)
+            if len(ages) != n_samples:
+                raise ValueError(
+                    "timestamps and predictions must have the same length. "
+                    f"Got {len(ages)} and {n_samples}."
+                )
+
+        sample_weight = self._weights(sample_weight, n_samples)
+        group_rows, cell_rows = self._encode(outcomes, subject_labels,
+                                             subject_labels_dict)
+        if n_samples:
+            latest = float(ages.max())
+            if self._reference is None:
+                self._reference = latest
+            elif self._decay * (latest - self._reference) > self._MAX_EXPONENT:
+                self._rescale(latest)
+            self._now = latest if self._now is None else max(self._now,
+                                                             latest)
+
+            weights = np.exp(self._decay * (ages - self._reference))
+            if sample_weight is not None:
+                weights *= sample_weight
+            self._add(group_rows, cell_rows, outcomes, weights=weights)
+
+        self._n_seen += n_samples
+        self._invalidate()
+        return self
+
+    def _rescale(self, reference: float) -> None:
+        """Express stored counts relative to a new reference time."""
+        factor = math.exp(-self._decay * (reference - self._reference))
+        for registry in (self._groups, self._cells):
+            if registry is not None:
+                registry.counts[:] *= factor
+        self._reference = reference
+
+    def _scaled(self, counts: np.ndarray) -> np.ndarray:
+        if self._now is None:
+            return counts.copy()
+        return counts * math.exp(-self._decay * (self._now - self._reference))
@@ -0,0 +1,268 @@
+"""
+fairness.subgroups
+==================
+
+Search for the subgroups whose error rate is furthest from the overall rate.
+
+`max_intersect_*_diff` reports a single number and enumerates every cell of
+the full intersection, which is astronomically large with many protected
+attributes. `worst_subgroups` instead searches the lattice of subgroups,
+from single conditions such as ``Sex=F`` down to fully specified cells, and
+returns the k with the largest gap to the overall rate in the harmful
+direction (higher FNR/FPR/FOR/FDR, lower accuracy). Attributes a subgroup
+does not mention are unrestricted, so ``Sex=F`` is the cell
+``Sex=F, age_group=*, ...``.
+
+The search is a depth-first walk that adds one condition at a time, on
+attributes in a fixed order so every subgroup is visited once. At each node
+the counts of its children on every remaining attribute come from a single
+`np.bincount` over the node's rows. Two rules prune the lattice:
+
+- support: a subgroup with fewer than min_support observations in the
+  rate's denominator is dropped along with all its refinements, which can
+  only be smaller;
+- optimistic estimate: a refinement with at least min_support observations
+  contains at most the node's b "bad" outcomes (false negatives for FNR,
+  errors for accuracy, ...), so its bad-outcome rate is at most
+  ``min(1, b / min_support)``. Branches whose bound cannot beat the current
+  k-th best score are skipped.
+
+Ranking by the raw gap favours subgroups just above min_support, and the
+bound above only bites once a node holds fewer than min_support bad
+outcomes. With ``alpha`` > 0 subgroups are ranked by
+``(support / total) ** alpha * gap`` instead (alpha=1 is the weighted
+relative accuracy of subgroup discovery). A refinement with b' <= b bad
+outcomes and support s scores at most ``(s / total) ** alpha * (b / s -
+overall)`` with s between ``max(b, min_support)`` and the node's support.
+For alpha <= 1 this falls with s, so the smallest refinement is the best
+one and the bound also shrinks with the node's size; for alpha > 1 it peaks
+at ``s = (alpha - 1) * b / (alpha * overall)``, which is clipped to that
+range. Subgroups have at most three conditions by default (max_depth), which
+keeps the search to seconds on a million rows with a dozen attributes.
+
+Only the rows in the rate's denominator are searched (e.g. the true
+positives and false negatives for FNR), so each node's count is over two
+outcomes.
+
+Typical usage
+-------------
+>>> from fairness.subgroups import worst_subgroups
+>>> for subgroup in worst_subgroups(subject_labels_dict, y_pred, y_true,
+...                                 metric="fnr", k=5, min_support=50):
+...     print(subgroup.name, subgroup.rate, subgroup.gap)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import heapq
+import itertools
+
+import numpy as np
+
+from .counts import (check_sample_weight, encode_categories, outcome_codes,
+                     rate_terms)
+
+
+@dataclass(frozen=True)
+class Subgroup:
+    """
+    A partially specified intersectional group and its rate.
+
+    Attributes
+    ----------
+    conditions:
+        Dict mapping each specified category to its label; other
+        categories are unrestricted.
+    metric:
+        The rate searched on.
+    rate:
+        The subgroup's rate.
+    gap:
+        How much worse the rate is than the overall rate (rate - overall,
+        or overall - rate for accuracy).
+    support:
+        Observations (or summed weight) in the rate's denominator.
+    score:
+        The gap weighted by the subgroup's share of the support, as ranked
+        by `worst_subgroups`; equal to gap when alpha is 0.
+    """
+
+    conditions: dict
+    metric: str
+    rate: float
+    gap: float
+    support: float
+    score: float
+
+    @property
+    def name(self) -> str:
+        """The conditions formatted as "category1=label1 + ..."."""
+        return " + ".join(f"{category}={label}"
+                          for category, label in self.conditions.items())
+
+
+def worst_subgroups(subject_labels_dict: dict, predictions: Sequence,
+                    true_statuses: Sequence, metric: str = "fnr", *,
+                    k: int = 10,
+                    min_support: float = 30,
+                    max_depth: Optional[int] = 3,
+                    alpha: float = 0.0,
+                    sample_weight: Optional[Sequence] = None
+                    ) -> list[Subgroup]:
+    """
+    Find the k subgroups with the worst rate relative to the overall rate.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    predictions : array-like of bool
+        Predicted diagnoses for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    metric : str, optional
+        One of "acc", "fnr", "fpr", "for" or "fdr". Default is "fnr".
+    k : int, optional
+        Number of subgroups to return. Default is 10.
+    min_support : float, optional
+        Minimum number of observations (or summed weight) in the rate's
+        denominator for a subgroup to be considered. Default is 30.
+    max_depth : int or None, optional
+        Maximum number of conditions per subgroup. Default is 3; None
+        searches down to the full intersection, which can be slow with
+        many categories and a small min_support.
+    alpha : float, optional
+        Subgroups are ranked by ``(support / total) ** alpha * gap``.
+        Default is 0 (the raw gap); larger values favour larger subgroups.
+        Values up to 1 also make the search much faster; above 1 the
+        pruning bound loosens and large subgroups dominate the ranking.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; counts become sums of weights.
+
+    Returns
+    -------
+    list[Subgroup]
+        Up to k subgroups, worst first. Subgroups no worse than the overall
+        rate are not returned.
+
+    Raises
+    ------
+    ValueError
+        If the metric is unknown, k or max_depth is less than 1, alpha is
+        negative, or the inputs differ in length.
+    """
+    if k < 1:
+        raise ValueError(f"k must be at least 1. Got {k}.")
+    if max_depth is not None and max_depth < 1:
+        raise ValueError(f"max_depth must be at least 1. Got {max_depth}.")
+    if alpha < 0:
+        raise ValueError(f"alpha must be non-negative. Got {alpha}.")
+
+    outcomes = outcome_codes(predictions, true_statuses)
+    weights = check_sample_weight(sample_weight, len(outcomes))
+    categories, levels, codes = encode_categories(subject_labels_dict,
+                                                  len(outcomes))
+    if max_depth is None:
+        max_depth = len(categories)
+
+    # Which outcome codes count towards the numerator and denominator.
+    numer_of, denom_of = rate_terms(np.eye(4, dtype=np.int64), metric)
+    bad_of = numer_of if metric != "acc" else denom_of - numer_of
+    rows = np.flatnonzero(denom_of[outcomes])
+    bad = bad_of[outcomes[rows]].astype(np.int64)
+    codes = [category_codes[rows] for category_codes in codes]
+    if weights is not None:
+        weights = weights[rows]
+
+    total = len(rows) if weights is None else weights.sum()
+    if total == 0:
+        return []
+    n_bad = bad.sum() if weights is None else weights[bad == 1].sum()
+    overall = n_bad / total
+    support_floor = max(min_support, np.finfo(float).tiny)
+
+    # Give every (category, level) pair its own slot, with one extra slot
+    # per category for missing labels, and code each row's slot with its
+    # outcome, so that the children of a node on all remaining categories
+    # are counted with a single np.bincount.
+    n_levels = np.array([len(category_levels) + 1
+                         for category_levels in levels], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(n_levels)])
+    slot_category = np.repeat(np.arange(len(categories)), n_levels)
+    slot_level = np.arange(offsets[-1]) - offsets[slot_category]
+    labelled_slot = slot_level < n_levels[slot_category] - 1
+    dtype = np.int32 if 2 * offsets[-1] < 2 ** 31 else np.int64
+    slot_codes = np.empty((len(rows), len(categories)), dtype=dtype)
+    for j, category_codes in enumerate(codes):
+        slot = offsets[j] + np.where(category_codes >= 0, category_codes,
+                                     n_levels[j] - 1)
+        slot_codes[:, j] = 2 * slot + bad
+
+    # min-heap of (score, -visit order, conditions, support, bad outcomes)
+    best = []
+    order = itertools.count()
+
+    def kth_score() -> float:
+        # only subgroups worse than the overall rate (score > 0) are kept
+        return best[0][0] if len(best) == k else 0.0
+
+    def visit(node_rows: np.ndarray, conditions: tuple, start: int):
+        node_codes = slot_codes[node_rows, start:]
+        node_weights = None
+        if weights is not None:
+            node_weights = np.repeat(weights[node_rows], node_codes.shape[1])
+        stats = np.bincount(node_codes.ravel(), weights=node_weights,
+                            minlength=2 * offsets[-1]).reshape(-1, 2)
+        support = stats.sum(axis=1)
+        n_child_bad = stats[:, 1]
+        # support of the best possible refinement: the smallest one for
+        # alpha <= 1, the clipped peak of the score for alpha > 1
+        best_support = np.maximum(n_child_bad, support_floor)
+        if alpha > 1:
+            peak = (np.inf if overall == 0 else
+                    (alpha - 1) * n_child_bad / (alpha * overall))
+            best_support = np.clip(peak, best_support,
+                                   np.maximum(support, best_support))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = ((support / total) ** alpha
+                      * (n_child_bad / support - overall))
+        bounds = ((best_support / total) ** alpha
+                  * (n_child_bad / best_support - overall))
+
+        candidates = np.flatnonzero(labelled_slot & (support >= min_support)
+                                    & (support > 0)
+                                    & ((scores > kth_score())
+                                       | (bounds > kth_score())))
+        for slot in candidates[np.argsort(-bounds[candidates],
+                                          kind="stable")]:
+            j = slot_category[slot]
+            child = conditions + ((j, slot_level[slot]),)
+            if scores[slot] > kth_score():
+                entry = (scores[slot], -next(order), child, support[slot],
+                         n_child_bad[slot])
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heapreplace(best, entry)
+            if (len(child) < max_depth and j + 1 < len(categories)
+                    and bounds[slot] > kth_score()):
+                in_child = node_codes[:, j - start] >> 1 == slot
+                visit(node_rows[in_child], child, j + 1)
+
+    visit(np.arange(len(rows)), (), 0)
+
+    subgroups = []
+    for score, _, conditions, support, n_child_bad in sorted(best,
+                                                             reverse=True):
+        bad_rate = n_child_bad / support
+        subgroups.append(Subgroup(
+            conditions={categories[j]: levels[j][v] for j, v in conditions},
+            metric=metric,
+            rate=float(1 - bad_rate if metric == "acc" else bad_rate),
+            gap=float(bad_rate - overall),
+            support=float(support),
+            score=float(score)))
+    return subgroups
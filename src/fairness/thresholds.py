@@ -0,0 +1,627 @@
+"""
+fairness.thresholds
+===================
+
+Fairness metrics across decision thresholds, computed from probability
+scores.
+
+The functions in `fairness.metrics` take hard 0/1 predictions, so checking a
+model at many thresholds would mean recounting the data once per threshold.
+`threshold_sweep` instead bins every score once against the sorted
+thresholds, counts (cell, true status, bin) triples with one `np.bincount`,
+and turns the bins into predicted-positive counts at every threshold with a
+reverse cumulative sum. The whole sweep costs O(N log T + cells x T) for N
+observations and T thresholds, and yields the confusion counts of every cell
+at every threshold.
+
+An observation is predicted positive at threshold t when its score is at
+least t.
+
+`optimize_thresholds` post-processes a sweep into one threshold per
+intersectional group that narrows the spread of a rate (e.g. FPR or FNR)
+across groups while keeping overall accuracy above a floor. It works on the
+(cells x thresholds) rate and accuracy arrays of the sweep, never on the
+rows, so it scales to thousands of groups. For each target rate on a grid,
+it finds the smallest tolerance band around the target in which every group
+has a threshold and the most accurate choice per group meets the floor, and
+it keeps the target with the smallest resulting spread. The result is a
+`ThresholdTable` that turns new scores into predictions in one vectorized
+pass.
+
+Typical usage
+-------------
+>>> from fairness.thresholds import threshold_sweep, fit_group_thresholds
+>>> y_score = model.predict_proba(X_test)[:, 1]
+>>> sweep = threshold_sweep(subject_labels_dict, y_score, y_true)
+>>> sweep.max_diff("fnr")            # max_intersect_fnr_diff per threshold
+>>> sweep.to_frame("fpr")            # thresholds x intersectional groups
+>>> table = fit_group_thresholds(subject_labels_dict, y_score, y_true,
+...                              metric="fpr", accuracy_floor=0.8)
+>>> y_pred = table.apply(new_subject_labels_dict, new_scores)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .counts import (IntersectCounts, cell_index, check_sample_weight,
+                     encode_categories, encode_levels, max_diff_and_ratio,
+                     mixed_radix_codes, rate_terms, rates_from_counts)
+
+
+def _as_scores(scores) -> np.ndarray:
+    scores = np.asarray(scores, dtype=float)
+    if scores.ndim != 1:
+        raise ValueError(
+            f"scores must be one-dimensional. Got shape {scores.shape}."
+        )
+    if np.isnan(scores).any():
+        raise ValueError("scores must not contain NaN.")
+    return scores
+
+
+def _as_thresholds(thresholds) -> np.ndarray:
+    if isinstance(thresholds, (int, np.integer)):
+        if thresholds < 1:
+            raise ValueError(
+                f"thresholds must be at least 1. Got {thresholds}."
+            )
+        return np.linspace(0.0, 1.0, int(thresholds))
+
+    thresholds = np.unique(np.asarray(thresholds, dtype=float))
+    if thresholds.ndim != 1 or len(thresholds) == 0:
+        raise ValueError("thresholds must be a non-empty 1-D sequence.")
+    if np.isnan(thresholds).any():
+        raise ValueError("thresholds must not contain NaN.")
+    return thresholds
+
+
+def sweep_counts(row_cells: np.ndarray, n_cells: int, scores: np.ndarray,
+                 y_true: np.ndarray, thresholds: np.ndarray,
+                 sample_weight: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Confusion counts of every cell at every threshold.
+
+    Parameters
+    ----------
+    row_cells : np.ndarray
+        Cell index of every row; negative indices are ignored.
+    n_cells : int
+        Number of cells.
+    scores : np.ndarray
+        Score of every row.
+    y_true : np.ndarray
+        True status of every row.
+    thresholds : np.ndarray
+        Sorted thresholds.
+    sample_weight : np.ndarray or None, optional
+        Weight of every row; counts are then float sums of weights.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (len(thresholds), n_cells, 4) with columns
+        (tn, fp, fn, tp).
+    """
+    keep = row_cells >= 0
+    if not keep.all():
+        row_cells, scores, y_true = row_cells[keep], scores[keep], y_true[keep]
+        if sample_weight is not None:
+            sample_weight = sample_weight[keep]
+
+    n_bins = len(thresholds) + 1
+    # bin b holds the scores at or above thresholds[:b] and below the rest,
+    # so a row in bin b is predicted positive at the first b thresholds
+    bins = np.searchsorted(thresholds, scores, side="right")
+    index = (row_cells * 2 + y_true.astype(np.int64)) * n_bins + bins
+    hist = np.bincount(index, weights=sample_weight,
+                       minlength=n_cells * 2 * n_bins)
+    hist = hist.reshape(n_cells, 2, n_bins)
+
+    at_or_above = np.cumsum(hist[..., ::-1], axis=-1)[..., ::-1]
+    positives = at_or_above[..., 1:]           # (n_cells, 2, T)
+    totals = at_or_above[..., :1]              # (n_cells, 2, 1)
+
+    fp, tp = positives[:, 0], positives[:, 1]
+    tn, fn = totals[:, 0] - fp, totals[:, 1] - tp
+    return np.stack([tn, fp, fn, tp], axis=-1).transpose(1, 0, 2)
+
+
+@dataclass(frozen=True)
+class ThresholdSweep:
+    """
+    Per-cell confusion counts at a range of decision thresholds.
+
+    Attributes
+    ----------
+    categories:
+        Category names in sorted order.
+    levels:
+        Sorted unique labels of each category.
+    cells:
+        Array of shape (n_cells, len(categories)) of level codes, as in
+        `fairness.counts.IntersectCounts`.
+    thresholds:
+        Sorted array of shape (n_thresholds,).
+    counts:
+        Array of shape (n_thresholds, n_cells, 4) with columns
+        (tn, fp, fn, tp).
+    """
+
+    categories: tuple
+    levels: tuple
+    cells: np.ndarray
+    thresholds: np.ndarray
+    counts: np.ndarray
+
+    @classmethod
+    def from_codes(cls, categories: tuple, levels: tuple,
+                   codes: Sequence[np.ndarray], scores: np.ndarray,
+                   y_true: np.ndarray, thresholds: np.ndarray, *,
+                   sparse: bool = False,
+                   sample_weight: Optional[np.ndarray] = None
+                   ) -> "ThresholdSweep":
+        """
+        Build the sweep from already factorized labels.
+
+        Parameters
+        ----------
+        categories, levels, codes:
+            As returned by `fairness.counts.encode_categories`.
+        scores : np.ndarray
+            Score of every observation.
+        y_true : np.ndarray
+            True status of every observation.
+        thresholds : np.ndarray
+            Sorted thresholds.
+        sparse : bool, optional
+            See `fairness.counts.IntersectCounts.from_labels`.
+        sample_weight : np.ndarray or None, optional
+            Validated weight of every observation.
+
+        Returns
+        -------
+        ThresholdSweep
+            The per-cell counts at every threshold.
+        """
+        cells, row_cells = cell_index(levels, codes, len(scores),
+                                      sparse=sparse)
+        return cls(categories=tuple(categories), levels=tuple(levels),
+                   cells=cells, thresholds=thresholds,
+                   counts=sweep_counts(row_cells, len(cells), scores, y_true,
+                                       thresholds, sample_weight))
+
+    def table(self, index: int) -> IntersectCounts:
+        """Return the confusion table at thresholds[index]."""
+        return IntersectCounts(categories=self.categories, levels=self.levels,
+                               cells=self.cells, counts=self.counts[index])
+
+    def names(self) -> list[str]:
+        """
+        Return the name of each cell, formatted as "label1 + label2 + ...".
+        """
+        return self.table(0).names()
+
+    def rates(self, metric: str) -> np.ndarray:
+        """
+        Return the given rate of every cell at every threshold.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_thresholds, n_cells); np.nan where a cell's
+            rate is undefined.
+        """
+        return rates_from_counts(self.counts, metric)
+
+    def max_diff(self, metric: str,
+                 min_support: Optional[int] = None) -> np.ndarray:
+        """
+        Return `max_intersect_*_diff` at every threshold.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+        min_support : int or None, optional
+            See `fairness.metrics.max_intersect_acc_diff`.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_thresholds,).
+        """
+        _, max_diff, _ = max_diff_and_ratio(self.counts, metric, min_support)
+        return max_diff
+
+    def max_ratio(self, metric: str, min_support: Optional[int] = None,
+                  natural_log: bool = True) -> np.ndarray:
+        """
+        Return `max_intersect_*_ratio` at every threshold.
+
+        Parameters
+        ----------
+        metric : str
+            One of "acc", "fnr", "fpr", "for" or "fdr".
+        min_support : int or None, optional
+            See `fairness.metrics.max_intersect_acc_diff`.
+        natural_log : bool, optional
+            If True (default), return the natural log of the max ratio.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_thresholds,).
+        """
+        _, _, max_ratio = max_diff_and_ratio(self.counts, metric, min_support,
+                                             natural_log)
+        return max_ratio
+
+    def to_frame(self, metric: str) -> pd.DataFrame:
+        """
+        Return the given rate as a DataFrame indexed by threshold, with one
+        column per intersectional group.
+        """
+        return pd.DataFrame(self.rates(metric),
+                            index=pd.Index(self.thresholds, name="threshold"),
+                            columns=self.names())
+
+
+def threshold_sweep(subject_labels_dict: dict, scores: Sequence,
+                    true_statuses: Sequence,
+                    thresholds: Union[int, Sequence] = 101, *,
+                    sparse: bool = False,
+                    sample_weight: Optional[Sequence] = None
+                    ) -> ThresholdSweep:
+    """
+    Compute intersectional confusion counts at many decision thresholds.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    scores : array-like of float
+        Predicted probability (or any score) of the positive class for each
+        observation, e.g. from `run_demo_pipeline(..., predict_proba=True)`.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    thresholds : int or array-like of float, optional
+        Either a number of evenly spaced thresholds from 0 to 1 inclusive
+        (default 101), or the thresholds themselves, which are sorted and
+        deduplicated.
+    sparse : bool, optional
+        If True, only intersectional groups present in the data are
+        included. Default is False.
+    sample_weight : array-like of float or None, optional
+        Weight of each observation; counts become sums of weights.
+
+    Returns
+    -------
+    ThresholdSweep
+        Per-cell confusion counts at every threshold.
+
+    Raises
+    ------
+    ValueError
+        If the inputs differ in length, or scores or thresholds contain NaN.
+    """
+    scores = _as_scores(scores)
+    y_true = np.asarray(true_statuses).astype(bool)
+    if len(y_true) != len(scores):
+        raise ValueError(
+            "scores and true_statuses must have the same length. "
+            f"Got {len(scores)} and {len(y_true)}."
+        )
+
+    categories, levels, codes = encode_categories(subject_labels_dict,
+                                                  len(scores))
+    return ThresholdSweep.from_codes(
+        categories, levels, codes, scores, y_true, _as_thresholds(thresholds),
+        sparse=sparse,
+        sample_weight=check_sample_weight(sample_weight, len(scores)))
+
+
+@dataclass(frozen=True)
+class ThresholdTable:
+    """
+    Decision threshold for every intersectional group.
+
+    Attributes
+    ----------
+    categories:
+        Category names in sorted order.
+    levels:
+        Sorted unique labels of each category.
+    cells:
+        Array of shape (n_cells, len(categories)) of level codes, as in
+        `fairness.counts.IntersectCounts`.
+    thresholds:
+        Array of shape (n_cells,) with the threshold of each cell.
+    default_threshold:
+        Threshold for observations outside every cell (unseen labels or
+        missing values).
+    metric:
+        Rate the thresholds were chosen to equalize, if any.
+    max_diff:
+        Spread of that rate across the constrained groups on the fitting
+        data.
+    accuracy:
+        Overall accuracy on the fitting data.
+    """
+
+    categories: tuple
+    levels: tuple
+    cells: np.ndarray
+    thresholds: np.ndarray
+    default_threshold: float
+    metric: Optional[str] = None
+    max_diff: float = np.nan
+    accuracy: float = np.nan
+
+    def names(self) -> list[str]:
+        """
+        Return the name of each cell, formatted as "label1 + label2 + ...".
+        """
+        counts = np.zeros((len(self.cells), 4), dtype=np.int64)
+        return IntersectCounts(categories=self.categories, levels=self.levels,
+                               cells=self.cells, counts=counts).names()
+
+    def to_dict(self) -> dict:
+        """Return a dict mapping each cell name to its threshold."""
+        return dict(zip(self.names(), self.thresholds.tolist()))
+
+    def thresholds_for(self, subject_labels_dict: dict) -> np.ndarray:
+        """
+        Look up the threshold of every observation.
+
+        Parameters
+        ----------
+        subject_labels_dict : dict
+            Dictionary mapping the table's category names to lists of labels
+            for each observation.
+
+        Returns
+        -------
+        np.ndarray
+            Float threshold per observation.
+
+        Raises
+        ------
+        ValueError
+            If the categories differ from the table's, or the label lists
+            differ in length.
+        """
+        if tuple(sorted(subject_labels_dict)) != self.categories:
+            raise ValueError(
+                f"subject_labels_dict has categories "
+                f"{sorted(subject_labels_dict)} but the table has "
+                f"{list(self.categories)}."
+            )
+        lengths = {len(subject_labels_dict[category])
+                   for category in self.categories}
+        if len(lengths) > 1:
+            raise ValueError(
+                "All label lists in subject_labels_dict must have the same "
+                "length."
+            )
+        if not self.categories:
+            raise ValueError("subject_labels_dict must not be empty.")
+
+        shape = tuple(len(category_levels) for category_levels in self.levels)
+        codes = [encode_levels(subject_labels_dict[category], category_levels)
+                 for category, category_levels in zip(self.categories,
+                                                      self.levels)]
+        row_codes = mixed_radix_codes(codes, shape)
+
+        # cells are in itertools.product order, so their codes are sorted
+        cell_codes = np.ravel_multi_index(tuple(self.cells.T), shape)
+        pos = np.searchsorted(cell_codes, row_codes)
+        pos = np.minimum(pos, len(cell_codes) - 1)
+        found = (row_codes >= 0) & (cell_codes[pos] == row_codes)
+        return np.where(found, self.thresholds[pos], self.default_threshold)
+
+    def apply(self, subject_labels_dict: dict, scores: Sequence) -> np.ndarray:
+        """
+        Turn scores into 0/1 predictions with each group's threshold.
+
+        Parameters
+        ----------
+        subject_labels_dict : dict
+            Dictionary mapping the table's category names to lists of labels
+            for each observation.
+        scores : array-like of float
+            Score of the positive class for each observation.
+
+        Returns
+        -------
+        np.ndarray
+            int8 predictions, 1 where the score is at least the threshold.
+        """
+        scores = _as_scores(scores)
+        thresholds = self.thresholds_for(subject_labels_dict)
+        if len(thresholds) != len(scores):
+            raise ValueError(
+                "scores and subject_labels_dict must have the same length. "
+                f"Got {len(scores)} and {len(thresholds)}."
+            )
+        return (scores >= thresholds).astype(np.int8)
+
+
+def _band_choice(rates, correct, allowed, target, base, need):
+    """
+    Most accurate threshold per cell within the narrowest band around target
+    that reaches need correct predictions in total.
+
+    Returns the chosen threshold index per cell, or None if the band cannot
+    reach need.
+    """
+    distance = np.where(allowed, np.abs(rates - target), np.inf)
+    order = np.argsort(distance, axis=1, kind="stable")
+    sorted_distance = np.take_along_axis(distance, order, axis=1)
+    best_so_far = np.maximum.accumulate(
+        np.take_along_axis(correct, order, axis=1), axis=1)
+    # widening the band past sorted_distance[c, k] adds gain[c, k] correct
+    gain = np.diff(best_so_far, axis=1, prepend=0)
+
+    events = np.argsort(sorted_distance, axis=None, kind="stable")
+    reached = base + np.cumsum(gain.ravel()[events]) >= need
+    reached &= np.isfinite(sorted_distance.ravel()[events])
+    if not reached.any():
+        return None
+    width = max(sorted_distance[:, 0].max(),
+                sorted_distance.ravel()[events[np.argmax(reached)]])
+
+    # most accurate inside the band, then closest to the target
+    in_band = np.where(distance <= width, correct, -np.inf)
+    best = in_band == in_band.max(axis=1, keepdims=True)
+    return np.argmin(np.where(best, distance, np.inf), axis=1)
+
+
+def optimize_thresholds(sweep: ThresholdSweep, metric: str = "fpr", *,
+                        accuracy_floor: float = 0.0,
+                        targets: Union[int, Sequence] = 101,
+                        min_support: Optional[int] = None,
+                        default_threshold: Optional[float] = None
+                        ) -> ThresholdTable:
+    """
+    Choose per-group thresholds that equalize a rate across groups.
+
+    Minimizes the max difference of the rate across intersectional groups
+    (as in `max_intersect_*_diff`) subject to overall accuracy of at least
+    accuracy_floor, searching over the thresholds of the sweep. See the
+    module docstring for the search.
+
+    Parameters
+    ----------
+    sweep : ThresholdSweep
+        Per-cell counts at candidate thresholds, from `threshold_sweep`.
+    metric : str, optional
+        Rate to equalize: "fpr" (default), "fnr", "for", "fdr" or "acc".
+    accuracy_floor : float, optional
+        Minimum overall accuracy, between 0 and 1 (default 0.0).
+    targets : int or array-like of float, optional
+        Target rates tried: a number of evenly spaced values from 0 to 1
+        inclusive (default 101), or the values themselves.
+    min_support : int or None, optional
+        Groups with fewer than min_support observations in the rate's
+        denominator are left unconstrained. Groups whose rate is undefined
+        at every threshold are always unconstrained. Unconstrained groups
+        get their most accurate threshold.
+    default_threshold : float or None, optional
+        Threshold for groups not in the sweep. Default is the single
+        threshold with the highest overall accuracy.
+
+    Returns
+    -------
+    ThresholdTable
+        The chosen threshold of each group.
+
+    Raises
+    ------
+    ValueError
+        If no choice of thresholds reaches accuracy_floor.
+    """
+    if not 0 <= accuracy_floor <= 1:
+        raise ValueError(
+            f"accuracy_floor must be between 0 and 1. Got {accuracy_floor}."
+        )
+
+    counts = sweep.counts.transpose(1, 0, 2)              # (cells, T, 4)
+    rates = rates_from_counts(counts, metric)
+    correct = counts[..., 0] + counts[..., 3]
+    _, denom = rate_terms(counts, metric)
+    allowed = denom >= max(min_support or 1, 1)
+    constrained = allowed.any(axis=1)
+
+    n_total = counts[:, 0].sum()
+    # small tolerance so that weighted (float) totals on the floor pass
+    need = accuracy_floor * n_total - 1e-9 * max(n_total, 1)
+    most_accurate = np.argmax(correct, axis=1)
+    base = correct[~constrained].max(axis=1, initial=0).sum()
+    if base + correct[constrained].max(axis=1, initial=0).sum() < need:
+        raise ValueError(
+            f"No thresholds reach accuracy_floor={accuracy_floor}; the most "
+            f"accurate threshold of every group gives "
+            f"{correct.max(axis=1).sum() / n_total:.4f}."
+        )
+
+    choice = most_accurate.copy()
+    max_diff = np.nan
+    if constrained.any():
+        c_rates, c_correct = rates[constrained], correct[constrained]
+        c_allowed = allowed[constrained]
+        best = None
+        for target in _as_thresholds(targets):
+            index = _band_choice(c_rates, c_correct, c_allowed, target, base,
+                                 need)
+            if index is None:
+                continue
+            chosen = np.take_along_axis(c_rates, index[:, None], axis=1)
+            spread = float(chosen.max() - chosen.min())
+            n_correct = np.take_along_axis(c_correct, index[:, None],
+                                           axis=1).sum()
+            if best is None or (spread, -n_correct) < best[:2]:
+                best = (spread, -n_correct, index)
+        # the floor is reachable, so the widest band always succeeds
+        max_diff, _, index = best
+        choice[constrained] = index
+
+    n_correct = correct[np.arange(len(choice)), choice].sum()
+    if default_threshold is None:
+        default_threshold = float(
+            sweep.thresholds[np.argmax(correct.sum(axis=0))])
+
+    return ThresholdTable(
+        categories=sweep.categories,
+        levels=sweep.levels,
+        cells=sweep.cells,
+        thresholds=sweep.thresholds[choice],
+        default_threshold=default_threshold,
+        metric=metric,
+        max_diff=max_diff,
+        accuracy=float(n_correct / n_total) if n_total else np.nan,
+    )
+
+
+def fit_group_thresholds(subject_labels_dict: dict, scores: Sequence,
+                         true_statuses: Sequence, metric: str = "fpr", *,
+                         thresholds: Union[int, Sequence] = 101,
+                         **kwargs) -> ThresholdTable:
+    """
+    Fit per-group thresholds on scored data, see `optimize_thresholds`.
+
+    Parameters
+    ----------
+    subject_labels_dict : dict
+        Dictionary mapping category names to lists of labels for each
+        observation in the evaluation dataset.
+    scores : array-like of float
+        Score of the positive class for each observation.
+    true_statuses : array-like of bool
+        True diagnoses for each observation.
+    metric : str, optional
+        Rate to equalize (default "fpr").
+    thresholds : int or array-like of float, optional
+        Candidate thresholds, see `threshold_sweep`.
+    **kwargs
+        Passed to `optimize_thresholds` (accuracy_floor, targets,
+        min_support, default_threshold).
+
+    Returns
+    -------
+    ThresholdTable
+        The chosen threshold of each observed group.
+    """
+    sweep = threshold_sweep(subject_labels_dict, scores, true_statuses,
+                            thresholds, sparse=True)
+    return optimize_thresholds(sweep, metric, **kwargs)
@@ -74,9 +74,23 @@ def run_demo_pipeline(
     stratify: bool = True,
     model: Optional[Any] = None,
     model_fit_kwargs: Optional[dict] = None,
+    sample_weight: Optional[Any] = None,
+    sample_weight_key: Optional[str] = None,
     predict_proba: bool = False,
 ) -> PipelineResult:
-    """Run an end-to-end demo workflow and return aligned outputs."""
+    """
+    Run an end-to-end demo workflow and return aligned outputs.
+
+    model_fit_kwargs are passed to model.fit unchanged. To train on per-row
+    weights, pass sample_weight instead: either a pd.Series indexed like the
+    loaded dataset, or a callable that takes the training rows of df_fair
+    and returns their weights, so that the weights are fitted on the
+    training rows only, e.g.
+    ``sample_weight=Reweighing(["Sex", "age_group"], target).fit_transform``.
+    The weights of the training rows are looked up by index and passed to
+    model.fit as sample_weight_key, which defaults to "clf__sample_weight"
+    for the default model and "sample_weight" otherwise.
+    """
     df_raw = load_csv(csv_path)
 
     # 1) fairness-oriented transforms (optional)
@@ -101,7 +115,8 @@ def run_demo_pipeline(
     )
 
     # 4) fit model and predict
-    if model is None:
+    default_model = model is None
+    if default_model:
         from sklearn.linear_model import LogisticRegression
         from sklearn.pipeline import Pipeline
         from sklearn.preprocessing import StandardScaler
@@ -111,7 +126,13 @@ def run_demo_pipeline(
             ("clf", LogisticRegression(max_iter=2000)),
         ])
 
-    fit_kwargs = model_fit_kwargs or {}
+    fit_kwargs = dict(model_fit_kwargs or {})
+    if sample_weight is not None:
+        if sample_weight_key is None:
+            sample_weight_key = ("clf__sample_weight" if default_model
+                                 else "sample_weight")
+        fit_kwargs[sample_weight_key] = _train_weights(
+            sample_weight, df_fair.loc[split.X_train.index])
     model.fit(split.X_train, split.y_train, **fit_kwargs)
 
     if predict_proba:
@@ -140,3 +161,23 @@ def run_demo_pipeline(
         y_pred=y_pred,
         eval_df=eval_df,
     )
+
+
+def _train_weights(sample_weight: Any, df_train: pd.DataFrame):
+    """Return the weight of every training row, in training order."""
+    weights = (sample_weight(df_train) if callable(sample_weight)
+               else sample_weight)
+    if not isinstance(weights, pd.Series):
+        raise ValueError(
+            "sample_weight must be a pandas Series indexed like the dataset, "
+            "or a callable returning one for the training rows."
+        )
+    if not weights.index.is_unique:
+        raise ValueError("sample_weight has a duplicated index.")
+    missing = df_train.index.difference(weights.index)
+    if len(missing):
+        raise ValueError(
+            f"sample_weight has no weight for {len(missing)} training rows, "
+            f"e.g. index {missing[0]!r}."
+        )
+    return weights.loc[df_train.index].to_numpy()
@@ -4,7 +4,10 @@ Visualization helpers for fairness metrics.
 This module contains lightweight plotting utilities that sit on top of the
 `fairness.metrics` and `fairness.single_metrics` APIs. The functions do not
 compute metrics themselves; they only visualize metric outputs computed from
-group labels, predictions, and ground-truth labels.
+group labels, predictions, and ground-truth labels. The one shortcut is
+`plot_pairwise_group_metric`, which recognizes the group_*_diff and
+group_*_ratio functions of `fairness.metrics` and derives every pair from a
+single count of the data instead of calling them once per pair.
 
 The typical workflow is:
 1) Prepare evaluation inputs (see `fairness.groups.make_eval_df` and
@@ -26,7 +29,8 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from . import single_metrics
+from . import metrics, single_metrics
+from .counts import PAIRWISE_KINDS, RATE_METRICS, GroupCounts, pairwise_rates
 
 
 def _to_list(values: Iterable) -> list:
@@ -46,6 +50,29 @@ def _to_list(values: Iterable) -> list:
     return list(values)
 
 
+def _as_sequence(values: Iterable) -> Sequence:
+    """
+    Materialize an iterable as a list unless it is already array-like.
+
+    NumPy arrays, pandas Series and Categoricals are passed through so large
+    eval_df columns are not converted to one Python object per row.
+
+    Parameters
+    ----------
+    values : Iterable
+        Any iterable object.
+
+    Returns
+    -------
+    Sequence
+        `values` itself if array-like, otherwise a list of its elements.
+    """
+    if isinstance(values, (np.ndarray, pd.Series, pd.Index,
+                           pd.api.extensions.ExtensionArray)):
+        return values
+    return list(values)
+
+
 def _unique_in_order(values: Iterable) -> list:
     """
     Return unique values while preserving the original order.
@@ -60,6 +87,9 @@ def _unique_in_order(values: Iterable) -> list:
     list
         Unique values in first-seen order.
     """
+    if isinstance(values, (np.ndarray, pd.Series, pd.Index,
+                           pd.api.extensions.ExtensionArray)):
+        return pd.unique(pd.Series(values)).tolist()
     return list(dict.fromkeys(values))
 
 
@@ -217,9 +247,9 @@ def plot_group_metric(
     ValueError
         If inputs do not share the same length.
     """
-    subject_labels = _to_list(subject_labels)
-    predictions = _to_list(predictions)
-    true_statuses = _to_list(true_statuses)
+    subject_labels = _as_sequence(subject_labels)
+    predictions = _as_sequence(predictions)
+    true_statuses = _as_sequence(true_statuses)
 
     _require_equal_lengths(
         subject_labels, predictions, true_statuses,
@@ -301,9 +331,11 @@ def plot_group_metric_from_eval_df(
         if col not in eval_df.columns:
             raise ValueError(f"eval_df missing '{col}' column.")
 
-    subject_labels = eval_df[label_col].tolist()
-    predictions = eval_df["y_pred"].tolist()
-    true_statuses = eval_df["y_true"].tolist()
+    # pass the columns through as arrays; a compact eval_df (category
+    # labels, int8 outcomes) is never expanded into Python lists
+    subject_labels = eval_df[label_col].array
+    predictions = eval_df["y_pred"].to_numpy()
+    true_statuses = eval_df["y_true"].to_numpy()
 
     return plot_group_metric(
         metric_fn,
@@ -317,6 +349,84 @@ def plot_group_metric_from_eval_df(
     )
 
 
+def _pairwise_terms(
+    metric_fn: Callable,
+) -> Optional[Tuple[str, str]]:
+    """
+    Recognize the group_<metric>_<kind> functions of `fairness.metrics`.
+
+    Parameters
+    ----------
+    metric_fn : callable
+        A pairwise metric function.
+
+    Returns
+    -------
+    tuple[str, str] or None
+        (metric, kind), e.g. ("fnr", "ratio"), or None for any other
+        function.
+    """
+    name = getattr(metric_fn, "__name__", "")
+    parts = name.split("_")
+    if (len(parts) == 3 and parts[0] == "group"
+            and parts[1] in RATE_METRICS and parts[2] in PAIRWISE_KINDS
+            and getattr(metrics, name, None) is metric_fn):
+        return parts[1], parts[2]
+    return None
+
+
+def _heatmap_plot(
+    groups: Sequence,
+    matrix: np.ndarray,
+    *,
+    title: Optional[str],
+    rotation: int,
+    figsize: Optional[Tuple[float, float]],
+) -> plt.Figure:
+    """
+    Draw a group-by-group matrix as a heatmap.
+
+    Parameters
+    ----------
+    groups : Sequence
+        Group labels for both axes.
+    matrix : np.ndarray
+        Values of shape (len(groups), len(groups)); NaN cells are left
+        blank.
+    title : str or None
+        Figure title. If None, no title is set.
+    rotation : int
+        Rotation angle for x tick labels.
+    figsize : tuple[float, float] or None
+        Figure size in inches. If None, a default size is chosen.
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+        The created Matplotlib figure.
+    """
+    if figsize is None:
+        side = max(4.5, 0.3 * len(groups) + 2.0)
+        figsize = (side + 1.0, side)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    image = ax.imshow(np.ma.masked_invalid(matrix), cmap="viridis")
+    fig.colorbar(image, ax=ax, label="metric value")
+
+    labels = [str(group) for group in groups]
+    ax.set_xticks(np.arange(len(labels)), labels)
+    ax.set_yticks(np.arange(len(labels)), labels)
+    ax.tick_params(axis="x", rotation=rotation)
+    ax.set_xlabel("group")
+    ax.set_ylabel("group")
+
+    if title:
+        ax.set_title(title)
+
+    fig.tight_layout()
+    return fig
+
+
 def plot_pairwise_group_metric(
     metric_fn: Callable[[object, object, list, list, list], float],
     subject_labels: Iterable,
@@ -328,12 +438,17 @@ def plot_pairwise_group_metric(
     rotation: int = 45,
     figsize: Optional[Tuple[float, float]] = None,
     sort: bool = True,
+    heatmap: bool = False,
 ) -> plt.Figure:
     """
     Plot pairwise group metrics (group_*_diff, group_*_ratio).
 
     Pairwise metric functions compare two groups at a time and return a
-    scalar (e.g., difference or ratio of accuracies).
+    scalar (e.g., difference or ratio of accuracies). For the group_*_diff
+    and group_*_ratio functions of `fairness.metrics`, the per-group counts
+    are computed once and every pair is derived from them (see
+    `fairness.metrics.pairwise_group_metric`); any other function is called
+    once per pair.
 
     Parameters
     ----------
@@ -353,11 +468,17 @@ def plot_pairwise_group_metric(
     title : str or None, optional
         Plot title. Defaults to the metric function name.
     rotation : int, optional
-        Rotation angle for x tick labels (used for vertical plots only).
+        Rotation angle for x tick labels (used for vertical plots and
+        heatmaps only).
     figsize : tuple[float, float] or None, optional
         Figure size in inches.
     sort : bool, optional
         If True, sort bars by metric value (NaNs placed at the end).
+        Ignored for heatmaps.
+    heatmap : bool, optional
+        If True, draw a group-by-group heatmap of the pairs instead of one
+        bar per pair; cells of pairs not plotted are left blank. Default is
+        False.
 
     Returns
     -------
@@ -385,21 +506,40 @@ def plot_pairwise_group_metric(
     if not group_pairs:
         raise ValueError("No group pairs provided to plot.")
 
-    labels = []
-    values = []
-    for a, b in group_pairs:
-        labels.append(f"{a} vs {b}")
-        values.append(metric_fn(a, b, subject_labels, predictions,
-                                true_statuses))
+    terms = _pairwise_terms(metric_fn)
+    if terms is not None:
+        metric, kind = terms
+        table = GroupCounts.from_labels(subject_labels, predictions,
+                                        true_statuses)
+        # an extra NaN rate for groups absent from the data (index -1)
+        matrix = pairwise_rates(np.append(table.rates(metric), np.nan), kind)
+        rows = np.array([table.index(a) for a, _ in group_pairs])
+        cols = np.array([table.index(b) for _, b in group_pairs])
+        values = matrix[rows, cols].tolist()
+    else:
+        values = [metric_fn(a, b, subject_labels, predictions, true_statuses)
+                  for a, b in group_pairs]
+
+    if title is None:
+        title = metric_fn.__name__.replace("_", " ")
 
+    if heatmap:
+        groups = _unique_in_order(group for pair in group_pairs
+                                  for group in pair)
+        position = {group: i for i, group in enumerate(groups)}
+        grid = np.full((len(groups), len(groups)), np.nan)
+        for (a, b), value in zip(group_pairs, values):
+            grid[position[a], position[b]] = value
+            grid[position[b], position[a]] = value
+        return _heatmap_plot(groups, grid, title=title, rotation=rotation,
+                             figsize=figsize)
+
+    labels = [f"{a} vs {b}" for a, b in group_pairs]
     if sort:
         order = np.argsort(np.nan_to_num(values, nan=np.inf))
         labels = [labels[i] for i in order]
         values = [values[i] for i in order]
 
-    if title is None:
-        title = metric_fn.__name__.replace("_", " ")
-
     return _bar_plot(
         labels,
         values,
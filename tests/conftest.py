@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+
+def _make_inputs(n=1000, *, seed=0, levels=None, classes=(0, 1),
+                 accuracy=None, scores=False):
+    """
+    Random evaluation data: (subject_labels_dict, y_pred, y_true).
+
+    levels maps each category to its labels (default Sex and a three-level
+    age_group). y_true is drawn from classes. y_pred is drawn independently,
+    or equals y_true with probability accuracy. With scores=True, y_pred is
+    replaced by scores in [0, 1] that run higher for positives.
+    """
+    rng = np.random.default_rng(seed)
+    if levels is None:
+        levels = {"Sex": ["M", "F"], "age_group": ["young", "middle", "older"]}
+    subject_labels_dict = {
+        category: rng.choice(category_levels, size=n).tolist()
+        for category, category_levels in levels.items()
+    }
+    y_true = rng.choice(classes, size=n)
+    if scores:
+        return (subject_labels_dict,
+                np.clip(0.3 * y_true + rng.random(n) * 0.7, 0, 1), y_true)
+
+    y_pred = rng.choice(classes, size=n)
+    if accuracy is not None:
+        y_pred = np.where(rng.random(n) < accuracy, y_true, y_pred)
+    return subject_labels_dict, y_pred, y_true
+
+
+@pytest.fixture
+def make_inputs():
+    """Factory of random evaluation data; see `_make_inputs`."""
+    return _make_inputs
@@ -5,9 +5,10 @@ import pandas as pd
 import pytest
 
 from fairness.data import load_csv, load_features_and_target
-from fairness.preprocess import add_age_group, map_binary_column, \
-                                preprocess_tabular
-from fairness.groups import make_intersectional_labels
+from fairness.preprocess import Reweighing, add_age_group, \
+                                map_binary_column, preprocess_tabular
+from fairness.adapters import unpack_eval_df, unpack_eval_df_arrays
+from fairness.groups import make_eval_df, make_intersectional_labels
 from fairness.metrics import group_acc, group_acc_diff, group_acc_ratio
 
 
@@ -75,6 +76,35 @@ def test_map_binary_column_strict_raises_on_unmapped():
         map_binary_column(df, col="Sex", mapping={"M": 1, "F": 0}, strict=True)
 
 
+def test_reweighing_weights_and_transform_new_data():
+    df = pd.DataFrame({
+        "Sex": ["M", "M", "M", "F", "F", "F"],
+        "y": [1, 1, 0, 0, 0, 1],
+    })
+    rw = Reweighing(["Sex"], "y")
+    weights = rw.fit_transform(df)
+    # n_group * n_label / (N * n_group_label), e.g. M/1: 3 * 3 / (6 * 2)
+    assert weights.tolist() == pytest.approx([0.75, 0.75, 1.5,
+                                              0.75, 0.75, 1.5])
+    assert len(rw.weights_) == 4
+
+    # after weighting, the label rate is the same in every group
+    weighted = (weights * df["y"]).groupby(df["Sex"]).sum() \
+        / weights.groupby(df["Sex"]).sum()
+    assert weighted.tolist() == pytest.approx([0.5, 0.5])
+
+    new = pd.DataFrame({"Sex": ["F", "X", None], "y": [1, 1, 0]},
+                       index=[10, 11, 12])
+    out = rw.transform(new)
+    assert out.index.tolist() == [10, 11, 12]
+    assert out.tolist() == pytest.approx([1.5, 1.0, 1.0])
+
+    with pytest.raises(ValueError, match="not found"):
+        rw.transform(new.drop(columns="y"))
+    with pytest.raises(ValueError, match="not fitted"):
+        Reweighing(["Sex"], "y").transform(df)
+
+
 def test_preprocess_tabular_one_hot_and_drop_cols():
     df = pd.DataFrame(
         {
@@ -111,6 +141,93 @@ def test_make_intersectional_labels_format_and_missing_to_NA():
     assert labels[1].endswith("age_group=young")
 
 
+def test_make_intersectional_labels_categorical_matches_list():
+    df = pd.DataFrame({"Sex": ["M", "F", None, "M"],
+                       "age_group": ["older", "young", "young", "older"]})
+    labels = make_intersectional_labels(df, protected=("Sex", "age_group"),
+                                        sep=";", kv_sep=":", missing="?")
+    assert labels == ["Sex:M;age_group:older", "Sex:F;age_group:young",
+                      "Sex:?;age_group:young", "Sex:M;age_group:older"]
+
+    cat = make_intersectional_labels(df, protected=("Sex", "age_group"),
+                                     sep=";", kv_sep=":", missing="?",
+                                     categorical=True)
+    assert isinstance(cat, pd.Categorical)
+    assert list(cat) == labels
+    assert len(cat.categories) == 3
+
+
+def test_make_intersectional_labels_numeric_columns_share_dtype():
+    # Row-wise, an int column is upcast to float next to a float column
+    df = pd.DataFrame({"Sex": [1, 0], "score": [0.5, 1.5]})
+    labels = make_intersectional_labels(df, protected=("Sex", "score"))
+    assert labels == ["Sex=1.0|score=0.5", "Sex=0.0|score=1.5"]
+    assert make_intersectional_labels(df, protected=("Sex",)) == \
+        ["Sex=1", "Sex=0"]
+
+
+def test_make_eval_df_compact_dtypes_and_unpack():
+    df = pd.DataFrame({"Sex": ["M", "F", "F"],
+                       "age_group": ["older", "young", "young"]},
+                      index=[10, 11, 12])
+    eval_df = make_eval_df(df_test=df, protected=("Sex", "age_group"),
+                           y_pred=np.array([1, 0, 1]), y_true=[1, 1, 0],
+                           compact=True)
+    assert isinstance(eval_df["subject_label"].dtype, pd.CategoricalDtype)
+    assert eval_df["y_pred"].dtype == np.int8
+    assert eval_df["y_true"].dtype == np.int8
+    assert list(eval_df.index) == [10, 11, 12]
+
+    default_df = make_eval_df(df_test=df, protected=("Sex", "age_group"),
+                              y_pred=np.array([1, 0, 1]), y_true=[1, 1, 0])
+    assert unpack_eval_df(eval_df) == unpack_eval_df(default_df)
+    subject_labels, predictions, _ = unpack_eval_df(eval_df)
+    assert subject_labels[0] == "Sex=M|age_group=older"
+    assert type(predictions[0]) is int
+
+
+def test_unpack_eval_df_rejects_missing_outcomes():
+    eval_df = pd.DataFrame({"subject_label": ["A", "B", "A"],
+                            "y_pred": [1.0, np.nan, 0.0],
+                            "y_true": [1, 0, 1]})
+    with pytest.raises(ValueError, match="y_pred"):
+        unpack_eval_df(eval_df)
+    eval_df["y_pred"] = pd.Series([1, None, 0], dtype=object)
+    with pytest.raises((ValueError, TypeError)):
+        unpack_eval_df(eval_df)
+
+
+def test_unpack_eval_df_arrays_are_views_of_compact_eval_df():
+    df = pd.DataFrame({"Sex": ["M", "F", "F", "M"]})
+    eval_df = make_eval_df(df_test=df, protected=("Sex",),
+                           y_pred=[1, 0, 1, 1], y_true=[1, 1, 0, 1],
+                           compact=True)
+    subject_labels, predictions, true_statuses = \
+        unpack_eval_df_arrays(eval_df)
+
+    assert isinstance(subject_labels, pd.Categorical)
+    assert predictions.dtype == np.int8
+    assert np.shares_memory(predictions, eval_df["y_pred"].to_numpy())
+    assert group_acc("Sex=M", subject_labels, predictions,
+                     true_statuses) == pytest.approx(1.0)
+
+    eval_df["y_true"] = [0, 2, 1, 0]
+    with pytest.raises(ValueError, match="0/1"):
+        unpack_eval_df_arrays(eval_df)
+    # int8 columns are checked too, not just passed through
+    eval_df["y_true"] = np.array([0, 1, 1, 0], dtype=np.int8)
+    eval_df["y_pred"] = np.array([1, -1, 0, 1], dtype=np.int8)
+    with pytest.raises(ValueError, match="0/1"):
+        unpack_eval_df_arrays(eval_df)
+
+
+def test_make_eval_df_compact_keeps_probability_scores():
+    df = pd.DataFrame({"Sex": ["M", "F"]})
+    eval_df = make_eval_df(df_test=df, protected=("Sex",),
+                           y_pred=[0.2, 0.9], y_true=[0, 1], compact=True)
+    assert eval_df["y_pred"].tolist() == [0.2, 0.9]
+
+
 # -----------------------
 # metrics.py tests
 # -----------------------
@@ -140,3 +257,47 @@ def test_metrics_group_acc_diff_ratio_and_absent_group_nan():
     # absent group -> NaN
     acc_c = group_acc("C", subject_labels, y_pred, y_true)
     assert np.isnan(acc_c)
+
+
+# -----------------------
+# pipeline.py tests
+# -----------------------
+
+class _RecordingModel:
+    def fit(self, X, y, sample_weight=None):
+        self.sample_weight = sample_weight
+        return self
+
+    def predict(self, X):
+        return np.zeros(len(X), dtype=int)
+
+
+def test_pipeline_sample_weight_is_aligned_to_train_rows(tmp_path):
+    from fairness.utils.pipeline import run_demo_pipeline
+
+    rng = np.random.default_rng(0)
+    p = tmp_path / "data.csv"
+    pd.DataFrame({"x": rng.random(40), "Sex": ["M", "F"] * 20,
+                  "y": [0, 1, 1, 0] * 10}).to_csv(p, index=False)
+    kwargs = dict(csv_path=p, target_col="y", protected_cols=["Sex"],
+                  stratify=False)
+
+    weights = pd.Series(np.arange(40, dtype=float))
+    result = run_demo_pipeline(model=_RecordingModel(), sample_weight=weights,
+                               **kwargs)
+    train_index = result.split.X_train.index
+    assert result.model.sample_weight.tolist() == train_index.tolist()
+
+    # fitted on the training rows only
+    seen = []
+    run_demo_pipeline(model=_RecordingModel(),
+                      sample_weight=lambda df: seen.append(df.index)
+                      or Reweighing(["Sex"], "y").fit_transform(df),
+                      **kwargs)
+    assert seen[0].tolist() == train_index.tolist()
+
+    # a train-length Series with another index is rejected, not misaligned
+    with pytest.raises(ValueError, match="no weight"):
+        run_demo_pipeline(model=_RecordingModel(),
+                          sample_weight=pd.Series(np.ones(len(train_index))),
+                          **kwargs)
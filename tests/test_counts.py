@@ -0,0 +1,236 @@
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fairness.counts import (
+    GroupCounts, IntersectCounts, confusion_counts, factorize_labels,
+    max_diff_and_ratio, merge_counts, mixed_radix_codes, outcome_codes,
+    rates_from_counts
+)
+from fairness.metrics import all_intersect_fnrs, group_acc, group_fdr, \
+    group_fnr, group_for, group_fpr, intersect_fnr
+
+
+def _brute_force_rate(metric, group, labels, y_pred, y_true):
+    rows = [(p, t) for lab, p, t in zip(labels, y_pred, y_true)
+            if lab == group]
+    if metric == "acc":
+        sel = rows
+    elif metric == "fnr":
+        sel = [r for r in rows if r[1] == 1]
+    elif metric == "fpr":
+        sel = [r for r in rows if r[1] == 0]
+    elif metric == "for":
+        sel = [r for r in rows if r[0] == 0]
+    else:
+        sel = [r for r in rows if r[0] == 1]
+    if not sel:
+        return np.nan
+    correct = sum(p == t for p, t in sel)
+    if metric == "acc":
+        return correct / len(sel)
+    return (len(sel) - correct) / len(sel)
+
+
+def test_outcome_codes_order_is_tn_fp_fn_tp():
+    codes = outcome_codes([0, 1, 0, 1], [0, 0, 1, 1])
+    assert codes.tolist() == [0, 1, 2, 3]
+    assert codes.dtype == np.int8
+
+
+def test_outcome_codes_length_mismatch():
+    with pytest.raises(ValueError):
+        outcome_codes([0, 1], [0])
+
+
+def test_confusion_counts_ignores_missing_codes():
+    codes = np.array([0, 0, 1, -1])
+    outcomes = np.array([3, 0, 1, 2], dtype=np.int8)
+    counts = confusion_counts(codes, outcomes, 2)
+    assert counts.tolist() == [[1, 0, 0, 1], [0, 1, 0, 0]]
+
+
+def test_factorize_labels_accepts_categorical():
+    labels = pd.Categorical(["b", "a", "b"])
+    codes, uniques = factorize_labels(labels)
+    assert [uniques[c] for c in codes] == ["b", "a", "b"]
+
+
+def test_rates_from_counts_nan_on_empty_denominator():
+    rates = rates_from_counts(np.array([[0, 0, 0, 0], [1, 1, 0, 2]]), "fdr")
+    assert np.isnan(rates[0])
+    assert rates[1] == pytest.approx(1 / 3)
+
+
+def test_group_counts_match_brute_force():
+    rng = np.random.default_rng(0)
+    labels = rng.choice(["A", "B", "C"], size=200).tolist()
+    y_pred = rng.integers(0, 2, size=200).tolist()
+    y_true = rng.integers(0, 2, size=200).tolist()
+
+    table = GroupCounts.from_labels(labels, y_pred, y_true)
+    for metric, fn in [("acc", group_acc), ("fnr", group_fnr),
+                       ("fpr", group_fpr), ("for", group_for),
+                       ("fdr", group_fdr)]:
+        for group in ["A", "B", "C", "D"]:
+            expected = _brute_force_rate(metric, group, labels,
+                                         y_pred, y_true)
+            got = fn(group, labels, y_pred, y_true)
+            np.testing.assert_allclose(got, expected)
+            np.testing.assert_allclose(table.rate(group, metric), expected)
+
+
+def test_group_counts_unknown_metric():
+    table = GroupCounts.from_labels(["A"], [1], [1])
+    with pytest.raises(ValueError, match="Unknown metric"):
+        table.rates("tpr")
+
+
+def test_mixed_radix_codes_follow_product_order():
+    codes = [np.array([0, 1, 1, -1]), np.array([2, 0, 2, 1])]
+    cells = mixed_radix_codes(codes, (2, 3))
+    assert cells.tolist() == [2, 3, 5, -1]
+
+
+def test_intersect_counts_cells_in_product_order():
+    subject_labels_dict = {
+        "Sex": ["M", "F", "F", "M"],
+        "age_group": ["young", "older", "young", "young"],
+    }
+    table = IntersectCounts.from_labels(subject_labels_dict,
+                                        [1, 0, 1, 1], [1, 1, 0, 1])
+    expected = [" + ".join(combo) for combo in
+                product(["F", "M"], ["older", "young"])]
+    assert table.names() == expected
+    assert table.support.tolist() == [1, 1, 0, 2]
+    assert table.counts[3].tolist() == [0, 0, 0, 2]
+
+
+def test_all_intersect_fnrs_match_intersect_fnr():
+    rng = np.random.default_rng(1)
+    n = 300
+    subject_labels_dict = {
+        "Sex": rng.choice(["M", "F"], size=n).tolist(),
+        "age_group": rng.choice(["young", "mid", "older"], size=n).tolist(),
+        "region": rng.integers(0, 3, size=n).tolist(),
+    }
+    y_pred = rng.integers(0, 2, size=n).tolist()
+    y_true = rng.integers(0, 2, size=n).tolist()
+
+    fnrs = all_intersect_fnrs(subject_labels_dict, y_pred, y_true)
+    assert len(fnrs) == 2 * 3 * 3
+    for sex, age, region in product(["F", "M"], ["mid", "older", "young"],
+                                     [0, 1, 2]):
+        expected = intersect_fnr({"Sex": sex, "age_group": age,
+                                  "region": region},
+                                 subject_labels_dict, y_pred, y_true)
+        got = fnrs[f"{sex} + {age} + {region}"]
+        np.testing.assert_allclose(got, expected)
+
+
+def _shards(n=500, seed=2):
+    rng = np.random.default_rng(seed)
+    subject_labels_dict = {
+        "Sex": rng.choice(["M", "F"], size=n),
+        "age_group": rng.choice(["young", "mid", "older"], size=n),
+        "region": rng.integers(0, 5, size=n),
+    }
+    y_pred = rng.integers(0, 2, size=n)
+    y_true = rng.integers(0, 2, size=n)
+    # sort so that shards see different level sets
+    order = np.argsort(subject_labels_dict["region"], kind="stable")
+    subject_labels_dict = {k: v[order] for k, v in
+                           subject_labels_dict.items()}
+    return subject_labels_dict, y_pred[order], y_true[order]
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_merge_counts_matches_whole_table(sparse):
+    labels_dict, y_pred, y_true = _shards()
+    whole = IntersectCounts.from_labels(labels_dict, y_pred, y_true,
+                                        sparse=sparse)
+    bounds = [0, 90, 260, 500]
+    parts = [IntersectCounts.from_labels(
+                 {k: v[a:b] for k, v in labels_dict.items()},
+                 y_pred[a:b], y_true[a:b], sparse=sparse)
+             for a, b in zip(bounds[:-1], bounds[1:])]
+
+    merged = merge_counts(parts)
+    assert merged.levels == whole.levels
+    assert merged.names() == whole.names()
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    np.testing.assert_array_equal(
+        parts[2].merge(parts[0]).merge(parts[1]).counts, whole.counts)
+
+
+def test_merge_counts_rejects_other_categories():
+    a = IntersectCounts.from_labels({"Sex": ["F"]}, [1], [1])
+    b = IntersectCounts.from_labels({"age": ["old"]}, [1], [1])
+    with pytest.raises(ValueError, match="categories"):
+        a.merge(b)
+
+
+def test_intersect_counts_bytes_round_trip():
+    labels_dict, y_pred, y_true = _shards()
+    table = IntersectCounts.from_labels(labels_dict, y_pred, y_true,
+                                        sparse=True)
+    data = table.to_bytes()
+    restored = IntersectCounts.from_bytes(data)
+
+    assert restored.categories == table.categories
+    assert restored.levels == table.levels
+    np.testing.assert_array_equal(restored.cells, table.cells)
+    np.testing.assert_array_equal(restored.counts, table.counts)
+    assert len(data) < table.cells.nbytes + table.counts.nbytes
+
+    with pytest.raises(ValueError):
+        IntersectCounts.from_bytes(b"not a table")
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_marginal_matches_table_over_fewer_categories(sparse):
+    labels_dict, y_pred, y_true = _shards()
+    table = IntersectCounts.from_labels(labels_dict, y_pred, y_true,
+                                        sparse=sparse)
+    for keep in (["Sex"], ["region", "Sex"], list(labels_dict), []):
+        expected = IntersectCounts.from_labels(
+            {category: labels_dict[category] for category in keep},
+            y_pred, y_true, sparse=sparse)
+        marginal = table.marginal(keep)
+        assert marginal.categories == expected.categories
+        assert marginal.names() == expected.names()
+        assert np.array_equal(marginal.counts, expected.counts)
+
+    with pytest.raises(KeyError):
+        table.marginal(["site"])
+
+
+def test_max_diff_and_ratio_follow_metric_semantics():
+    counts = np.array([[[1, 0, 0, 1], [0, 0, 0, 0]],
+                       [[1, 0, 0, 3], [2, 0, 0, 0]]])
+    _, diff, ratio = max_diff_and_ratio(counts, "acc", natural_log=False)
+    # an empty group makes the first table undefined
+    assert np.isnan(diff[0]) and diff[1] == 0.0
+    assert ratio[1] == 1.0
+
+    _, diff, _ = max_diff_and_ratio(counts, "fnr", min_support=1)
+    assert diff[1] == 0.0
+
+
+def test_max_diff_and_ratio_keeps_the_supported_rates():
+    # weighted counts: min_support below 1 keeps the light cell
+    table = IntersectCounts(categories=("s",), levels=(["a", "b", "c"],),
+                            cells=np.array([[0], [1], [2]]),
+                            counts=np.array([[0.0, 0.0, 0.5, 0.3],
+                                             [0.0, 0.0, 1.0, 3.0],
+                                             [0.0, 0.0, 0.0, 0.0]]))
+    for min_support in (None, 0.5, 1, 5):
+        rates = table.supported_rates("fnr", min_support=min_support)
+        _, diff, _ = max_diff_and_ratio(table.counts[None], "fnr",
+                                        min_support)
+        if len(rates) == 0 or np.isnan(rates).any():
+            assert np.isnan(diff[0])
+        else:
+            assert diff[0] == pytest.approx(rates.max() - rates.min())
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fairness import metrics, single_metrics
+from fairness.frame import FairnessFrame
+
+METRICS = [("acc", "accs"), ("fnr", "fnrs"), ("fpr", "fprs"),
+           ("for", "fors"), ("fdr", "fdrs")]
+
+
+LEVELS = {"Sex": ["M", "F"], "age_group": ["young", "older"],
+          "region": ["N", "S", "E"]}
+
+
+def _demo_inputs(make_inputs, n=200, seed=0):
+    subject_labels_dict, y_pred, y_true = make_inputs(n, seed=seed,
+                                                      levels=LEVELS)
+    subject_labels = [f"Sex={s}|age_group={a}" for s, a in
+                      zip(subject_labels_dict["Sex"],
+                          subject_labels_dict["age_group"])]
+    return subject_labels, subject_labels_dict, y_pred, y_true
+
+
+def _same(a, b):
+    if np.isnan(a):
+        return np.isnan(b)
+    return a == pytest.approx(b)
+
+
+def test_frame_methods_match_metric_functions(make_inputs):
+    labels, labels_dict, y_pred, y_true = _demo_inputs(make_inputs)
+    frame = FairnessFrame(y_pred, y_true, subject_labels=labels,
+                          subject_labels_dict=labels_dict)
+    groups = sorted(set(labels)) + ["absent"]
+    group_spec = {"Sex": "F", "region": "S"}
+
+    for m, plural in METRICS:
+        fn = getattr(metrics, f"group_{m}")
+        for g in groups:
+            assert _same(getattr(frame, f"group_{m}")(g),
+                         fn(g, labels, y_pred, y_true))
+        a, b = groups[0], groups[1]
+        assert _same(getattr(frame, f"group_{m}_diff")(a, b),
+                     getattr(metrics, f"group_{m}_diff")(
+                         a, b, labels, y_pred, y_true))
+        assert _same(getattr(frame, f"group_{m}_ratio")(a, b),
+                     getattr(metrics, f"group_{m}_ratio")(
+                         a, b, labels, y_pred, y_true))
+        assert _same(getattr(frame, f"intersect_{m}")(group_spec),
+                     getattr(metrics, f"intersect_{m}")(
+                         group_spec, labels_dict, y_pred, y_true))
+        for sparse in (False, True):
+            assert getattr(frame, f"all_intersect_{plural}")(sparse) == \
+                getattr(metrics, f"all_intersect_{plural}")(
+                    labels_dict, y_pred, y_true, sparse=sparse)
+        assert _same(getattr(frame, f"max_intersect_{m}_diff")(),
+                     getattr(metrics, f"max_intersect_{m}_diff")(
+                         labels_dict, y_pred, y_true))
+        assert _same(getattr(frame, f"max_intersect_{m}_ratio")(
+                         natural_log=False, min_support=1),
+                     getattr(metrics, f"max_intersect_{m}_ratio")(
+                         labels_dict, y_pred, y_true, natural_log=False,
+                         min_support=1))
+
+
+def test_frame_single_metrics_match(make_inputs):
+    labels, labels_dict, y_pred, y_true = _demo_inputs(make_inputs)
+    frame = FairnessFrame(y_pred, y_true, subject_labels_dict=labels_dict)
+    sex = labels_dict["Sex"]
+    assert frame.calculate_EOD("M", category="Sex") == pytest.approx(
+        single_metrics.calculate_EOD(y_true, y_pred, sex, "M"))
+    assert frame.calculate_AOD("M", category="Sex") == pytest.approx(
+        single_metrics.calculate_AOD(y_true, y_pred, sex, "M"))
+    assert frame.calculate_DI("M", category="Sex") == pytest.approx(
+        single_metrics.calculate_DI(y_pred, sex, "M"))
+
+
+def test_frame_from_eval_df_and_caching(make_inputs):
+    labels, _, y_pred, y_true = _demo_inputs(make_inputs)
+    eval_df = pd.DataFrame({"subject_label": labels, "y_pred": y_pred,
+                            "y_true": y_true})
+    frame = FairnessFrame.from_eval_df(eval_df)
+    assert frame.y_pred.dtype == np.int8
+    assert frame.group_counts is frame.group_counts
+    assert _same(frame.group_acc(labels[0]),
+                 metrics.group_acc(labels[0], labels, y_pred, y_true))
+    with pytest.raises(ValueError, match="subject_labels_dict"):
+        frame.all_intersect_accs()
+
+
+def test_frame_requires_labels():
+    with pytest.raises(ValueError):
+        FairnessFrame([1, 0], [1, 0])
+
+
+def test_frame_single_metrics_use_subject_labels(make_inputs):
+    labels, _, y_pred, y_true = _demo_inputs(make_inputs)
+    frame = FairnessFrame(y_pred, y_true, subject_labels=labels)
+    privileged = labels[0]
+    assert frame.calculate_AOD(privileged) == pytest.approx(
+        single_metrics.calculate_AOD(y_true, y_pred, labels, privileged))
+    with pytest.raises(ValueError, match="not found"):
+        frame.calculate_EOD("no such group")
+
+
+def test_frame_by_group_matches_function(make_inputs):
+    _, labels_dict, y_pred, y_true = _demo_inputs(make_inputs)
+    frame = FairnessFrame(y_pred, y_true, subject_labels_dict=labels_dict)
+    ages = labels_dict["age_group"]
+    privileged = sorted(set(ages))[0]
+    got = frame.calculate_EOD_AOD_DI_by_group(
+        privileged, category="age_group", pooled=True)
+    expected = single_metrics.calculate_EOD_AOD_DI_by_group(
+        y_true, y_pred, ages, privileged, pooled=True)
+    assert got.keys() == expected.keys()
+    for group, values in expected.items():
+        for name, value in values.items():
+            assert _same(got[group][name], value)
+
+
+def test_weighted_frame_matches_weighted_functions(make_inputs):
+    labels, labels_dict, y_pred, y_true = _demo_inputs(make_inputs)
+    weights = np.random.default_rng(1).random(len(y_pred)) * 3
+    frame = FairnessFrame(y_pred, y_true, subject_labels=labels,
+                          subject_labels_dict=labels_dict,
+                          sample_weight=weights)
+
+    assert _same(frame.group_fpr_diff(labels[0], labels[1]),
+                 metrics.group_fpr_diff(labels[0], labels[1], labels, y_pred,
+                                        y_true, sample_weight=weights))
+    assert _same(frame.max_intersect_for_ratio(),
+                 metrics.max_intersect_for_ratio(labels_dict, y_pred, y_true,
+                                                 sample_weight=weights))
+    assert frame.calculate_AOD(labels[0]) == pytest.approx(
+        single_metrics.calculate_AOD(y_true, y_pred, labels, labels[0],
+                                     sample_weight=weights))
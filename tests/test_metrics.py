@@ -5,8 +5,10 @@ import pytest
 from fairness.metrics import (
     group_acc, group_acc_ratio, group_acc_diff,
     group_fnr, group_fpr, group_for, group_fdr,
-    group_fnr_ratio, intersect_acc, max_intersect_acc_ratio
+    group_fnr_ratio, intersect_acc, max_intersect_acc_ratio,
+    all_intersect_accs, max_intersect_acc_diff, max_intersect_fnr_diff
 )
+from fairness import metrics
 
 
 def test_perfect_predictions_all_core_rates():
@@ -121,3 +123,159 @@ def test_max_intersect_acc_ratio_nan_if_any_zero_accuracy():
     assert np.isnan(max_intersect_acc_ratio(subject_labels_dict,
                                             y_pred, y_true,
                                             natural_log=True))
+
+
+def test_all_intersect_sparse_only_has_observed_groups():
+    subject_labels_dict = {
+        "Sex":      ["M", "M", "F", "F"],
+        "age_group": ["young", "young", "older", "older"],
+    }
+    y_true = [1, 0, 1, 0]
+    y_pred = [1, 1, 1, 0]
+
+    dense = all_intersect_accs(subject_labels_dict, y_pred, y_true)
+    sparse = all_intersect_accs(subject_labels_dict, y_pred, y_true,
+                                sparse=True)
+    assert len(dense) == 4
+    assert sparse == {"F + older": 1.0, "M + young": 0.5}
+
+    # Dense mode has empty groups, so the max diff collapses to NaN
+    assert np.isnan(max_intersect_acc_diff(subject_labels_dict,
+                                           y_pred, y_true))
+    assert max_intersect_acc_diff(subject_labels_dict, y_pred, y_true,
+                                  sparse=True) == pytest.approx(0.5)
+
+
+def test_max_intersect_min_support_skips_small_groups():
+    subject_labels_dict = {
+        "Sex":      ["M", "M", "M", "F", "F"],
+        "age_group": ["young", "young", "young", "older", "young"],
+    }
+    y_true = [1, 1, 0, 1, 1]
+    y_pred = [0, 1, 0, 1, 1]
+
+    # F + older and F + young have 1 positive each, M + older has none.
+    assert np.isnan(max_intersect_fnr_diff(subject_labels_dict,
+                                           y_pred, y_true))
+    assert max_intersect_fnr_diff(subject_labels_dict, y_pred, y_true,
+                                  min_support=1) == pytest.approx(0.5)
+    assert max_intersect_fnr_diff(subject_labels_dict, y_pred, y_true,
+                                  min_support=2) == pytest.approx(0.0)
+    assert np.isnan(max_intersect_fnr_diff(subject_labels_dict,
+                                           y_pred, y_true, min_support=3))
+
+
+def test_sparse_mode_handles_huge_cartesian_products():
+    rng = np.random.default_rng(0)
+    n = 500
+    # 25 attributes with 10 levels each: 10**25 possible combinations
+    subject_labels_dict = {f"attr_{i:02d}": rng.integers(0, 10, n).tolist()
+                           for i in range(25)}
+    y_true = rng.integers(0, 2, n).tolist()
+    y_pred = rng.integers(0, 2, n).tolist()
+
+    accs = all_intersect_accs(subject_labels_dict, y_pred, y_true,
+                              sparse=True)
+    assert 0 < len(accs) <= n
+    assert all(0.0 <= v <= 1.0 for v in accs.values())
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_parallel_all_intersect_matches_serial(sparse):
+    rng = np.random.default_rng(5)
+    n = 3000
+    subject_labels_dict = {
+        "Sex": rng.choice(["M", "F"], size=n).tolist(),
+        "age_group": rng.choice(["young", "mid", "older"], size=n).tolist(),
+        "region": rng.integers(0, 6, size=n).tolist(),
+    }
+    y_pred = rng.integers(0, 2, size=n).tolist()
+    y_true = rng.integers(0, 2, size=n).tolist()
+
+    serial = all_intersect_accs(subject_labels_dict, y_pred, y_true,
+                                sparse=sparse)
+    parallel = all_intersect_accs(subject_labels_dict, y_pred, y_true,
+                                  sparse=sparse, n_jobs=2, chunk_size=700)
+    assert parallel.keys() == serial.keys()
+    np.testing.assert_array_equal(list(parallel.values()),
+                                  list(serial.values()))
+    assert max_intersect_fnr_diff(subject_labels_dict, y_pred, y_true,
+                                  sparse=sparse, n_jobs=2,
+                                  chunk_size=1000) == \
+        max_intersect_fnr_diff(subject_labels_dict, y_pred, y_true,
+                               sparse=sparse)
+
+
+def test_integer_weights_match_duplicated_rows():
+    rng = np.random.default_rng(3)
+    n = 300
+    labels_dict = {"Sex": rng.choice(["M", "F"], size=n),
+                   "age": rng.choice(["young", "older"], size=n)}
+    labels = np.char.add(labels_dict["Sex"], labels_dict["age"])
+    y_pred = rng.integers(0, 2, size=n)
+    y_true = rng.integers(0, 2, size=n)
+    weights = rng.integers(0, 5, size=n)
+
+    rows = np.repeat(np.arange(n), weights)
+    expanded = {k: v[rows] for k, v in labels_dict.items()}
+
+    assert group_fnr_ratio("Molder", "Fyoung", labels,
+                           y_pred, y_true, sample_weight=weights) == \
+        pytest.approx(group_fnr_ratio("Molder", "Fyoung", labels[rows],
+                                      y_pred[rows], y_true[rows]))
+    assert intersect_acc({"Sex": "F"}, labels_dict, y_pred, y_true,
+                         sample_weight=weights) == pytest.approx(
+        intersect_acc({"Sex": "F"}, expanded, y_pred[rows], y_true[rows]))
+    assert all_intersect_accs(labels_dict, y_pred, y_true,
+                              sample_weight=weights) == pytest.approx(
+        all_intersect_accs(expanded, y_pred[rows], y_true[rows]))
+    for n_jobs in (1, 2):
+        assert max_intersect_fnr_diff(
+            labels_dict, y_pred, y_true, min_support=5, n_jobs=n_jobs,
+            sample_weight=weights) == pytest.approx(
+            max_intersect_fnr_diff(expanded, y_pred[rows], y_true[rows],
+                                   min_support=5))
+
+    with pytest.raises(ValueError, match="sample_weight"):
+        group_acc("Molder", labels, y_pred, y_true,
+                  sample_weight=-weights - 1)
+
+
+@pytest.mark.parametrize("metric", ["acc", "fnr", "fpr", "for", "fdr"])
+def test_pairwise_group_metric_matches_pair_functions(metric):
+    # group D has only negatives (undefined FNR), group C a zero error rate
+    labels = ["A"] * 6 + ["B"] * 6 + ["C"] * 4 + ["D"] * 3
+    y_true = [1, 1, 0, 0, 1, 0, 1, 0, 1, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0]
+    y_pred = [1, 0, 0, 1, 1, 0, 0, 0, 1, 1, 1, 0, 1, 0, 1, 0, 1, 0, 0]
+    groups = ["A", "B", "C", "D"]
+
+    for kind in ("diff", "ratio"):
+        pair_fn = getattr(metrics, f"group_{metric}_{kind}")
+        for natural_log in (True, False):
+            matrix = metrics.pairwise_group_metric(
+                labels, y_pred, y_true, metric, kind, natural_log=natural_log)
+            assert list(matrix.index) == groups
+            for a in groups:
+                for b in groups:
+                    kwargs = {} if kind == "diff" else \
+                        {"natural_log": natural_log}
+                    expected = pair_fn(a, b, labels, y_pred, y_true,
+                                       **kwargs)
+                    assert matrix.loc[a, b] == pytest.approx(expected,
+                                                             nan_ok=True)
+
+
+def test_pairwise_intersect_metric_spans_all_intersect_rates():
+    subject_labels_dict = {"Sex": ["F", "F", "M", "M", "M"],
+                           "age": ["old", "young", "old", "old", "young"]}
+    y_true = [1, 0, 1, 0, 1]
+    y_pred = [1, 1, 0, 0, 1]
+    rates = all_intersect_accs(subject_labels_dict, y_pred, y_true)
+    matrix = metrics.pairwise_intersect_metric(subject_labels_dict, y_pred,
+                                               y_true, "acc")
+    assert list(matrix.index) == list(rates)
+    assert np.nanmax(matrix.to_numpy()) == pytest.approx(
+        max_intersect_acc_diff(subject_labels_dict, y_pred, y_true))
+
+    with pytest.raises(ValueError):
+        metrics.pairwise_group_metric(["A"], [1], [1], kind="log")
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from fairness import metrics
+from fairness.multiclass import (multiclass_intersect_counts,
+                                 multilabel_intersect_counts)
+
+CLASSES = ["low", "medium", "high", "urgent"]
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_one_vs_rest_matches_binary_metrics(make_inputs, sparse):
+    subject_labels_dict, y_pred, y_true = make_inputs(
+        1200, classes=CLASSES, accuracy=0.6)
+    table = multiclass_intersect_counts(subject_labels_dict, y_pred, y_true,
+                                        sparse=sparse)
+    assert table.classes == ["high", "low", "medium", "urgent"]
+    assert table.confusion.sum() == len(y_true)
+
+    for k, label in enumerate(table.classes):
+        binary = (y_pred == label, y_true == label)
+        for metric, all_fn, diff_fn in [
+            ("fnr", metrics.all_intersect_fnrs,
+             metrics.max_intersect_fnr_diff),
+            ("fpr", metrics.all_intersect_fprs,
+             metrics.max_intersect_fpr_diff),
+        ]:
+            expected = all_fn(subject_labels_dict, *binary, sparse=sparse)
+            assert table.class_table(label).to_dict(metric) == \
+                pytest.approx(expected, nan_ok=True)
+            assert dict(zip(table.names(), table.rates(metric)[:, k])) == \
+                pytest.approx(expected, nan_ok=True)
+            assert table.max_diff(metric)[k] == pytest.approx(
+                diff_fn(subject_labels_dict, *binary, sparse=sparse))
+
+
+def test_macro_and_micro_averages(make_inputs):
+    subject_labels_dict, y_pred, y_true = make_inputs(
+        1200, classes=CLASSES, accuracy=0.6)
+    table = multiclass_intersect_counts(subject_labels_dict, y_pred, y_true)
+
+    per_class = table.rates("fdr")
+    assert np.allclose(table.rates("fdr", "macro"), per_class.mean(axis=1))
+    # every error is a false negative of exactly one class, so the micro
+    # FNR is the multiclass error rate
+    assert np.allclose(table.rates("fnr", "micro"), 1 - table.accuracy())
+    assert list(table.to_dict("fnr", "micro")) == table.names()
+    macro = table.rates("fdr", "macro")
+    assert table.max_diff("fdr", "macro") == pytest.approx(
+        macro.max() - macro.min())
+
+    with pytest.raises(ValueError):
+        table.rates("fnr", "weighted")
+    with pytest.raises(ValueError):
+        table.to_dict("fnr", None)
+
+
+def test_macro_skips_undefined_classes():
+    subject_labels_dict = {"Sex": ["F", "F", "M", "M"]}
+    # F has no true "b" and M no true "a", so those FNRs are undefined
+    table = multiclass_intersect_counts(subject_labels_dict,
+                                        ["a", "a", "b", "a"],
+                                        ["a", "a", "b", "b"])
+    assert np.isnan(table.rates("fnr")[0, 1])
+    assert np.isnan(table.rates("fnr")[1, 0])
+    assert table.to_dict("fnr") == {"F": 0.0, "M": 0.5}
+    assert np.isnan(table.rates("fnr", "macro", min_support=3)).all()
+    assert table.max_diff("fnr", "macro") == pytest.approx(0.5)
+
+
+def test_weights_and_invalid_labels(make_inputs):
+    subject_labels_dict, y_pred, y_true = make_inputs(
+        300, classes=CLASSES, accuracy=0.6)
+    weights = np.random.default_rng(1).integers(0, 4, size=len(y_true))
+    weighted = multiclass_intersect_counts(subject_labels_dict, y_pred, y_true,
+                                           sample_weight=weights)
+    repeated = multiclass_intersect_counts(
+        {k: np.repeat(v, weights) for k, v in subject_labels_dict.items()},
+        np.repeat(y_pred, weights), np.repeat(y_true, weights))
+    assert np.array_equal(weighted.confusion, repeated.confusion)
+
+    with pytest.raises(ValueError):
+        multiclass_intersect_counts(subject_labels_dict, y_pred, y_true,
+                                    classes=["low", "high"])
+
+
+def test_multilabel_matches_binary_metrics(make_inputs):
+    rng = np.random.default_rng(2)
+    subject_labels_dict, _, _ = make_inputs(
+        500, classes=CLASSES, accuracy=0.6)
+    y_true = rng.random((500, 3)) < 0.4
+    y_pred = rng.random((500, 3)) < 0.4
+    table = multilabel_intersect_counts(subject_labels_dict, y_pred, y_true,
+                                        labels=["x", "y", "z"])
+
+    for k, label in enumerate(["x", "y", "z"]):
+        expected = metrics.all_intersect_fors(subject_labels_dict,
+                                              y_pred[:, k], y_true[:, k])
+        assert table.class_table(label).to_dict("for") == \
+            pytest.approx(expected, nan_ok=True)
+    assert table.to_frame("acc").shape == (6, 3)
+
+    with pytest.raises(ValueError):
+        multilabel_intersect_counts(subject_labels_dict, y_pred[:, :2], y_true)
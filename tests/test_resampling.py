@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+
+from fairness import metrics
+from fairness.counts import IntersectCounts
+from fairness.resampling import (bootstrap_counts, bootstrap_intersect,
+                                 permutation_test_counts,
+                                 permutation_test_group_diff,
+                                 replicate_counts)
+
+LEVELS = {"Sex": ["M", "F"], "age_group": ["young", "older"]}
+
+
+def test_estimates_match_metric_functions(make_inputs):
+    labels_dict, y_pred, y_true = make_inputs(2000, levels=LEVELS)
+    result = bootstrap_intersect(labels_dict, y_pred, y_true, "fnr",
+                                 n_boot=300, random_state=0)
+
+    expected = metrics.all_intersect_fnrs(labels_dict, y_pred, y_true)
+    assert result.names == list(expected)
+    np.testing.assert_allclose(result.rates, list(expected.values()))
+    assert result.max_diff == pytest.approx(
+        metrics.max_intersect_fnr_diff(labels_dict, y_pred, y_true))
+    assert result.max_ratio == pytest.approx(
+        metrics.max_intersect_fnr_ratio(labels_dict, y_pred, y_true))
+
+    lower, upper = result.max_diff_interval
+    assert lower <= result.max_diff <= upper
+    assert np.all(result.rate_intervals[:, 0] <= result.rates)
+    assert np.all(result.rates <= result.rate_intervals[:, 1])
+    assert result.rate_samples.shape == (300, 4)
+
+
+def test_seeded_results_do_not_depend_on_n_jobs(make_inputs):
+    labels_dict, y_pred, y_true = make_inputs(500, seed=1, levels=LEVELS)
+    table = IntersectCounts.from_labels(labels_dict, y_pred, y_true)
+    serial = bootstrap_counts(table, "acc", n_boot=250, batch_size=100,
+                              random_state=7)
+    parallel = bootstrap_counts(table, "acc", n_boot=250, batch_size=100,
+                                n_jobs=2, random_state=7)
+    np.testing.assert_array_equal(serial.rate_samples,
+                                  parallel.rate_samples)
+    np.testing.assert_array_equal(serial.max_diff_samples,
+                                  parallel.max_diff_samples)
+
+
+def test_seed_sequence_can_be_reused(make_inputs):
+    labels_dict, y_pred, y_true = make_inputs(500, seed=1, levels=LEVELS)
+    table = IntersectCounts.from_labels(labels_dict, y_pred, y_true)
+    seed = np.random.SeedSequence(11)
+    first = bootstrap_counts(table, "fnr", n_boot=200, random_state=seed)
+    second = bootstrap_counts(table, "fnr", n_boot=200, random_state=seed)
+    np.testing.assert_array_equal(first.rate_intervals,
+                                  second.rate_intervals)
+    assert first.max_diff_interval == second.max_diff_interval
+
+    kwargs = dict(n_permutations=500, early_stop=False, random_state=seed)
+    assert permutation_test_counts([40, 10, 12, 38], [30, 20, 15, 35], "fpr",
+                                   **kwargs) == \
+        permutation_test_counts([40, 10, 12, 38], [30, 20, 15, 35], "fpr",
+                                **kwargs)
+
+@pytest.mark.parametrize("method", ["multinomial", "poisson"])
+def test_replicate_counts(method):
+    counts = np.array([[5, 0, 3, 2], [0, 0, 0, 0], [1, 1, 1, 1]])
+    reps = replicate_counts(counts, 50, np.random.default_rng(0), method)
+    assert reps.shape == (50, 3, 4)
+    # empty buckets stay empty
+    assert np.all(reps[:, 1] == 0) and np.all(reps[:, 0, 1] == 0)
+    if method == "multinomial":
+        assert np.all(reps.sum(axis=(1, 2)) == counts.sum())
+
+
+def test_bootstrap_rejects_bad_arguments(make_inputs):
+    labels_dict, y_pred, y_true = make_inputs(50, levels=LEVELS)
+    with pytest.raises(ValueError, match="method"):
+        bootstrap_intersect(labels_dict, y_pred, y_true, method="jackknife")
+    with pytest.raises(ValueError, match="confidence"):
+        bootstrap_intersect(labels_dict, y_pred, y_true, confidence=95)
+
+
+def test_permutation_test_matches_group_diff(make_inputs):
+    subject_labels_dict, predictions, true_statuses = make_inputs(
+        2000, levels=LEVELS)
+    labels = subject_labels_dict["Sex"]
+    result = permutation_test_group_diff("F", "M", labels, predictions,
+                                         true_statuses, "fnr",
+                                         n_permutations=2000, random_state=0)
+    expected = metrics.group_fnr_diff("F", "M", labels, predictions,
+                                      true_statuses)
+    assert result.statistic == pytest.approx(expected)
+    assert 0 < result.p_value <= 1
+    assert result.n_permutations <= 2000
+
+
+def test_permutation_test_is_reproducible_and_stops_early():
+    kwargs = dict(n_permutations=4000, batch_size=500, random_state=3)
+    full = permutation_test_counts([40, 10, 12, 38], [30, 20, 15, 35], "fpr",
+                                   early_stop=False, **kwargs)
+    assert full.n_permutations == 4000 and not full.stopped_early
+    assert full == permutation_test_counts(
+        [40, 10, 12, 38], [30, 20, 15, 35], "fpr", early_stop=False,
+        n_jobs=2, **kwargs)
+
+    # identical groups: p-value is clearly above alpha after one batch
+    null = permutation_test_counts([50, 50, 50, 50], [50, 50, 50, 50], "acc",
+                                   **kwargs)
+    assert null.stopped_early and null.n_permutations == 500
+    assert not null.significant
+
+    # a large gap is clearly below alpha
+    gap = permutation_test_counts([90, 10, 10, 90], [50, 50, 50, 50], "acc",
+                                  **kwargs)
+    assert gap.stopped_early and gap.significant
+
+
+def test_permutation_test_undefined_statistic():
+    result = permutation_test_counts([0, 0, 5, 5], [5, 5, 5, 5], "fpr",
+                                     random_state=0)
+    assert np.isnan(result.statistic) and np.isnan(result.p_value)
+    with pytest.raises(ValueError, match="n_permutations"):
+        permutation_test_counts([1, 1, 1, 1], [1, 1, 1, 1], "acc",
+                                n_permutations=0)
+
+
+def test_weighted_tables_are_resampled_by_row(make_inputs):
+    labels_dict, y_pred, y_true = make_inputs(200, seed=2, levels=LEVELS)
+    weighted = IntersectCounts.from_labels(labels_dict, y_pred, y_true,
+                                           sample_weight=np.full(200, 50.0))
+    with pytest.raises(ValueError, match="sample_weight"):
+        bootstrap_counts(weighted, "fnr", n_boot=10)
+    with pytest.raises(ValueError, match="sample_weight"):
+        permutation_test_counts(weighted.counts[0], weighted.counts[1], "fnr")
+
+    # scaling every weight must not change the spread of the replicates
+    kwargs = dict(n_boot=500, random_state=0)
+    plain = bootstrap_intersect(labels_dict, y_pred, y_true, "fnr", **kwargs)
+    scaled = bootstrap_intersect(labels_dict, y_pred, y_true, "fnr",
+                                 sample_weight=np.full(200, 50.0), **kwargs)
+    np.testing.assert_allclose(scaled.rates, plain.rates)
+    assert np.nanstd(scaled.max_diff_samples) == pytest.approx(
+        np.nanstd(plain.max_diff_samples), rel=0.2)
+
+    labels = labels_dict["Sex"]
+    kwargs = dict(n_permutations=2000, early_stop=False, random_state=0)
+    plain = permutation_test_group_diff("F", "M", labels, y_pred, y_true,
+                                        "fnr", **kwargs)
+    scaled = permutation_test_group_diff("F", "M", labels, y_pred, y_true,
+                                         "fnr",
+                                         sample_weight=np.full(200, 50.0),
+                                         **kwargs)
+    assert scaled.statistic == pytest.approx(plain.statistic)
+    assert scaled.p_value == pytest.approx(plain.p_value, abs=0.05)
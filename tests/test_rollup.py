@@ -0,0 +1,55 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from fairness import metrics
+from fairness.counts import IntersectCounts
+from fairness.rollup import RollupCube, rollup_cube
+
+LEVELS = {"Sex": ["M", "F"], "age_group": ["young", "middle", "older"],
+          "site": ["a", "b", "c", "d"]}
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_cube_matches_metrics_for_every_subset(make_inputs, sparse):
+    subject_labels_dict, y_pred, y_true = make_inputs(800, levels=LEVELS)
+    cube = rollup_cube(subject_labels_dict, y_pred, y_true, sparse=sparse)
+    assert len(cube.tables) == 7
+    summary = cube.summary("fnr")
+
+    for order in (1, 2, 3):
+        for subset in combinations(sorted(subject_labels_dict), order):
+            labels = {category: subject_labels_dict[category]
+                      for category in subset}
+            assert cube[subset].to_dict("acc") == metrics.all_intersect_accs(
+                labels, y_pred, y_true, sparse=sparse)
+            row = summary.loc[" + ".join(subset)]
+            assert row["max_diff"] == pytest.approx(
+                metrics.max_intersect_fnr_diff(labels, y_pred, y_true,
+                                               sparse=sparse))
+            assert row["max_ratio"] == pytest.approx(
+                metrics.max_intersect_fnr_ratio(labels, y_pred, y_true,
+                                                sparse=sparse))
+
+    frame = cube.to_frame("fpr")
+    assert len(frame) == sum(len(table.cells)
+                             for table in cube.tables.values())
+    assert cube["Sex"].to_dict("fpr") == cube.to_dict("fpr")[("Sex",)]
+
+
+def test_cube_orders_and_weights(make_inputs):
+    subject_labels_dict, y_pred, y_true = make_inputs(300, levels=LEVELS)
+    weights = np.random.default_rng(1).integers(0, 3, size=len(y_true))
+    cube = rollup_cube(subject_labels_dict, y_pred, y_true, min_order=2,
+                       max_order=2, sample_weight=weights)
+    assert [len(subset) for subset in cube.tables] == [2, 2, 2]
+    labels = {category: subject_labels_dict[category]
+              for category in ("Sex", "site")}
+    assert cube["site", "Sex"].to_dict("fdr") == pytest.approx(
+        metrics.all_intersect_fdrs(labels, y_pred, y_true,
+                                   sample_weight=weights), nan_ok=True)
+
+    table = IntersectCounts.from_labels(subject_labels_dict, y_pred, y_true)
+    with pytest.raises(ValueError):
+        RollupCube.from_table(table, max_order=4)
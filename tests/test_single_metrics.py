@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import pytest
 from fairness.single_metrics import (
     group_to_binary,
@@ -6,7 +7,8 @@ from fairness.single_metrics import (
     calculate_TPR_TNR_FPR_FNR,
     calculate_EOD,
     calculate_AOD,
-    calculate_DI
+    calculate_DI,
+    calculate_EOD_AOD_DI_by_group
 )
 
 # -----------------------------------------------------
@@ -159,3 +161,112 @@ def test_AOD_invalid_privileged_label():
             group_labels=["X", "Y"],
             privileged_label="Z"
         )
+
+
+# -----------------------------------------------------
+# 4. Vectorized counting
+# -----------------------------------------------------
+
+def test_confusion_matrix_matches_loop_on_arrays():
+    rng = np.random.default_rng(0)
+    y_test = rng.integers(0, 2, size=500)
+    y_pred = rng.integers(0, 2, size=500).astype(bool)
+
+    tp = int(np.sum((y_test == 1) & y_pred))
+    fn = int(np.sum((y_test == 1) & ~y_pred))
+    tn = int(np.sum((y_test == 0) & ~y_pred))
+    fp = int(np.sum((y_test == 0) & y_pred))
+
+    counts = calculate_TP_FN_FP_TN(y_test, y_pred)
+    assert counts == (tp, fn, tn, fp)
+    assert all(type(c) is int for c in counts)
+
+
+def test_confusion_matrix_no_positive_samples():
+    with pytest.raises(ValueError, match="no positive samples"):
+        calculate_TP_FN_FP_TN([0, 0], [1, 0])
+
+
+def test_AOD_uses_false_positive_rates():
+    # privileged: TPR = 1, FPR = 0; unprivileged: TPR = 0.5, FPR = 1
+    y_test = [1, 0, 1, 1, 0]
+    y_pred = [1, 0, 1, 0, 1]
+    groups = ["A", "A", "B", "B", "B"]
+
+    aod = calculate_AOD(y_test, y_pred, groups, privileged_label="A")
+    assert aod == pytest.approx(((1 - 0) + (0.5 - 1)) / 2)
+
+
+def test_by_group_matches_pairwise_calls():
+    rng = np.random.default_rng(1)
+    n = 400
+    y_test = rng.integers(0, 2, size=n)
+    y_pred = rng.integers(0, 2, size=n)
+    groups = rng.choice(["A", "B", "C", "D"], size=n)
+
+    result = calculate_EOD_AOD_DI_by_group(y_test, y_pred, groups, "A",
+                                           pooled=True)
+    assert list(result) == [g for g in pd.unique(groups) if g != "A"] + [
+        "pooled"]
+
+    for group in ["B", "C", "D"]:
+        mask = (groups == "A") | (groups == group)
+        args = (y_test[mask], y_pred[mask], groups[mask], "A")
+        assert result[group]["EOD"] == pytest.approx(calculate_EOD(*args))
+        assert result[group]["AOD"] == pytest.approx(calculate_AOD(*args))
+        assert result[group]["DI"] == pytest.approx(
+            calculate_DI(y_pred[mask], groups[mask], "A"))
+
+    assert result["pooled"]["AOD"] == pytest.approx(
+        calculate_AOD(y_test, y_pred, groups, "A"))
+
+
+def test_by_group_undefined_group_is_nan():
+    y_test = [1, 0, 0, 0]
+    y_pred = [1, 0, 1, 0]
+    groups = ["A", "A", "B", "B"]
+
+    result = calculate_EOD_AOD_DI_by_group(y_test, y_pred, groups, "A")
+    assert np.isnan(result["B"]["EOD"])
+    assert result["B"]["DI"] == pytest.approx(1.0)
+
+    with pytest.raises(ValueError, match="clashes"):
+        calculate_EOD_AOD_DI_by_group(y_test, y_pred,
+                                      ["A", "A", "pooled", "B"], "A",
+                                      pooled=True)
+
+
+def test_weighted_single_metrics_match_duplicated_rows():
+    rng = np.random.default_rng(5)
+    n = 200
+    groups = rng.choice(["A", "B", "C"], size=n)
+    y_test = rng.integers(0, 2, size=n)
+    y_pred = rng.integers(0, 2, size=n)
+    weights = rng.integers(1, 4, size=n)
+    rows = np.repeat(np.arange(n), weights)
+
+    tp, fn, tn, fp = calculate_TP_FN_FP_TN(y_test, y_pred,
+                                           sample_weight=weights * 0.5)
+    assert isinstance(tp, float)
+    assert tp + fn + tn + fp == pytest.approx(weights.sum() * 0.5)
+    assert calculate_TPR_TNR_FPR_FNR(tp, fn, tn, fp) == pytest.approx(
+        calculate_TPR_TNR_FPR_FNR(*calculate_TP_FN_FP_TN(y_test[rows],
+                                                         y_pred[rows])))
+
+    for fn_ in (calculate_EOD, calculate_AOD):
+        assert fn_(y_test, y_pred, groups, "A", sample_weight=weights) == \
+            pytest.approx(fn_(y_test[rows], y_pred[rows], groups[rows], "A"))
+    assert calculate_DI(y_pred, groups, "A", sample_weight=weights) == \
+        pytest.approx(calculate_DI(y_pred[rows], groups[rows], "A"))
+
+    weighted = calculate_EOD_AOD_DI_by_group(
+        y_test, y_pred, groups, "A", sample_weight=weights)
+    expanded = calculate_EOD_AOD_DI_by_group(
+        y_test[rows], y_pred[rows], groups[rows], "A")
+    for label in expanded:
+        assert weighted[label] == pytest.approx(expanded[label])
+
+
+def test_rates_reject_non_finite_counts():
+    with pytest.raises(ValueError, match="finite"):
+        calculate_TPR_TNR_FPR_FNR(1.0, float("nan"), 1.0, 1.0)
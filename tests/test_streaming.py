@@ -0,0 +1,259 @@
+import numpy as np
+import pytest
+
+from fairness import metrics
+from fairness.counts import IntersectCounts
+from fairness.streaming import (DecayedAccumulator, FairnessAccumulator,
+                                SlidingWindowAccumulator)
+
+METRICS = ["acc", "fnr", "fpr", "for", "fdr"]
+
+
+def _stream(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    labels_dict = {
+        "Sex": rng.choice(["M", "F"], size=n).tolist(),
+        "age_group": rng.choice(["young", "mid", "older"], size=n).tolist(),
+        "region": rng.integers(0, 4, size=n).tolist(),
+    }
+    labels = [f"{s}|{a}" for s, a in zip(labels_dict["Sex"],
+                                         labels_dict["age_group"])]
+    y_pred = rng.integers(0, 2, size=n).tolist()
+    y_true = rng.integers(0, 2, size=n).tolist()
+    return labels, labels_dict, y_pred, y_true
+
+
+def _feed(acc, labels, labels_dict, y_pred, y_true, start, stop):
+    acc.update(y_pred[start:stop], y_true[start:stop],
+               subject_labels=labels[start:stop],
+               subject_labels_dict={k: v[start:stop]
+                                    for k, v in labels_dict.items()})
+
+
+def _same(a, b):
+    if np.isnan(a):
+        return np.isnan(b)
+    return a == pytest.approx(b)
+
+
+def _same_dict(a, b):
+    return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+
+
+def test_batches_match_full_data():
+    labels, labels_dict, y_pred, y_true = _stream()
+    acc = FairnessAccumulator()
+    # the first batch lacks some levels, so later batches add new cells
+    for start, stop in [(0, 7), (7, 250), (250, 250), (250, 600)]:
+        _feed(acc, labels, labels_dict, y_pred, y_true, start, stop)
+
+    assert len(acc) == 600
+    group = labels[3]
+    for m in METRICS:
+        assert _same(getattr(acc, f"group_{m}")(group),
+                     getattr(metrics, f"group_{m}")(group, labels, y_pred,
+                                                    y_true))
+        assert _same(getattr(acc, f"intersect_{m}")({"Sex": "F", "region": 2}),
+                     getattr(metrics, f"intersect_{m}")(
+                         {"Sex": "F", "region": 2}, labels_dict, y_pred,
+                         y_true))
+        for sparse in (False, True):
+            assert _same_dict(
+                getattr(acc, f"all_intersect_{m}s")(sparse=sparse),
+                getattr(metrics, f"all_intersect_{m}s")(
+                    labels_dict, y_pred, y_true, sparse=sparse))
+        assert _same(getattr(acc, f"max_intersect_{m}_ratio")(min_support=5),
+                     getattr(metrics, f"max_intersect_{m}_ratio")(
+                         labels_dict, y_pred, y_true, min_support=5))
+
+
+def test_merge_matches_single_accumulator():
+    labels, labels_dict, y_pred, y_true = _stream(seed=1)
+    whole = FairnessAccumulator()
+    _feed(whole, labels, labels_dict, y_pred, y_true, 0, 600)
+
+    left, right = FairnessAccumulator(), FairnessAccumulator()
+    _feed(left, labels, labels_dict, y_pred, y_true, 0, 20)
+    _feed(right, labels, labels_dict, y_pred, y_true, 20, 600)
+    merged = left.merge(right)
+
+    assert len(merged) == 600
+    assert _same_dict(merged.all_intersect_fprs(), whole.all_intersect_fprs())
+    assert _same(merged.group_acc(labels[0]), whole.group_acc(labels[0]))
+
+
+def test_results_refresh_after_update():
+    acc = FairnessAccumulator()
+    acc.update([1, 1], [1, 1], subject_labels=["A", "A"])
+    assert acc.group_acc("A") == 1.0
+    acc.update([0, 0], [1, 1], subject_labels=["A", "A"])
+    assert acc.group_acc("A") == 0.5
+
+
+def test_update_validates_inputs():
+    acc = FairnessAccumulator()
+    with pytest.raises(ValueError):
+        acc.update([1], [1])
+    with pytest.raises(ValueError, match="same length"):
+        acc.update([1, 0], [1, 0], subject_labels=["A"])
+    acc.update([1], [1], subject_labels_dict={"Sex": ["F"]})
+    with pytest.raises(ValueError, match="categories"):
+        acc.update([1], [1], subject_labels_dict={"age": ["young"]})
+
+
+def test_update_counts_from_serialized_shards():
+    labels, labels_dict, y_pred, y_true = _stream(seed=2)
+    reducer = FairnessAccumulator()
+    for start, stop in [(0, 100), (100, 600)]:
+        shard = IntersectCounts.from_labels(
+            {k: v[start:stop] for k, v in labels_dict.items()},
+            y_pred[start:stop], y_true[start:stop])
+        reducer.update_counts(IntersectCounts.from_bytes(shard.to_bytes()))
+
+    assert len(reducer) == 600
+    assert _same_dict(reducer.all_intersect_fnrs(sparse=True),
+                      metrics.all_intersect_fnrs(labels_dict, y_pred, y_true,
+                                                 sparse=True))
+    assert _same(reducer.max_intersect_fnr_diff(),
+                 metrics.max_intersect_fnr_diff(labels_dict, y_pred, y_true))
+
+    # weighted shards count rows, not summed weight
+    weights = np.full(len(y_pred), 0.4)
+    reducer = FairnessAccumulator()
+    for start, stop in [(0, 100), (100, 600)]:
+        shard = IntersectCounts.from_labels(
+            {k: v[start:stop] for k, v in labels_dict.items()},
+            y_pred[start:stop], y_true[start:stop],
+            sample_weight=weights[start:stop])
+        with pytest.raises(ValueError, match="n_rows"):
+            reducer.update_counts(shard)
+        reducer.update_counts(shard, n_rows=stop - start)
+    assert len(reducer) == 600
+    assert _same_dict(reducer.all_intersect_fnrs(sparse=True),
+                      metrics.all_intersect_fnrs(labels_dict, y_pred, y_true,
+                                                 sparse=True,
+                                                 sample_weight=weights))
+
+
+def test_sliding_window_by_size_matches_last_k():
+    labels, labels_dict, y_pred, y_true = _stream(seed=3)
+    acc = SlidingWindowAccumulator(size=150)
+    for start in range(0, 600, 70):
+        _feed(acc, labels, labels_dict, y_pred, y_true, start, start + 70)
+
+    assert len(acc) == 150
+    tail = {k: v[-150:] for k, v in labels_dict.items()}
+    for sparse in (False, True):
+        assert _same_dict(acc.all_intersect_fprs(sparse=sparse),
+                          metrics.all_intersect_fprs(tail, y_pred[-150:],
+                                                     y_true[-150:],
+                                                     sparse=sparse))
+    assert _same(acc.group_fnr(labels[-1]),
+                 metrics.group_fnr(labels[-1], labels[-150:], y_pred[-150:],
+                                   y_true[-150:]))
+
+
+def test_sliding_window_by_time():
+    acc = SlidingWindowAccumulator(seconds=10)
+    acc.update([1, 0], [1, 1], subject_labels=["A", "A"], timestamps=[0, 5])
+    acc.update([1], [1], subject_labels=["A"], timestamps=[12])
+    # the observation at t=0 has left the window
+    assert len(acc) == 2
+    assert acc.group_acc("A") == 0.5
+    acc.expire(now=16)
+    assert len(acc) == 1
+    assert acc.group_acc("A") == 1.0
+    with pytest.raises(ValueError, match="non-decreasing"):
+        acc.update([1], [1], subject_labels=["A"], timestamps=[3])
+
+
+def test_decayed_matches_weighted_counts():
+    labels, _, y_pred, y_true = _stream(n=400, seed=4)
+    acc = DecayedAccumulator(half_life=5)
+    for start in range(0, 400, 90):
+        acc.update(y_pred[start:start + 90], y_true[start:start + 90],
+                   subject_labels=labels[start:start + 90])
+
+    weights = 0.5 ** ((399 - np.arange(400)) / 5)
+    group = np.array(labels) == labels[-1]
+    correct = np.array(y_pred) == np.array(y_true)
+    expected = weights[group & correct].sum() / weights[group].sum()
+    assert acc.group_acc(labels[-1]) == pytest.approx(expected)
+
+    table = acc.group_counts
+    row = table.index(labels[-1])
+    assert table.counts[row].sum() == pytest.approx(weights[group].sum())
+
+
+def test_weighted_batches_and_windows():
+    labels, labels_dict, y_pred, y_true = _stream()
+    weights = np.random.default_rng(2).random(len(y_pred))
+
+    acc = FairnessAccumulator()
+    _feed(acc, labels, labels_dict, y_pred, y_true, 0, 200)   # unweighted
+    acc.update(y_pred[200:], y_true[200:], subject_labels=labels[200:],
+               subject_labels_dict={k: v[200:]
+                                    for k, v in labels_dict.items()},
+               sample_weight=weights[200:])
+    full_weights = np.r_[np.ones(200), weights[200:]]
+    assert _same_dict(acc.all_intersect_fprs(),
+                      metrics.all_intersect_fprs(labels_dict, y_pred, y_true,
+                                                 sample_weight=full_weights))
+    assert _same(acc.group_acc(labels[0]),
+                 metrics.group_acc(labels[0], labels, y_pred, y_true,
+                                   sample_weight=full_weights))
+
+    window = SlidingWindowAccumulator(size=150)
+    for start in range(0, 600, 100):
+        window.update(y_pred[start:start + 100], y_true[start:start + 100],
+                      subject_labels_dict={k: v[start:start + 100]
+                                           for k, v in labels_dict.items()},
+                      sample_weight=weights[start:start + 100])
+    last = slice(450, 600)
+    window_dict = {k: v[last] for k, v in labels_dict.items()}
+    assert _same_dict(
+        window.all_intersect_fnrs(sparse=True),
+        metrics.all_intersect_fnrs(window_dict, y_pred[last], y_true[last],
+                                   sparse=True, sample_weight=weights[last]))
+
+
+@pytest.mark.parametrize("make, timed", [
+    (FairnessAccumulator, False),
+    (lambda: SlidingWindowAccumulator(seconds=60), True),
+    (lambda: DecayedAccumulator(half_life=10, unit="seconds"), True),
+])
+def test_rejected_batch_registers_no_labels(make, timed):
+    acc = make()
+    stamps = (lambda *t: {"timestamps": list(t)}) if timed else \
+        (lambda *t: {})
+    acc.update([0, 1], [1, 1], subject_labels=["A", "B"],
+               subject_labels_dict={"s": ["A", "B"]}, **stamps(0.0, 1.0))
+    before = acc.intersect_counts()
+
+    bad_batches = [dict(sample_weight=[-1.0], **stamps(2.0))]
+    if timed:
+        bad_batches.append(stamps(2.0, 3.0))
+    for bad in bad_batches:
+        with pytest.raises(ValueError):
+            acc.update([1], [1], subject_labels=["Z"],
+                       subject_labels_dict={"s": ["Z"]}, **bad)
+    assert acc.intersect_counts().levels == before.levels == (["A", "B"],)
+    assert acc.group_counts.labels == ["A", "B"]
+    assert acc.intersect_counts().counts.dtype == before.counts.dtype
+    assert len(acc) == 2
+
+
+def test_windows_only_accept_observations():
+    labels, labels_dict, y_pred, y_true = _stream()
+    windows = [SlidingWindowAccumulator(size=100),
+               DecayedAccumulator(half_life=50)]
+    acc = FairnessAccumulator()
+    _feed(acc, labels, labels_dict, y_pred, y_true, 0, 200)
+    for window in windows:
+        _feed(window, labels, labels_dict, y_pred, y_true, 0, 200)
+        assert not isinstance(window, FairnessAccumulator)
+        assert not hasattr(window, "merge")
+        assert not hasattr(window, "update_counts")
+        with pytest.raises(TypeError):
+            acc.merge(window)
+    assert len(acc) == 200
@@ -0,0 +1,95 @@
+from itertools import combinations, product
+
+import numpy as np
+import pytest
+
+from fairness.counts import IntersectCounts, rate_terms, rates_from_counts
+from fairness.subgroups import worst_subgroups
+
+
+def _planted_inputs(make_inputs, n=3000, n_categories=5, seed=0):
+    levels = {f"attr{j}": ["a", "b", "c"][:2 + j % 2]
+              for j in range(n_categories)}
+    subject_labels_dict, _, y_true = make_inputs(n, seed=seed, levels=levels)
+    subject_labels_dict = {category: np.asarray(labels)
+                           for category, labels in subject_labels_dict.items()}
+    # planted subgroup with extra errors
+    planted = (subject_labels_dict["attr1"] == "a") & \
+        (subject_labels_dict["attr3"] == "b")
+    flip = np.random.default_rng(seed).random(n) < \
+        np.where(planted, 0.5, 0.2)
+    y_pred = np.where(flip, 1 - y_true, y_true)
+    return subject_labels_dict, y_pred, y_true
+
+
+def _brute_force(subject_labels_dict, y_pred, y_true, metric, min_support,
+                 alpha):
+    categories = sorted(subject_labels_dict)
+    overall = IntersectCounts.from_labels({}, y_pred, y_true)
+    _, denom_total = rate_terms(overall.counts[0], metric)
+    overall_rate = rates_from_counts(overall.counts[0], metric)
+    sign = -1 if metric == "acc" else 1
+
+    scores = []
+    for order in range(1, len(categories) + 1):
+        for subset in combinations(categories, order):
+            levels = [sorted(set(subject_labels_dict[c])) for c in subset]
+            for labels in product(*levels):
+                mask = np.ones(len(y_true), dtype=bool)
+                for category, label in zip(subset, labels):
+                    mask &= subject_labels_dict[category] == label
+                table = IntersectCounts.from_labels(
+                    {}, y_pred[mask], y_true[mask])
+                _, denom = rate_terms(table.counts[0], metric)
+                if denom < min_support or denom == 0:
+                    continue
+                gap = sign * (rates_from_counts(table.counts[0], metric)
+                              - overall_rate)
+                if gap > 0:
+                    scores.append((denom / denom_total) ** alpha * gap)
+    return sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("metric", ["fnr", "acc", "fdr"])
+@pytest.mark.parametrize("alpha", [0.0, 1.0, 2.0])
+def test_matches_exhaustive_search(make_inputs, metric, alpha):
+    subject_labels_dict, y_pred, y_true = _planted_inputs(
+        make_inputs, n=1500, n_categories=4)
+    for min_support in (1, 40):
+        found = worst_subgroups(subject_labels_dict, y_pred, y_true, metric,
+                                k=8, min_support=min_support,
+                                max_depth=None, alpha=alpha)
+        expected = _brute_force(subject_labels_dict, y_pred, y_true, metric,
+                                min_support, alpha)[:8]
+        assert [s.score for s in found] == pytest.approx(expected)
+        assert all(s.support >= min_support for s in found)
+
+
+def test_finds_planted_subgroup(make_inputs):
+    subject_labels_dict, y_pred, y_true = _planted_inputs(
+        make_inputs, n_categories=12)
+    found = worst_subgroups(subject_labels_dict, y_pred, y_true, "acc", k=3,
+                            min_support=100, alpha=0.5)
+    assert found[0].conditions == {"attr1": "a", "attr3": "b"}
+    assert found[0].name == "attr1=a + attr3=b"
+    mask = (subject_labels_dict["attr1"] == "a") & \
+        (subject_labels_dict["attr3"] == "b")
+    assert found[0].rate == pytest.approx(np.mean(y_pred[mask]
+                                                  == y_true[mask]))
+    assert found[0].gap == pytest.approx(np.mean(y_pred == y_true)
+                                         - found[0].rate)
+
+    shallow = worst_subgroups(subject_labels_dict, y_pred, y_true, "acc",
+                              max_depth=1)
+    assert all(len(s.conditions) == 1 for s in shallow)
+
+
+def test_invalid_arguments(make_inputs):
+    subject_labels_dict, y_pred, y_true = _planted_inputs(make_inputs,
+                                                          n=100)
+    with pytest.raises(ValueError):
+        worst_subgroups(subject_labels_dict, y_pred, y_true, "auc")
+    with pytest.raises(ValueError):
+        worst_subgroups(subject_labels_dict, y_pred, y_true, k=0)
+    with pytest.raises(ValueError):
+        worst_subgroups(subject_labels_dict, y_pred, y_true, alpha=-1)
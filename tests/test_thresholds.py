@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from fairness import metrics
+from fairness.thresholds import (ThresholdTable, fit_group_thresholds,
+                                 optimize_thresholds, threshold_sweep)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_sweep_matches_metrics_at_every_threshold(make_inputs, sparse):
+    subject_labels_dict, scores, y_true = make_inputs(1500, scores=True)
+    # include thresholds equal to observed scores to check ties
+    thresholds = np.r_[0.0, scores[:5], 0.5, 1.0]
+    sweep = threshold_sweep(subject_labels_dict, scores, y_true, thresholds,
+                            sparse=sparse)
+    assert np.all(np.diff(sweep.thresholds) > 0)
+
+    for i, threshold in enumerate(sweep.thresholds):
+        y_pred = (scores >= threshold).astype(int).tolist()
+        for metric, all_fn, diff_fn in [
+            ("fnr", metrics.all_intersect_fnrs,
+             metrics.max_intersect_fnr_diff),
+            ("acc", metrics.all_intersect_accs,
+             metrics.max_intersect_acc_diff),
+        ]:
+            expected = all_fn(subject_labels_dict, y_pred, y_true.tolist(),
+                              sparse=sparse)
+            got = dict(zip(sweep.names(), sweep.rates(metric)[i]))
+            assert got == pytest.approx(expected, nan_ok=True)
+            assert sweep.max_diff(metric)[i] == pytest.approx(
+                diff_fn(subject_labels_dict, y_pred, y_true.tolist(),
+                        sparse=sparse), nan_ok=True)
+
+        expected_ratio = metrics.max_intersect_fpr_ratio(
+            subject_labels_dict, y_pred, y_true.tolist(), sparse=sparse)
+        assert sweep.max_ratio("fpr")[i] == pytest.approx(expected_ratio,
+                                                          nan_ok=True)
+
+
+def test_weighted_sweep_matches_duplicated_rows(make_inputs):
+    subject_labels_dict, scores, y_true = make_inputs(300, scores=True)
+    weights = np.random.default_rng(4).integers(0, 4, size=300)
+    rows = np.repeat(np.arange(300), weights)
+    weighted = threshold_sweep(subject_labels_dict, scores, y_true,
+                               sample_weight=weights)
+    expanded = threshold_sweep({k: np.asarray(v)[rows]
+                                for k, v in subject_labels_dict.items()},
+                               scores[rows], y_true[rows])
+    np.testing.assert_allclose(weighted.counts, expanded.counts)
+
+
+def test_sweep_defaults_and_validation(make_inputs):
+    subject_labels_dict, scores, y_true = make_inputs(200, scores=True)
+    sweep = threshold_sweep(subject_labels_dict, scores, y_true)
+    assert sweep.counts.shape == (101, 6, 4)
+    assert np.all(sweep.counts.sum(axis=(1, 2)) == 200)
+
+    frame = sweep.to_frame("fpr")
+    assert frame.shape == (101, 6) and frame.index.name == "threshold"
+
+    with pytest.raises(ValueError, match="same length"):
+        threshold_sweep(subject_labels_dict, scores[:-1], y_true)
+    with pytest.raises(ValueError, match="NaN"):
+        threshold_sweep(subject_labels_dict, np.r_[scores[:-1], np.nan],
+                        y_true)
+
+
+def _separable_inputs(n=20000, seed=1):
+    rng = np.random.default_rng(seed)
+    labels = rng.choice(["x", "y", "z"], size=n)
+    y_true = rng.integers(0, 2, size=n)
+    separation = np.select([labels == "x", labels == "y"], [2.0, 1.0], 0.5)
+    logits = rng.normal(size=n) + separation * (y_true - 0.5)
+    return {"group": labels.tolist()}, 1 / (1 + np.exp(-logits)), y_true
+
+
+@pytest.mark.parametrize("metric", ["fpr", "fnr"])
+def test_optimized_thresholds_respect_floor_and_match_metrics(metric):
+    subject_labels_dict, scores, y_true = _separable_inputs()
+    sweep = threshold_sweep(subject_labels_dict, scores, y_true)
+    single = sweep.max_diff(metric)[np.argmax(sweep.rates("acc").mean(1))]
+
+    table = optimize_thresholds(sweep, metric, accuracy_floor=0.68)
+    y_pred = table.apply(subject_labels_dict, scores)
+    diff_fn = getattr(metrics, f"max_intersect_{metric}_diff")
+    assert table.accuracy >= 0.68
+    assert (y_pred == y_true).mean() == pytest.approx(table.accuracy)
+    assert table.max_diff == pytest.approx(
+        diff_fn(subject_labels_dict, y_pred.tolist(), y_true.tolist()))
+    assert table.max_diff < single
+    assert set(table.thresholds) <= set(sweep.thresholds)
+
+    with pytest.raises(ValueError, match="accuracy_floor"):
+        optimize_thresholds(sweep, metric, accuracy_floor=0.99)
+
+
+def test_threshold_table_apply():
+    table = ThresholdTable(
+        categories=("age", "sex"),
+        levels=(["old", "young"], ["F", "M"]),
+        cells=np.array([[0, 1], [1, 0]]),         # old + M, young + F
+        thresholds=np.array([0.2, 0.8]),
+        default_threshold=0.5,
+    )
+    subject_labels_dict = {"sex": ["M", "F", "F", "M", None],
+                           "age": ["old", "young", "old", "unseen", "old"]}
+    np.testing.assert_array_equal(
+        table.thresholds_for(subject_labels_dict), [0.2, 0.8, 0.5, 0.5, 0.5])
+    np.testing.assert_array_equal(
+        table.apply(subject_labels_dict, [0.3, 0.7, 0.6, 0.4, 0.9]),
+        [1, 0, 1, 0, 1])
+    assert table.to_dict() == {"old + M": 0.2, "young + F": 0.8}
+
+    with pytest.raises(ValueError, match="categories"):
+        table.apply({"sex": ["M"]}, [0.5])
+
+
+def test_fit_group_thresholds_leaves_small_groups_unconstrained():
+    subject_labels_dict, scores, y_true = _separable_inputs(n=5000)
+    subject_labels_dict["group"][:3] = ["tiny"] * 3
+    table = fit_group_thresholds(subject_labels_dict, scores, y_true, "fnr",
+                                 accuracy_floor=0.6, min_support=10)
+    assert "tiny" in table.to_dict()
+    assert table.accuracy >= 0.6
@@ -60,6 +60,21 @@ def test_plot_group_metric_from_eval_df():
     _assert_figure(fig)
 
 
+def test_plot_group_metric_from_compact_eval_df():
+    subject_labels, predictions, true_statuses, _ = _demo_inputs()
+    eval_df = pd.DataFrame(
+        {
+            "subject_label": pd.Categorical(subject_labels),
+            "y_pred": pd.Series(predictions, dtype="int8"),
+            "y_true": pd.Series(true_statuses, dtype="int8"),
+        }
+    )
+    fig = vis.plot_group_metric_from_eval_df(metrics.group_acc, eval_df)
+    _assert_figure(fig)
+    labels = [t.get_text() for t in fig.axes[0].get_xticklabels()]
+    assert labels == list(dict.fromkeys(subject_labels))
+
+
 def test_plot_pairwise_group_metric():
     subject_labels, predictions, true_statuses, _ = _demo_inputs()
     fig = vis.plot_pairwise_group_metric(
@@ -71,6 +86,44 @@ def test_plot_pairwise_group_metric():
     _assert_figure(fig)
 
 
+def test_plot_pairwise_group_metric_counts_once_and_matches_pairs():
+    subject_labels, predictions, true_statuses, _ = _demo_inputs()
+
+    def custom_ratio(a, b, *args):
+        return metrics.group_fnr_ratio(a, b, *args)
+
+    fast = vis.plot_pairwise_group_metric(
+        metrics.group_fnr_ratio, subject_labels, predictions, true_statuses)
+    slow = vis.plot_pairwise_group_metric(
+        custom_ratio, subject_labels, predictions, true_statuses)
+    widths = [[bar.get_width() for bar in fig.axes[0].patches]
+              for fig in (fast, slow)]
+    labels = [[tick.get_text() for tick in fig.axes[0].get_yticklabels()]
+              for fig in (fast, slow)]
+    assert pd.Series(widths[0]).equals(pd.Series(widths[1]))
+    assert labels[0] == labels[1]
+
+
+def test_plot_pairwise_group_metric_heatmap():
+    subject_labels, predictions, true_statuses, _ = _demo_inputs()
+    fig = vis.plot_pairwise_group_metric(
+        metrics.group_acc_diff,
+        subject_labels,
+        predictions,
+        true_statuses,
+        heatmap=True,
+    )
+    _assert_figure(fig)
+    grid = fig.axes[0].images[0].get_array()
+    expected = metrics.pairwise_group_metric(subject_labels, predictions,
+                                             true_statuses, "acc")
+    # the diagonal is not a plotted pair
+    assert grid.mask.diagonal().all()
+    off_diagonal = ~grid.mask
+    assert (grid.data[off_diagonal]
+            == expected.to_numpy()[off_diagonal]).all()
+
+
 def test_plot_intersectional_metric():
     subject_labels, predictions, \
         true_statuses, subject_labels_dict = _demo_inputs()